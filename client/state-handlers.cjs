@@ -10,6 +10,58 @@
 
 (function() {
 
+/**
+ * Apply a messages patch from the bridge to the client's committed messages.
+ *
+ * Ops are absolute (a whole message or tool call at an index), so any base
+ * version from patch.from to patch.to converges on patch.to.
+ *
+ * @param {Array} messages - Current committed messages
+ * @param {{stream: string, version: number}|null} base - Where those messages stand
+ * @param {Object} patch - { stream, from, to, length, ops }
+ * @returns {Array|null} New messages array, or null if the patch doesn't apply
+ *   to this base (other stream, missed versions) — fetch a full snapshot.
+ */
+function applyMessagesPatch(messages, base, patch) {
+  if (!messages || !base || base.stream !== patch.stream) return null;
+  if (base.version < patch.from || base.version > patch.to) return null;
+  const next = messages.slice(0, patch.length);
+  for (const op of patch.ops || []) {
+    if (op.i > next.length) return null;
+    if (op.op === 'set') {
+      next[op.i] = op.message;
+    } else if (op.op === 'tool') {
+      const msg = next[op.i];
+      if (!msg || !msg.tool_calls || op.t > msg.tool_calls.length) return null;
+      const calls = msg.tool_calls.slice();
+      calls[op.t] = op.call;
+      next[op.i] = { ...msg, tool_calls: calls };
+    } else {
+      return null;
+    }
+  }
+  return next.length === patch.length ? next : null;
+}
+
+/**
+ * Shared by state and current events: full messages set the base, a patch
+ * moves it forward, a patch that doesn't apply asks for a resync.
+ */
+function applyMessagesUpdate(data, ctx, updates, effects) {
+  if (data.messages) {
+    updates.messages = data.messages;
+    updates.messagesBase = data.messagesBase || null;
+  } else if (data.patch) {
+    const messages = applyMessagesPatch(ctx.messages, ctx.messagesBase, data.patch);
+    if (messages) {
+      updates.messages = messages;
+      updates.messagesBase = { stream: data.patch.stream, version: data.patch.to };
+    } else {
+      effects.resync = true;
+    }
+  }
+}
+
 /**
  * Process an SSE state event and return state updates + side-effect flags.
  *
@@ -17,6 +69,8 @@
  * @param {Object} ctx - Current client context
  * @param {string|null} ctx.currentFolder - Currently connected folder name
  * @param {Object} ctx.session - Current liveState.session
+ * @param {Array} [ctx.messages] - Current committed messages (for patches)
+ * @param {Object|null} [ctx.messagesBase] - { stream, version } those messages are at
  * @returns {{ updates: Object, effects: Object }}
  *
  * updates: partial liveState fields to merge (only present keys should be applied)
@@ -34,12 +88,11 @@ function applyStateEvent(data, ctx) {
     fetchFolders: false,
     pushNotify: null,
     resetPushTag: false,
+    resync: false,
   };
 
   // Apply snapshot fields
-  if (data.messages) {
-    updates.messages = data.messages;
-  }
+  applyMessagesUpdate(data, ctx, updates, effects);
   if (data.session && typeof data.session === 'object') {
     updates.session = { ...ctx.session, ...data.session };
   }
@@ -65,6 +118,7 @@ function applyStateEvent(data, ctx) {
   if (data.sessionEnded && ctx.currentFolder) {
     updates.session = {};
     updates.messages = [];
+    updates.messagesBase = null;
     updates.status = 'idle';
     updates.activity = null;
     updates.slashCommands = null;
@@ -106,31 +160,29 @@ function applyTextEvent(data) {
  * Pure replacement — server sends committed messages + streaming overlay.
  * Client never decides when messages are committed; server tells it.
  *
- * @param {Object} data - SSE current event payload (CurrentMessage + messages + folder)
+ * @param {Object} data - SSE current event payload (CurrentMessage + messages or patch + folder)
+ * @param {Object} [ctx] - { messages, messagesBase } as for applyStateEvent
  * @returns {{ updates: Object, effects: Object }}
  */
-function applyCurrentEvent(data) {
+function applyCurrentEvent(data, ctx = {}) {
   const updates = {
     status: 'working',
     activity: data.activity || null,
   };
+  const effects = {
+    newCurrentMessage: data,
+    newStreamingText: data.text || '',
+    resync: false,
+  };
 
   // Server sends authoritative committed messages alongside the streaming overlay
-  if (data.messages) {
-    updates.messages = data.messages;
-  }
+  applyMessagesUpdate(data, ctx, updates, effects);
 
-  return {
-    updates,
-    effects: {
-      newCurrentMessage: data,
-      newStreamingText: data.text || '',
-    },
-  };
+  return { updates, effects };
 }
 
 // --- Exports ---
-const mod = { applyStateEvent, applyTextEvent, applyCurrentEvent };
+const mod = { applyStateEvent, applyTextEvent, applyCurrentEvent, applyMessagesPatch };
 if (typeof window !== 'undefined') window.Gdn = { ...window.Gdn, ...mod };
 if (typeof module !== 'undefined') module.exports = mod;
 })();
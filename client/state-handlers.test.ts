@@ -3,7 +3,7 @@ import { describe, it, expect } from "vitest";
 import { createRequire } from "node:module";
 
 const require = createRequire(import.meta.url);
-const { applyStateEvent, applyTextEvent, applyCurrentEvent } = require("./state-handlers.cjs" as string);
+const { applyStateEvent, applyTextEvent, applyCurrentEvent, applyMessagesPatch } = require("./state-handlers.cjs" as string);
 
 /** Default context — connected to a folder with an existing session. */
 function ctx(overrides: Record<string, unknown> = {}) {
@@ -335,3 +335,95 @@ describe("applyCurrentEvent — pure replacement", () => {
     expect("commitMessage" in effects).toBe(false);
   });
 });
+
+// ============================================================
+// Messages patches — versioned updates against the client's base
+// ============================================================
+describe("applyMessagesPatch", () => {
+  const call = { name: "Bash", status: "running", input: "ls", output: null, collapsed: true };
+  const msgs = [{ role: "user", content: "hi" }, { role: "assistant", content: null, tool_calls: [call] }];
+  const base = { stream: "s1", version: 4 };
+  const patch = (ops: unknown[], extra: Record<string, unknown> = {}) =>
+    ({ stream: "s1", from: 4, to: 6, length: 3, ops, ...extra });
+
+  it("appends and replaces messages", () => {
+    const added = { role: "user", content: "next" };
+    const out = applyMessagesPatch(msgs, base, patch([
+      { op: "set", i: 1, message: { role: "assistant", content: "done" } },
+      { op: "set", i: 2, message: added },
+    ]));
+    expect(out).toEqual([msgs[0], { role: "assistant", content: "done" }, added]);
+    expect(out[0]).toBe(msgs[0]);
+  });
+
+  it("replaces a single tool call without touching the input array", () => {
+    const done = { ...call, status: "completed", output: "a.txt" };
+    const out = applyMessagesPatch(msgs, base, patch([{ op: "tool", i: 1, t: 0, call: done }], { length: 2 }));
+    expect(out[1].tool_calls).toEqual([done]);
+    expect(msgs[1].tool_calls![0]).toBe(call);
+  });
+
+  it("applies from any base between from and to", () => {
+    const p = patch([{ op: "set", i: 2, message: { role: "user", content: "x" } }]);
+    expect(applyMessagesPatch(msgs, { stream: "s1", version: 5 }, p)).toHaveLength(3);
+    expect(applyMessagesPatch(msgs, { stream: "s1", version: 6 }, p)).toHaveLength(3);
+  });
+
+  it("refuses a patch for another stream, a missed version, or no base", () => {
+    const p = patch([{ op: "set", i: 2, message: { role: "user", content: "x" } }]);
+    expect(applyMessagesPatch(msgs, { stream: "s2", version: 4 }, p)).toBeNull();
+    expect(applyMessagesPatch(msgs, { stream: "s1", version: 3 }, p)).toBeNull();
+    expect(applyMessagesPatch(msgs, { stream: "s1", version: 7 }, p)).toBeNull();
+    expect(applyMessagesPatch(msgs, null, p)).toBeNull();
+  });
+
+  it("refuses ops that leave a hole", () => {
+    expect(applyMessagesPatch(msgs, base, patch([{ op: "set", i: 3, message: {} }], { length: 4 }))).toBeNull();
+    expect(applyMessagesPatch(msgs, base, patch([], { length: 3 }))).toBeNull();
+  });
+});
+
+describe("applyStateEvent / applyCurrentEvent — patches", () => {
+  const msgs = [{ role: "user", content: "hi" }];
+  const base = { stream: "s1", version: 1 };
+  const added = { role: "assistant", content: "hello" };
+  const patch = { stream: "s1", from: 1, to: 2, length: 2, ops: [{ op: "set", i: 1, message: added }] };
+
+  it("state snapshot sets the messages base", () => {
+    const { updates } = applyStateEvent({ messages: msgs, messagesBase: base }, ctx());
+    expect(updates.messagesBase).toEqual(base);
+  });
+
+  it("state patch moves messages and base forward", () => {
+    const { updates, effects } = applyStateEvent({ patch, status: "idle" }, ctx({ messages: msgs, messagesBase: base }));
+    expect(updates.messages).toEqual([msgs[0], added]);
+    expect(updates.messagesBase).toEqual({ stream: "s1", version: 2 });
+    expect(effects.resync).toBe(false);
+  });
+
+  it("state patch that doesn't apply asks for a resync and leaves messages alone", () => {
+    const { updates, effects } = applyStateEvent({ patch }, ctx({ messages: msgs, messagesBase: { stream: "old", version: 1 } }));
+    expect("messages" in updates).toBe(false);
+    expect(effects.resync).toBe(true);
+  });
+
+  it("current patch applies against ctx", () => {
+    const { updates, effects } = applyCurrentEvent(
+      { text: null, tool_calls: [], thinking: null, activity: "tool", patch },
+      { messages: msgs, messagesBase: base },
+    );
+    expect(updates.messages).toEqual([msgs[0], added]);
+    expect(effects.resync).toBe(false);
+  });
+
+  it("current patch without a base asks for a resync", () => {
+    const { effects } = applyCurrentEvent({ text: null, tool_calls: [], thinking: null, patch });
+    expect(effects.resync).toBe(true);
+  });
+
+  it("sessionEnded clears the base", () => {
+    const { updates } = applyStateEvent({ sessionEnded: true, patch }, ctx({ messages: msgs, messagesBase: base }));
+    expect(updates.messages).toEqual([]);
+    expect(updates.messagesBase).toBeNull();
+  });
+});
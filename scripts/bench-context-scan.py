@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Benchmark context-profiler's streaming scanner against a per-line parse.
+
+Generates a synthetic session JSONL shaped like real CC output (assistant
+lines with usage, tool_result lines with occasional 300KB persisted-output
+spills, progress noise), then analyzes it twice in separate child processes:
+once with the old read-every-line json.loads loop, once with the scanner.
+Reports wall time and peak RSS for each.
+
+Usage:
+    python3 scripts/bench-context-scan.py                  # 2GB synthetic file
+    python3 scripts/bench-context-scan.py --size-mb 256    # Smaller run
+    python3 scripts/bench-context-scan.py --keep /tmp/big.jsonl  # Reuse/keep file
+"""
+import argparse, importlib.util, json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+PROFILER = Path(__file__).with_name("context-profiler.py")
+SPILL_BYTES = 300 * 1024
+# Tool output is mostly code and logs: newlines, quotes and non-ASCII force the slow decode path
+OUTPUT_LINE = 'const label = "Gu\u00e9ridon";\tconsole.log(`${label}: ${JSON.stringify({ok: true})}`);\n'
+
+
+def load_profiler():
+    spec = importlib.util.spec_from_file_location("context_profiler", PROFILER)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def envelope(kind):
+    # Key order matches CC: user/progress put "type" first, assistant puts it after "message"
+    return {
+        "parentUuid": "0a9270c5-e483-4e45-8453-27f888fe29a9", "isSidechain": False,
+        "userType": "external", "cwd": "/home/user/Repos/bench",
+        "sessionId": "e701960b-7ed8-430a-9ec1-b731087c2cb4", "version": "2.1.63",
+        "gitBranch": "main",
+    } | ({} if kind == "assistant" else {"type": kind})
+
+
+def synth_lines(i):
+    """One synthetic turn: progress, assistant tool_use, tool_result."""
+    progress = envelope("progress") | {"data": {"type": "hook_progress", "hookName": "PostToolUse"}}
+    assistant = envelope("assistant") | {
+        "message": {
+            "model": "claude-opus-4-6", "id": f"msg_{i}", "type": "message", "role": "assistant",
+            "content": [{"type": "tool_use", "id": f"toolu_{i}", "name": "Bash", "input": {"command": "ls -la"}}],
+            "usage": {"input_tokens": 1, "cache_creation_input_tokens": 200 + i % 500,
+                      "cache_read_input_tokens": 40000 + i % 150000, "output_tokens": 40},
+        },
+        "requestId": f"req_{i}", "type": "assistant",
+    }
+    size = SPILL_BYTES if i % 10 == 0 else 4096
+    body = (OUTPUT_LINE * (size // len(OUTPUT_LINE) + 1))[:size]
+    if i % 10 == 0:
+        body = f"<persisted-output>\n{body}\n</persisted-output>"
+    user = envelope("user") | {
+        "message": {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"toolu_{i}", "content": body, "is_error": False},
+        ]},
+        "toolUseResult": {"stdout": body[:2048], "stderr": ""},
+    }
+    return [json.dumps(o, separators=(",", ":")) + "\n" for o in (progress, assistant, user)]
+
+
+def generate(path, size_mb):
+    target = size_mb * 1024 * 1024
+    written = i = 0
+    with open(path, "w") as f:
+        while written < target:
+            for line in synth_lines(i):
+                f.write(line)
+                written += len(line)
+            i += 1
+    return written
+
+
+def run_naive(path):
+    """The pre-scanner analyze_jsonl loop: json.loads on every line."""
+    turns = peak = 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if obj.get("type") != "assistant":
+                continue
+            usage = obj.get("message", {}).get("usage", {})
+            total = (usage.get("input_tokens", 0) + usage.get("cache_creation_input_tokens", 0)
+                     + usage.get("cache_read_input_tokens", 0))
+            if total == 0:
+                continue
+            turns += 1
+            peak = total
+    return turns, peak
+
+
+def run_fast(path):
+    profiler = load_profiler()
+    turns = peak = 0
+    with open(path, "rb") as f:
+        for row in profiler.turn_rows(profiler.iter_records(f)):
+            turns += 1
+            peak = row["total"]
+    return turns, peak
+
+
+def measure(mode, path):
+    """Run one mode in a child so ru_maxrss is that mode's alone."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, __file__, "--mode", mode, str(path)], stdout=subprocess.PIPE)
+    out = proc.stdout.read()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        sys.exit(f"{mode} run failed (status {status})")
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss_mb = rusage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return elapsed, rss_mb, json.loads(out)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark context-profiler JSONL scanning")
+    p.add_argument("--size-mb", type=int, default=2048, help="Synthetic file size (default 2048)")
+    p.add_argument("--keep", type=str, default=None, help="Path for the synthetic file (reused if present)")
+    p.add_argument("--mode", choices=["naive", "fast"], help=argparse.SUPPRESS)
+    p.add_argument("path", nargs="?", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.mode:
+        turns, peak = (run_naive if args.mode == "naive" else run_fast)(args.path)
+        print(json.dumps({"turns": turns, "peak": peak}))
+        return
+
+    if args.keep:
+        path = Path(args.keep)
+        tmp = None
+    else:
+        tmp = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False)
+        tmp.close()
+        path = Path(tmp.name)
+    try:
+        if not path.exists() or path.stat().st_size == 0:
+            print(f"Generating {args.size_mb}MB synthetic JSONL at {path}...", flush=True)
+            generate(path, args.size_mb)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"File: {size_mb:,.0f}MB\n")
+        print(f"{'Mode':<6} {'Wall':>8} {'MB/s':>8} {'PeakRSS':>9} {'Turns':>9}")
+        print("-" * 44)
+        results = {}
+        for mode in ("naive", "fast"):
+            elapsed, rss, res = measure(mode, path)
+            results[mode] = res
+            print(f"{mode:<6} {elapsed:>7.1f}s {size_mb / elapsed:>8,.0f} {rss:>7,.0f}MB {res['turns']:>9,}", flush=True)
+        if results["naive"] != results["fast"]:
+            sys.exit(f"\nMISMATCH: naive={results['naive']} fast={results['fast']}")
+        print("\nResults match.")
+    finally:
+        if tmp:
+            path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+/**
+ * Benchmark: session resume latency and peak memory on large JSONL files.
+ *
+ * Compares the old resume path (readFile the whole JSONL, parseSessionJSONL
+ * into a string per event, replayFromJSONL re-parses each) with the streaming
+ * path (readLines + pushJSONLLine, replaying events as each assistant message
+ * completes), cold and from a warm replay cache snapshot as createSession does
+ * after a restart. The session file is a fixture repeated with suffixed message
+ * ids until it is about --mb long. Each run happens in a fresh child process
+ * (HOME pointed at a temp dir for the cache) so peak RSS (getrusage maxrss)
+ * belongs to one variant.
+ *
+ * Usage:
+ *   npx tsx scripts/bench-resume.ts [--mb 10,50,200] [--runs 3]
+ */
+
+import { execFileSync } from "node:child_process";
+import { mkdtempSync, readFileSync, rmSync, writeFileSync } from "node:fs";
+import { readFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { fileURLToPath } from "node:url";
+import {
+  createJSONLReplay,
+  endJSONLReplay,
+  parseSessionJSONL,
+  pushJSONLLine,
+} from "../server/bridge-logic.js";
+import { readLines } from "../server/folders.js";
+import { loadReplaySnapshot, saveReplaySnapshot } from "../server/replay-cache.js";
+import { StateBuilder } from "../server/state-builder.js";
+
+const SCRIPT = fileURLToPath(import.meta.url);
+const PROJECT_ROOT = join(SCRIPT, "../..");
+
+// -- Args --
+const args = process.argv.slice(2);
+const mbIdx = args.indexOf("--mb");
+const SIZES = mbIdx >= 0 ? args[mbIdx + 1].split(",").map((n) => parseFloat(n)) : [10, 50, 200];
+const runsIdx = args.indexOf("--runs");
+const RUNS = runsIdx >= 0 ? parseInt(args[runsIdx + 1]) : 3;
+const childIdx = args.indexOf("--child");
+
+// The replay cache only keys files by real session UUIDs
+const SESSION_ID = "00000000-0000-4000-8000-000000000000";
+
+// -- Variants --
+
+type Variant = "whole" | "stream" | "cached";
+
+/** Pre-change createSession: whole file in memory, events serialized then re-parsed. */
+async function resumeWhole(path: string, sb: StateBuilder): Promise<number> {
+  const content = await readFile(path, "utf-8");
+  const { events } = parseSessionJSONL(content);
+  sb.replayFromJSONL(events);
+  return events.length;
+}
+
+/** Current createSession (replaySessionJSONL in bridge.ts). */
+async function resumeStream(path: string, sb: StateBuilder): Promise<number> {
+  const replay = createJSONLReplay();
+  let eventCount = 0;
+  await readLines(path, (line) => {
+    const events = pushJSONLLine(replay, line);
+    eventCount += events.length;
+    sb.replayEvents(events);
+  });
+  const tail = endJSONLReplay(replay);
+  sb.replayEvents(tail);
+  return eventCount + tail.length;
+}
+
+/** Current createSession (replaySessionJSONL in bridge.ts): snapshot, then the tail. */
+async function resumeCached(path: string, sb: StateBuilder): Promise<number> {
+  const cached = await loadReplaySnapshot(SESSION_ID, path);
+  const start = cached?.offset ?? 0;
+  const replay = createJSONLReplay(start);
+  if (cached) {
+    sb.restoreSnapshot(cached.state);
+    replay.lastUsage = cached.lastUsage;
+  }
+  let eventCount = 0;
+  await readLines(path, (line, lineEnd) => {
+    const events = pushJSONLLine(replay, line, lineEnd);
+    eventCount += events.length;
+    sb.replayEvents(events);
+  }, start);
+  const snapshot = cached ? null : { offset: replay.checkpoint, lastUsage: replay.lastUsage, state: sb.toSnapshot() };
+  const tail = endJSONLReplay(replay);
+  sb.replayEvents(tail);
+  if (snapshot) await saveReplaySnapshot(SESSION_ID, path, snapshot); // cold run primes the cache
+  return eventCount + tail.length;
+}
+
+interface RunResult { ms: number; maxRssMB: number; events: number; messages: number }
+
+// -- Child: one resume, result as JSON on stdout --
+
+if (childIdx >= 0) {
+  const [variant, path] = [args[childIdx + 1] as Variant, args[childIdx + 2]];
+  const sb = new StateBuilder(SESSION_ID, "bench");
+  const start = process.hrtime.bigint();
+  const resume = { whole: resumeWhole, stream: resumeStream, cached: resumeCached }[variant];
+  const events = await resume(path, sb);
+  const ms = Number(process.hrtime.bigint() - start) / 1e6;
+  const result: RunResult = {
+    ms,
+    maxRssMB: process.resourceUsage().maxRSS / 1024,
+    events,
+    messages: sb.getMessages().length,
+  };
+  console.log(JSON.stringify(result));
+  process.exit(0);
+}
+
+// -- Session file --
+
+function writeSession(dir: string, mb: number): string {
+  const fixture = readFileSync(join(PROJECT_ROOT, "fixtures", "pipeline-tool-execution.jsonl"), "utf-8").trimEnd();
+  const path = join(dir, `session-${mb}mb.jsonl`);
+  const target = mb * 1024 * 1024;
+  const parts: string[] = [];
+  let bytes = 0;
+  // Suffix message ids per copy — StateBuilder drops assistant ids it has seen
+  for (let copy = 0; bytes < target; copy++) {
+    const part = fixture.replace(/"id":"(msg_[^"]*)"/g, `"id":"$1_${copy}"`) + "\n";
+    parts.push(part);
+    bytes += Buffer.byteLength(part, "utf8");
+  }
+  writeFileSync(path, parts.join(""));
+  return path;
+}
+
+function runChild(variant: Variant, path: string, home: string): RunResult {
+  const out = execFileSync(process.execPath, [...process.execArgv, SCRIPT, "--child", variant, path], {
+    encoding: "utf-8",
+    maxBuffer: 1024 * 1024,
+    env: { ...process.env, HOME: home },
+  });
+  return JSON.parse(out.trim().split("\n").pop()!);
+}
+
+function median(values: number[]): number {
+  const sorted = [...values].sort((a, b) => a - b);
+  return sorted[Math.floor(sorted.length / 2)];
+}
+
+// -- Main --
+
+const dir = mkdtempSync(join(tmpdir(), "bench-resume-"));
+try {
+  console.log(`${"Session".padEnd(10)} ${"variant".padEnd(8)} ${"ms".padStart(8)} ${"peak RSS MB".padStart(12)} ${"events".padStart(8)} ${"messages".padStart(9)}`);
+  console.log("-".repeat(60));
+  for (const mb of SIZES) {
+    const path = writeSession(dir, mb);
+    const home = mkdtempSync(join(dir, "home-"));
+    runChild("cached", path, home); // cold: replays everything, writes the snapshot
+    for (const variant of ["whole", "stream", "cached"] as Variant[]) {
+      const runs = Array.from({ length: RUNS }, () => runChild(variant, path, home));
+      const { events, messages } = runs[0];
+      console.log(
+        `${`${mb}MB`.padEnd(10)} ${variant.padEnd(8)} ${median(runs.map((r) => r.ms)).toFixed(0).padStart(8)} ` +
+          `${median(runs.map((r) => r.maxRssMB)).toFixed(0).padStart(12)} ${String(events).padStart(8)} ${String(messages).padStart(9)}`,
+      );
+    }
+    rmSync(path);
+    rmSync(home, { recursive: true });
+  }
+} finally {
+  rmSync(dir, { recursive: true, force: true });
+}
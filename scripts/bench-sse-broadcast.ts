@@ -0,0 +1,116 @@
+/**
+ * Microbenchmark: SSE broadcast cost per event at 1, 5 and 50 clients.
+ *
+ * Compares the old broadcast path (JSON.stringify for the byte counter, then
+ * again inside sendSSE for every client) with the shared-frame path
+ * (serialize once, buildSSEFrame once with the session-wide event id).
+ * The payload is a real state snapshot: a fixture session replayed through
+ * StateBuilder, repeated until the transcript is about --messages long.
+ * Clients are discarding Writables, so the numbers are bridge CPU only.
+ *
+ * Usage:
+ *   npx tsx scripts/bench-sse-broadcast.ts [--messages 500] [--ms 1000]
+ */
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { fileURLToPath } from "node:url";
+import { Writable } from "node:stream";
+import { buildSSEFrame, formatEventId, parseSessionJSONL } from "../server/bridge-logic.js";
+import { StateBuilder } from "../server/state-builder.js";
+
+const PROJECT_ROOT = join(fileURLToPath(import.meta.url), "../..");
+
+// -- Args --
+const args = process.argv.slice(2);
+const msgIdx = args.indexOf("--messages");
+const MESSAGES = msgIdx >= 0 ? parseInt(args[msgIdx + 1]) : 500;
+const msIdx = args.indexOf("--ms");
+const RUN_MS = msIdx >= 0 ? parseInt(args[msIdx + 1]) : 1000;
+const CLIENT_COUNTS = [1, 5, 50];
+
+// -- Payload --
+
+function buildPayload(): Record<string, unknown> {
+  const content = readFileSync(join(PROJECT_ROOT, "fixtures", "pipeline-tool-execution.jsonl"), "utf-8");
+  const { events } = parseSessionJSONL(content);
+  const sb = new StateBuilder("bench-session", "bench");
+  // Suffix message ids per copy — StateBuilder drops assistant ids it has seen
+  for (let copy = 0; sb.getState().messages.length < MESSAGES; copy++) {
+    sb.replayFromJSONL(events.map((e) => e.replace(/"id":"(msg_[^"]*)"/g, `"id":"$1_${copy}"`)));
+  }
+  return { folder: "bench", ...sb.getState() };
+}
+
+// -- Clients --
+
+interface BenchClient { res: Writable; eventSeq: number }
+
+function makeClients(n: number): BenchClient[] {
+  return Array.from({ length: n }, () => ({
+    res: new Writable({
+      write(_chunk, _enc, cb) { cb(); },
+      writev(_chunks, cb) { cb(); },
+    }),
+    eventSeq: 0,
+  }));
+}
+
+// -- Broadcast variants --
+
+/** Pre-change broadcastToSession + sendSSE. */
+function broadcastOld(clients: BenchClient[], event: string, payload: unknown): number {
+  const bytes = Buffer.byteLength(JSON.stringify(payload), "utf8");
+  for (const client of clients) {
+    client.eventSeq++;
+    client.res.write(`id: ${client.eventSeq}\nevent: ${event}\ndata: ${JSON.stringify(payload)}\n\n`);
+  }
+  return bytes;
+}
+
+let sharedSeq = 0;
+
+/** Current broadcastToSession + writeFrame. */
+function broadcastShared(clients: BenchClient[], event: string, payload: unknown): number {
+  const serialized = JSON.stringify(payload);
+  const bytes = Buffer.byteLength(serialized, "utf8");
+  const frame = buildSSEFrame(event, serialized, formatEventId("bench", ++sharedSeq));
+  for (const client of clients) client.res.write(frame);
+  return bytes;
+}
+
+/** Run a variant for RUN_MS; returns mean microseconds per broadcast. */
+async function measure(
+  fn: (clients: BenchClient[], event: string, payload: unknown) => number,
+  clients: BenchClient[],
+  payload: unknown,
+): Promise<number> {
+  for (let i = 0; i < 20; i++) fn(clients, "state", payload); // warm up JIT
+  let n = 0;
+  const start = process.hrtime.bigint();
+  const deadline = start + BigInt(RUN_MS) * 1_000_000n;
+  let now = start;
+  while (now < deadline) {
+    fn(clients, "state", payload);
+    n++;
+    // Let the Writables drain between batches, as the event loop would
+    if (n % 50 === 0) await new Promise((r) => setImmediate(r));
+    now = process.hrtime.bigint();
+  }
+  return Number(now - start) / 1000 / n;
+}
+
+// -- Main --
+
+const payload = buildPayload();
+const payloadBytes = Buffer.byteLength(JSON.stringify(payload), "utf8");
+console.log(`Payload: ${(payload.messages as unknown[]).length} messages, ${(payloadBytes / 1024).toFixed(0)}KB state event\n`);
+console.log(`${"Clients".padStart(7)} ${"old µs".padStart(10)} ${"shared µs".padStart(10)} ${"speedup".padStart(8)}`);
+console.log("-".repeat(38));
+for (const n of CLIENT_COUNTS) {
+  const oldUs = await measure(broadcastOld, makeClients(n), payload);
+  const sharedUs = await measure(broadcastShared, makeClients(n), payload);
+  console.log(
+    `${String(n).padStart(7)} ${oldUs.toFixed(0).padStart(10)} ${sharedUs.toFixed(0).padStart(10)} ${(oldUs / sharedUs).toFixed(1).padStart(7)}x`,
+  );
+}
@@ -0,0 +1,107 @@
+/**
+ * Microbenchmark: StateBuilder snapshot cost on long replayed sessions.
+ *
+ * Compares the old JSON.parse(JSON.stringify(state)) deep clone with the
+ * frozen, structurally shared snapshots getState() now returns, for the three
+ * shapes the bridge produces: a repeat snapshot with nothing changed (reconnects,
+ * status broadcasts), a snapshot after the last message was patched (tool
+ * result mid-turn), and snapshot + JSON.stringify (what a state event costs).
+ * Sessions are a fixture replayed through StateBuilder until the transcript is
+ * about N messages long.
+ *
+ * Usage:
+ *   npx tsx scripts/bench-state-snapshot.ts [--messages 100,500,2000] [--ms 500]
+ */
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { fileURLToPath } from "node:url";
+import { parseSessionJSONL } from "../server/bridge-logic.js";
+import { StateBuilder } from "../server/state-builder.js";
+
+const PROJECT_ROOT = join(fileURLToPath(import.meta.url), "../..");
+
+// -- Args --
+const args = process.argv.slice(2);
+const msgIdx = args.indexOf("--messages");
+const SIZES = msgIdx >= 0 ? args[msgIdx + 1].split(",").map((n) => parseInt(n)) : [100, 500, 2000];
+const msIdx = args.indexOf("--ms");
+const RUN_MS = msIdx >= 0 ? parseInt(args[msIdx + 1]) : 500;
+
+// -- Session --
+
+const fixture = parseSessionJSONL(
+  readFileSync(join(PROJECT_ROOT, "fixtures", "pipeline-tool-execution.jsonl"), "utf-8"),
+).events;
+
+function replayed(messages: number): { sb: StateBuilder; replayMs: number } {
+  const sb = new StateBuilder("bench-session", "bench");
+  const start = process.hrtime.bigint();
+  // Suffix message ids per copy — StateBuilder drops assistant ids it has seen
+  for (let copy = 0; sb.getMessages().length < messages; copy++) {
+    sb.replayFromJSONL(fixture.map((e) => e.replace(/"id":"(msg_[^"]*)"/g, `"id":"$1_${copy}"`)));
+  }
+  return { sb, replayMs: Number(process.hrtime.bigint() - start) / 1e6 };
+}
+
+/** Commit a tool call the benchmark can keep re-patching without growing the transcript. */
+function addBenchTool(sb: StateBuilder): void {
+  sb.handleEvent({
+    type: "assistant",
+    message: { id: "msg_bench", content: [{ type: "tool_use", id: "toolu_bench", name: "Bash", input: { command: "ls" } }] },
+  });
+}
+
+let patchSeq = 0;
+
+/** A tool result for the last message: replaces one record, bumps messagesVersion. */
+function mutate(sb: StateBuilder): void {
+  sb.handleEvent({
+    type: "user",
+    message: { role: "user", content: [{ type: "tool_result", tool_use_id: "toolu_bench", content: `out ${patchSeq++}` }] },
+  });
+}
+
+// -- Variants --
+
+/** Pre-change getState(): a full deep clone per call. */
+function deepClone(sb: StateBuilder): unknown {
+  return JSON.parse(JSON.stringify(sb.getState()));
+}
+
+function shared(sb: StateBuilder): unknown {
+  return sb.getState();
+}
+
+/** Run fn for RUN_MS; returns mean microseconds per call. */
+function measure(fn: () => void): number {
+  for (let i = 0; i < 5; i++) fn(); // warm up JIT
+  let n = 0;
+  const start = process.hrtime.bigint();
+  const deadline = start + BigInt(RUN_MS) * 1_000_000n;
+  let now = start;
+  while (now < deadline) {
+    fn();
+    n++;
+    now = process.hrtime.bigint();
+  }
+  return Number(now - start) / 1000 / n;
+}
+
+// -- Main --
+
+const row = (label: string, oldUs: number, newUs: number) =>
+  console.log(
+    `${label.padEnd(22)} ${oldUs.toFixed(1).padStart(12)} ${newUs.toFixed(1).padStart(12)} ${(oldUs / newUs).toFixed(1).padStart(9)}x`,
+  );
+
+for (const size of SIZES) {
+  const { sb, replayMs } = replayed(size);
+  addBenchTool(sb);
+  const kb = Buffer.byteLength(JSON.stringify(sb.getState()), "utf8") / 1024;
+  console.log(`\n${sb.getMessages().length} messages, ${kb.toFixed(0)}KB state, replay ${replayMs.toFixed(0)}ms`);
+  console.log(`${"".padEnd(22)} ${"deep µs".padStart(12)} ${"shared µs".padStart(12)} ${"speedup".padStart(10)}`);
+  row("snapshot, unchanged", measure(() => deepClone(sb)), measure(() => shared(sb)));
+  row("snapshot after patch", measure(() => { mutate(sb); deepClone(sb); }), measure(() => { mutate(sb); shared(sb); }));
+  row("snapshot + stringify", measure(() => JSON.stringify(deepClone(sb))), measure(() => JSON.stringify(shared(sb))));
+}
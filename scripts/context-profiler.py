@@ -8,7 +8,16 @@ Usage:
     python3 scripts/context-profiler.py                    # Interactive mode
     python3 scripts/context-profiler.py --turns 10         # Auto "Say OK" for N turns
     python3 scripts/context-profiler.py --wait 330         # Insert pause (cache expiry test)
+    python3 scripts/context-profiler.py --sweep 60,290,310 # Cache survival across several pauses
     python3 scripts/context-profiler.py --file path.jsonl  # Analyze existing session JSONL
+    python3 scripts/context-profiler.py --all              # Fleet report over ~/.claude/projects
+    python3 scripts/context-profiler.py --glob 'dir/*.jsonl'  # Fleet report over a glob
+    python3 scripts/context-profiler.py --follow path.jsonl    # Tail a live session JSONL
+    python3 scripts/context-profiler.py --sessions 8 --turns 3 # N concurrent CC sessions
+    python3 scripts/context-profiler.py --file s.jsonl --format ndjson --output rows.ndjson
+    python3 scripts/context-profiler.py --all --tools       # Rank tools by context burned
+    python3 scripts/context-profiler.py --all --models prices.json  # Override model windows/prices
+    python3 scripts/context-profiler.py --compare old.ndjson new.ndjson  # Regression gate, exit 1 on regression
 
 Examples:
     # Basic per-turn profiling
@@ -17,10 +26,54 @@ Examples:
     # Test cache expiry (5.5 min wait after turn 3)
     python3 scripts/context-profiler.py --turns 3 --wait 330 --turns-after 5
 
+    # Cache survival curve, to size the bridge's GRACE_MS keep-alive
+    python3 scripts/context-profiler.py --sweep 60,240,290,310,600 --json sweep.json
+
     # Analyze a kube session
     ssh kube cat ~/.claude/projects/.../session.jsonl | python3 scripts/context-profiler.py --file -
+
+    # Per-folder peak context, compactions and cache-read ratio, on 8 cores
+    python3 scripts/context-profiler.py --all --jobs 8
+
+    # Nightly context-burn report: only bytes appended since the last run are parsed
+    python3 scripts/context-profiler.py --all --index ~/.cache/context-profiler.db
+
+    # How many folders can one host drive at once? 16 sessions, 4 at a time
+    python3 scripts/context-profiler.py --sessions 16 --concurrency 4 --turns 3
+
+    # TTFT / tokens-per-second percentiles over 20 turns, exported for later comparison
+    python3 scripts/context-profiler.py --turns 20 --json ttft.json
+
+    # Every turn of every session as Arrow IPC record batches (needs pyarrow)
+    python3 scripts/context-profiler.py --all --format arrow --output turns.arrow
+
+    # Cost per folder with this month's negotiated prices (same shape as MODELS)
+    echo '{"claude-opus-4-6": {"window": 200000, "input": 5, "cache_write": 6.25,
+           "cache_read": 0.5, "output": 25}}' > prices.json
+    python3 scripts/context-profiler.py --all --models prices.json
+
+    # Which tools fill the context window across every session? (guides ALLOWED_TOOLS)
+    python3 scripts/context-profiler.py --all --tools
+
+    # NDJSON on stdout for jq; the text table moves to stderr
+    python3 scripts/context-profiler.py --file s.jsonl --format ndjson | jq .delta
+
+    # Gate a CLI upgrade: same benchmark on both versions, fail on significant regressions
+    python3 scripts/context-profiler.py --sessions 8 --turns 5 --format ndjson --output old.ndjson
+    npm i -g @anthropic-ai/claude-code@latest
+    python3 scripts/context-profiler.py --sessions 8 --turns 5 --format ndjson --output new.ndjson
+    python3 scripts/context-profiler.py --compare old.ndjson new.ndjson
 """
-import subprocess, json, sys, threading, queue, uuid, time, argparse
+import asyncio, csv, subprocess, json, math, os, select, sqlite3, sys, threading, queue, uuid, time, argparse
+import ctypes, ctypes.util
+from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from pathlib import Path
+
+# Same tree as CC_PROJECTS_DIR in server/folders.ts: one dir per encoded folder path
+CC_PROJECTS_DIR = Path.home() / ".claude" / "projects"
 
 
 def parse_args():
@@ -30,122 +83,1256 @@ def parse_args():
     p.add_argument("--turns-after", type=int, default=5, help="Turns after the wait")
     p.add_argument("--prompt", type=str, default=None, help="Custom first prompt (e.g. 'Load arc skill')")
     p.add_argument("--file", type=str, default=None, help="Analyze existing JSONL (- for stdin)")
-    return p.parse_args()
+    p.add_argument("--all", action="store_true", help=f"Fleet report over every session in {CC_PROJECTS_DIR}")
+    p.add_argument("--glob", type=str, default=None, help="Fleet report over session JSONLs matching a glob")
+    p.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes for --all/--glob")
+    p.add_argument("--tools", action="store_true", help="Rank tools by attributed context growth (--file/--all/--glob)")
+    p.add_argument("--index", type=str, default=None, help="SQLite index for incremental --all/--glob re-runs")
+    p.add_argument("--follow", type=str, default=None, help="Tail a session JSONL that CC is still writing")
+    p.add_argument("--poll", type=float, default=1.0, help="Polling interval for --follow without inotify")
+    p.add_argument("--sessions", type=int, default=0, help="Drive N concurrent CC sessions (asyncio)")
+    p.add_argument("--concurrency", type=int, default=0, help="Max live CC processes for --sessions (default all)")
+    p.add_argument("--json", type=str, default=None, help="Write live turns and latency percentiles to a JSON file")
+    p.add_argument("--sweep", type=str, default=None, help="Cache expiry sweep over comma-separated pauses (seconds)")
+    p.add_argument("--format", choices=["text", "ndjson", "csv", "arrow"], default="text",
+                   help="Also write per-turn rows in a machine-readable format")
+    p.add_argument("--output", type=str, default="-", help="Destination for --format rows (- for stdout)")
+    p.add_argument("--models", type=str, default=None, help="JSON model table merged over MODELS (window, $/MTok)")
+    p.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), default=None,
+                   help="Compare two --format ndjson runs; exit 1 on a significant regression")
+    p.add_argument("--alpha", type=float, default=0.05, help="Significance level for --compare")
+    p.add_argument("--threshold", type=float, default=10.0, help="Minimum median shift (%%) --compare fails on")
+    args = p.parse_args()
+    if args.sweep and args.format != "text":
+        # Probes are not per-turn rows; --json exports them
+        p.error("--format does not apply to --sweep (use --json)")
+    return args
+
+
+# Context window and list price in USD per million tokens, keyed by the
+# message.model prefix (longest match wins). The bridge learns the real window
+# from result.modelUsage at runtime; session JSONL has no result events, so
+# the profiler needs its own table. --models FILE merges a JSON object of the
+# same shape over this one, for new models or negotiated prices.
+MODELS = {
+    "claude-opus-4": dict(window=200_000, input=15.00, cache_write=18.75, cache_read=1.50, output=75.00),
+    "claude-opus-4-5": dict(window=200_000, input=5.00, cache_write=6.25, cache_read=0.50, output=25.00),
+    "claude-opus-4-6": dict(window=200_000, input=5.00, cache_write=6.25, cache_read=0.50, output=25.00),
+    "claude-sonnet-4": dict(window=200_000, input=3.00, cache_write=3.75, cache_read=0.30, output=15.00),
+    "claude-haiku-4-5": dict(window=200_000, input=1.00, cache_write=1.25, cache_read=0.10, output=5.00),
+    "claude-3-5-haiku": dict(window=200_000, input=0.80, cache_write=1.00, cache_read=0.08, output=4.00),
+}
+DEFAULT_WINDOW = 200_000
+PRICE_KEYS = ("input", "cache_write", "cache_read", "output")
+UNPRICED = set()  # models seen without a MODELS entry, reported once at the end
+
+
+def load_models(path):
+    with open(path) as f:
+        extra = json.load(f)
+    for name, info in extra.items():
+        MODELS[name] = {**MODELS.get(name, {}), **info}
+    model_info.cache_clear()
+
 
+def use_models(models):
+    """Pool initializer: workers price rows with the parent's (possibly --models-extended) table."""
+    MODELS.clear()
+    MODELS.update(models)
+    model_info.cache_clear()
 
-HEADER = f"{'Turn':>4} {'Total':>9} {'New':>7} {'CCreate':>9} {'CRead':>9} {'Out':>5} {'Delta':>8} | Note"
+
+@lru_cache(maxsize=None)
+def model_info(model):
+    """MODELS entry for a message.model by longest prefix, or None."""
+    matches = [name for name in MODELS if model and model.startswith(name)]
+    return MODELS[max(matches, key=len)] if matches else None
+
+
+def priced(row, model):
+    """Add model, percent of that model's window, and USD cost to a row."""
+    info = model_info(model)
+    row["model"] = model
+    row["pct"] = row["total"] * 100 / ((info or {}).get("window") or DEFAULT_WINDOW)
+    if info and all(k in info for k in PRICE_KEYS):
+        row["cost"] = (row["inp"] * info["input"] + row["cc"] * info["cache_write"]
+                       + row["cr"] * info["cache_read"] + row["out"] * info["output"]) / 1_000_000
+    else:
+        row["cost"] = None
+        UNPRICED.add(model or "(none)")
+    return row
+
+
+def print_peak(last, cost):
+    """Closing line for one session: last context size against its model's window, and total cost."""
+    total = last["total"] if last else 0
+    window = ((model_info(last.get("model")) if last else None) or {}).get("window") or DEFAULT_WINDOW
+    print(f"\nPeak: {total:,} tokens ({total * 100 / window:.0f}% of {window // 1000}K window), cost ${cost:,.4f}")
+    warn_unpriced()
+
+
+def warn_unpriced():
+    if UNPRICED:
+        print(f"No price for {', '.join(sorted(UNPRICED))}: costed at $0 (add with --models)", file=sys.stderr)
+
+
+COLUMNS = f"{'Turn':>4} {'Total':>9} {'New':>7} {'CCreate':>9} {'CRead':>9} {'Out':>5} {'Delta':>8} {'Ctx%':>5} {'Cost':>8}"
+HEADER = f"{COLUMNS} | Note"
 SEP = "-" * 90
+# Live mode appends per-turn latency (ms, from send or, on turn 1, from spawn)
+TIMING_COLUMNS = f"{'Init':>6} {'TTFT':>6} {'Gen':>6} {'ITL':>5} {'Tok/s':>6} {'Result':>7}"
+LIVE_HEADER = f"{COLUMNS} {TIMING_COLUMNS} | Note"
+LIVE_SEP = "-" * 145
+
+
+def print_row(turn, total, inp, cc, cr, out, delta, note, flag="", timing=None, model=None, pct=None, cost=None):
+    cols = f"{turn:>4} {total:>9,} {inp:>7,} {cc:>9,} {cr:>9,} {out:>5} {delta:>+8,}"
+    cols += f" {pct:>4.0f}%" if pct is not None else f" {'-':>5}"
+    cols += f" {cost:>8.4f}" if cost is not None else f" {'-':>8}"
+    if timing is not None:
+        def ms(key, width):
+            v = timing.get(key)
+            return f"{'-':>{width}}" if v is None else f"{v:>{width},.0f}"
+        cols += (f" {ms('init_ms', 6)} {ms('ttft_ms', 6)} {ms('gen_ms', 6)} {ms('itl_ms', 5)}"
+                 f" {ms('tok_s', 6)} {ms('result_ms', 7)}")
+    print(f"{cols} | {note}{flag}", flush=True)
+
+
+# Machine-readable row sinks. The text table is still printed; a sink gets the
+# same rows flattened to a fixed schema (timing columns are null outside live
+# modes) so downstream tools can load them without screen-scraping.
+ROW_FIELDS = ("session", "turn", "model", "total", "inp", "cc", "cr", "out", "delta", "pct", "cost", "note", "flag")
+ARROW_BATCH_ROWS = 8192
+
+
+def flat_row(row, session):
+    flat = {"session": session}
+    flat.update((k, row.get(k)) for k in ROW_FIELDS[1:])
+    flat["flag"] = (flat["flag"] or "").strip()
+    timing = row.get("timing") or {}
+    for key in TIMING_KEYS:
+        flat[key] = timing.get(key)
+    return flat
+
+
+class NdjsonSink:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, row, session):
+        self.out.write(json.dumps(flat_row(row, session)) + "\n")
+
+    def flush(self):
+        self.out.flush()
+
+    def close(self):
+        self.out.close()
+
+
+class CsvSink:
+    def __init__(self, out):
+        self.out = out
+        self.writer = csv.DictWriter(out, fieldnames=ROW_FIELDS + TIMING_KEYS)
+        self.writer.writeheader()
+
+    def write(self, row, session):
+        self.writer.writerow(flat_row(row, session))
+
+    def flush(self):
+        self.out.flush()
+
+    def close(self):
+        self.out.close()
+
+
+class ArrowSink:
+    """Arrow IPC stream; rows are buffered and written as bounded record batches."""
+
+    def __init__(self, out):
+        import pyarrow as pa
+        self.pa = pa
+        self.schema = pa.schema(
+            [("session", pa.string()), ("turn", pa.int32()), ("model", pa.string())]
+            + [(k, pa.int64()) for k in ("total", "inp", "cc", "cr", "out", "delta")]
+            + [("pct", pa.float64()), ("cost", pa.float64()), ("note", pa.string()), ("flag", pa.string())]
+            + [(k, pa.float64()) for k in TIMING_KEYS]
+        )
+        self.out = out
+        self.writer = pa.ipc.new_stream(out, self.schema)
+        self.pending = []
+
+    def write(self, row, session):
+        self.pending.append(flat_row(row, session))
+        if len(self.pending) >= ARROW_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.writer.write_batch(self.pa.RecordBatch.from_pylist(self.pending, schema=self.schema))
+            self.pending = []
+        self.out.flush()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        self.out.close()
+
+
+def open_sink(fmt, output):
+    """Row sink for --format, or None for the plain text table.
+
+    When rows go to stdout, human-readable output is moved to stderr so the
+    two never interleave.
+    """
+    if fmt == "text":
+        return None
+    binary = fmt == "arrow"
+    if binary:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("--format arrow needs pyarrow (pip install pyarrow)")
+    if output == "-":
+        out = os.fdopen(os.dup(sys.stdout.fileno()), "wb" if binary else "w", newline=None if binary else "")
+        sys.stdout = sys.stderr
+    else:
+        out = open(output, "wb") if binary else open(output, "w", newline="")
+    return {"ndjson": NdjsonSink, "csv": CsvSink, "arrow": ArrowSink}[fmt](out)
+
+
+# Streaming scanner. Session JSONL is dominated by `user` tool_result lines
+# (persisted-output spills run to 300KB+) but only `assistant` lines carry
+# usage. Lines are classified from their first HEAD_BYTES and rejected lines
+# are skipped to the next newline without being buffered or parsed, so peak
+# memory is one read chunk plus the largest wanted line.
+CHUNK_BYTES = 1 << 20
+HEAD_BYTES = 1024
+ASSISTANT = ("assistant",)
+
+
+def may_be_type(head, types):
+    """Cheap pre-parse check on the first bytes of a JSONL line.
+
+    CC writes the top-level "type" ahead of "message" on user/progress/system
+    lines and after it on assistant lines. A "type" key seen before any
+    "message" key is therefore the top-level one and can be trusted; anything
+    else is undecidable here and falls through to json.loads.
+    """
+    t = head.find(b'"type":"')
+    if t < 0:
+        return True
+    m = head.find(b'"message":')
+    if 0 <= m < t:
+        return True
+    return any(head.startswith(f'{tp}"'.encode(), t + 8) for tp in types)
+
+
+class RecordScanner:
+    """Incremental JSONL splitter that yields only lines that may be of the wanted types.
+
+    `consumed` counts bytes up to and including the last newline seen, i.e.
+    where a later scan should resume without re-reading complete lines.
+    """
+
+    def __init__(self, types=ASSISTANT):
+        self.types = types
+        self._line = bytearray()
+        self._keep = None  # None = undecided, True = buffer, False = skip
+        self._line_len = 0  # bytes of the current line seen so far, kept or not
+        self.consumed = 0
 
+    def feed(self, chunk):
+        view = memoryview(chunk)
+        pos, n = 0, len(chunk)
+        while pos < n:
+            nl = chunk.find(b"\n", pos)
+            end = n if nl < 0 else nl
+            self._line_len += end - pos
+            if self._keep is not False:
+                self._line += view[pos:end]
+                if self._keep is None and (nl >= 0 or len(self._line) >= HEAD_BYTES):
+                    self._keep = may_be_type(bytes(self._line[:HEAD_BYTES]), self.types)
+                    if not self._keep:
+                        self._line.clear()
+            if nl < 0:
+                return
+            self.consumed += self._line_len + 1
+            line, keep = bytes(self._line), self._keep
+            self._line.clear()
+            self._keep = None
+            self._line_len = 0
+            pos = nl + 1
+            if keep and line.strip():
+                yield line
 
-def print_row(turn, total, inp, cc, cr, out, delta, note, flag=""):
-    print(f"{turn:>4} {total:>9,} {inp:>7,} {cc:>9,} {cr:>9,} {out:>5} {delta:>+8,} | {note}{flag}", flush=True)
+    def finish(self):
+        """Flush a trailing line that had no newline."""
+        if self._keep is None and self._line:
+            self._keep = may_be_type(bytes(self._line[:HEAD_BYTES]), self.types)
+        line, keep = bytes(self._line), self._keep
+        self.consumed += self._line_len
+        self._line.clear()
+        self._keep = None
+        self._line_len = 0
+        if keep and line.strip():
+            yield line
 
 
-def analyze_jsonl(source):
-    """Analyze an existing session JSONL file."""
+def iter_records(source, scanner=None, final=True):
+    """Yield parsed records of the scanner's types (assistant by default) from a binary JSONL stream.
+
+    With final=False an unterminated trailing line is left unread (it may be
+    mid-write) and scanner.consumed stops at the last newline.
+    """
+    scanner = scanner or RecordScanner()
+    lines = (line for chunk in iter(lambda: source.read(CHUNK_BYTES), b"") for line in scanner.feed(chunk))
+    for line in lines:
+        obj = json.loads(line)
+        if obj.get("type") in scanner.types:
+            yield obj
+    if final:
+        for line in scanner.finish():
+            obj = json.loads(line)
+            if obj.get("type") in scanner.types:
+                yield obj
+
+
+def turn_note(content):
+    for b in content or []:
+        if b.get("type") == "text":
+            return b["text"][:40]
+        elif b.get("type") == "tool_use":
+            return f'[{b["name"]}]'
+    return ""
+
+
+def message_tokens(msg):
+    """(total, inp, cc, cr, out) from a message's usage, or None if it carries none."""
+    usage = msg.get("usage", {})
+    inp = usage.get("input_tokens", 0)
+    cc = usage.get("cache_creation_input_tokens", 0)
+    cr = usage.get("cache_read_input_tokens", 0)
+    total = inp + cc + cr
+    if total == 0:
+        return None
+    return total, inp, cc, cr, usage.get("output_tokens", 0)
+
+
+def new_timeline(turn=0, prev=0, delta=0, message_id=None, note=""):
+    """Where turn_rows left off in a session: the last row's turn, total, delta, message id and note."""
+    return dict(turn=turn, prev=prev, delta=delta, id=message_id, note=note)
+
+
+def turn_rows(records, timeline=None, subagents=None):
+    """Turn assistant records into print_row kwargs, one row per API call, skipping zero-usage entries.
+
+    CC writes one line per content block of a message, each repeating the
+    message's id and usage, so lines sharing a message.id are folded into one
+    row: last usage wins, the note comes from the first block that has one.
+    A timeline (new_timeline()) resumes numbering and deltas from an earlier
+    scan of the same session and is advanced as rows are yielded. If a scan
+    opens with more lines of the call the last one ended on, that call's row
+    is yielded again under the same turn and replaces the earlier one.
+    Subagent records never enter the parent timeline; pass a subagents dict
+    (new_subagents()) to collect their own timelines and totals.
+    """
+    timeline = new_timeline() if timeline is None else timeline
+    held = None  # (message id, call) still collecting sibling lines
+    for obj in records:
+        msg = obj.get("message", {})
+        tokens = message_tokens(msg)
+        if tokens is None:
+            continue
+        total, inp, cc, cr, out = tokens
+        note = turn_note(msg.get("content"))
+        key = subagent_key(obj)
+        if key is not None:
+            if subagents is not None:
+                subagent_row(subagents[key], total, inp, cc, cr, out, msg.get("model"), note, msg.get("id"))
+            continue
+        msg_id = msg.get("id")
+        if held and msg_id is not None and msg_id == held[0]:
+            held[1].update(total=total, inp=inp, cc=cc, cr=cr, out=out, model=msg.get("model"),
+                           note=held[1]["note"] or note)
+            continue
+        if held:
+            yield timeline_row(timeline, *held)
+        held = (msg_id, dict(total=total, inp=inp, cc=cc, cr=cr, out=out, model=msg.get("model"), note=note))
+    if held:
+        yield timeline_row(timeline, *held)
+
+
+def timeline_row(timeline, msg_id, call):
+    """Number, diff and price one call against a session timeline, then advance it."""
+    if msg_id is not None and msg_id == timeline["id"]:
+        # Rest of the call the previous scan ended on: same turn, same baseline
+        turn, base, note = timeline["turn"], timeline["prev"] - timeline["delta"], timeline["note"] or call["note"]
+    else:
+        turn, base, note = timeline["turn"] + 1, timeline["prev"], call["note"]
+    delta = call["total"] - base
+    row = priced(dict(turn=turn, total=call["total"], inp=call["inp"], cc=call["cc"], cr=call["cr"], out=call["out"],
+                      delta=delta, note=note, flag=turn_flag(delta)), call["model"])
+    timeline.update(turn=turn, prev=call["total"], delta=delta, id=msg_id, note=note)
+    return row
+
+
+def turn_flag(delta):
+    if delta < -10000:
+        return " <<< COMPACTION"
+    if delta > 5000:
+        return " <<<"
+    return ""
+
+
+# Subagent accounting. On CC's stdout a Task/Agent subagent's events arrive
+# interleaved with the parent's, marked by a non-null parent_tool_use_id, and
+# their usage is the subagent's own context: folded into the parent timeline
+# they show up as phantom drops and jumps (CC-EVENTS.md, "Subagent Events on
+# Parent Stdout"). The parent's session JSONL never holds them; CC writes each
+# subagent to <session>/subagents/agent-<id>.jsonl with isSidechain set.
+SUBAGENT_TOOLS = ("Task", "Agent")
+SUBAGENTS_HEADER = f"{'Subagent':<40} {'Turns':>5} {'Peak':>9} {'Input':>11} {'Out':>7} {'Cost':>8}"
+
+
+def subagent_key(obj):
+    """Which subagent an event or record belongs to, or None for the parent."""
+    if obj.get("parent_tool_use_id") is not None:
+        return obj["parent_tool_use_id"]
+    if obj.get("isSidechain"):
+        return obj.get("agentId") or "sidechain"
+    return None
+
+
+def new_subagents():
+    return defaultdict(lambda: dict(label="", turns=0, prev=0, peak=0, inp=0, cc=0, cr=0, out=0, cost=0.0, rows=[],
+                                    id=None))
+
+
+def subagent_row(s, total, inp, cc, cr, out, model, note="", msg_id=None):
+    """Append the next row to a subagent's own timeline and fold it into its totals.
+
+    Another line of the same message.id as the last row replaces that row, as in turn_rows.
+    """
+    if msg_id is not None and msg_id == s["id"]:
+        last = s["rows"].pop()
+        s["turns"] -= 1
+        s["prev"] = last["total"] - last["delta"]
+        for k in ("inp", "cc", "cr", "out"):
+            s[k] -= last[k]
+        s["cost"] -= last["cost"] or 0
+        note = last["note"] or note
+    s["id"] = msg_id
+    s["turns"] += 1
+    delta = total - s["prev"]
+    row = priced(dict(turn=s["turns"], total=total, inp=inp, cc=cc, cr=cr, out=out, delta=delta, note=note,
+                      flag=turn_flag(delta)), model)
+    s["rows"].append(row)
+    s["prev"] = total
+    s["peak"] = max(s["peak"], total)
+    for k in ("inp", "cc", "cr", "out"):
+        s[k] += row[k]
+    s["cost"] += row["cost"] or 0
+    return row
+
+
+def record_subagent(subagents, obj):
+    """Fold a live stream-json event into subagents. True if it was a subagent's, i.e. not the parent's."""
+    key = subagent_key(obj)
+    if key is None:
+        # Label Task/Agent calls so their subagent's totals read as more than a tool_use_id
+        if obj.get("type") == "assistant" and subagents is not None:
+            for b in obj.get("message", {}).get("content") or []:
+                if b.get("type") == "tool_use" and b.get("name") in SUBAGENT_TOOLS:
+                    inp = b.get("input") or {}
+                    subagents[b.get("id")]["label"] = inp.get("subagent_type") or inp.get("description") or ""
+        return False
+    usage = live_usage(obj)
+    if usage and subagents is not None:
+        msg = obj.get("message", {})
+        subagent_row(subagents[key], *usage, note=turn_note(msg.get("content")), msg_id=msg.get("id"))
+    return True
+
+
+def subagent_paths(path):
+    """Sidechain transcripts CC wrote for a session JSONL's subagents."""
+    return sorted(glob(str(Path(path).with_suffix("") / "subagents" / "*.jsonl")))
+
+
+def print_subagents(subagents, parent_cost, session="-", sink=None):
+    """Per-subagent totals after a session's timeline; rows go to the sink under session/subagent."""
+    active = {k: s for k, s in subagents.items() if s["turns"]}
+    if not active:
+        return
+    print("\nSubagents (not in the timeline above):")
+    print(SUBAGENTS_HEADER)
+    for key, s in active.items():
+        name = f"{s['label']} ({key})" if s["label"] else key
+        print(f"{name[:40]:<40} {s['turns']:>5} {s['peak']:>9,} {s['inp'] + s['cc'] + s['cr']:>11,} "
+              f"{s['out']:>7,} {s['cost']:>8.4f}")
+        if sink:
+            for row in s["rows"]:
+                sink.write(row, f"{session}/{key}")
+    sub_cost = sum(s["cost"] for s in active.values())
+    print(f"Subagent cost ${sub_cost:,.4f}, session total ${parent_cost + sub_cost:,.4f}")
+
+
+def session_name(path):
+    return Path(path).stem if path != "-" else "-"
+
+
+def analyze_jsonl(source, session="-", sink=None, sidechains=()):
+    """Analyze an existing session JSONL (binary stream), plus its subagents' sidechain JSONLs."""
     print(HEADER)
     print(SEP)
-    prev = 0
-    turn = 0
-    for line in source:
-        line = line.strip()
-        if not line:
+    last, cost = None, 0.0
+    subagents = new_subagents()
+    for row in turn_rows(iter_records(source), subagents=subagents):
+        print_row(**row)
+        if sink:
+            sink.write(row, session)
+        last = row
+        cost += row["cost"] or 0
+    for path in sidechains:
+        with open(path, "rb") as f:
+            for _ in turn_rows(iter_records(f), subagents=subagents):
+                pass
+    print_peak(last, cost)
+    print_subagents(subagents, cost, session, sink)
+
+
+def summarize_rows(path, rows):
+    """Reduce a session's rows to fleet-report totals."""
+    summary = dict(path=path, folder=Path(path).parent.name, turns=0, peak=0, peak_pct=0, compactions=0,
+                   inp=0, cc=0, cr=0, out=0, cost=0.0, unpriced=set(), error=None)
+    for row in rows:
+        summary["turns"] += 1
+        summary["peak"] = max(summary["peak"], row["total"])
+        summary["peak_pct"] = max(summary["peak_pct"], row["pct"])
+        summary["cost"] += row["cost"] or 0
+        if row["cost"] is None:
+            summary["unpriced"].add(row["model"] or "(none)")
+        if row["delta"] < -10000:
+            summary["compactions"] += 1
+        for k in ("inp", "cc", "cr", "out"):
+            summary[k] += row[k]
+    return summary
+
+
+def summarize_session(path):
+    """Reduce one session JSONL to fleet-report totals. Runs in a pool worker."""
+    try:
+        with open(path, "rb") as f:
+            return summarize_rows(path, turn_rows(iter_records(f)))
+    except (OSError, ValueError) as e:
+        return dict(path=path, error=f"{type(e).__name__}: {e}")
+
+
+def session_rows(path):
+    """Every turn row of one session JSONL, read to the end like summarize_session. Runs in a pool worker."""
+    try:
+        with open(path, "rb") as f:
+            return dict(path=path, rows=list(turn_rows(iter_records(f))), error=None)
+    except (OSError, ValueError) as e:
+        return dict(path=path, error=f"{type(e).__name__}: {e}")
+
+
+# Per-tool attribution. A turn's context delta is mostly the tool_results fed
+# back since the previous usage record, so each positive delta is split across
+# those results in proportion to their payload size. Payload is the
+# tool_result content as it enters context: for a <persisted-output> spill
+# that is the preview, and the full size spilled to disk is tracked apart.
+# Deltas with no tool_result behind them (prompts, system reminders, the
+# first turn) land in NO_TOOL.
+USER_AND_ASSISTANT = ("user", "assistant")
+NO_TOOL = "(no tool_result)"
+PERSISTED_OUTPUT = "<persisted-output>"
+
+
+def new_tool_stats():
+    return dict(calls=0, results=0, result_bytes=0, spills=0, spilled_bytes=0, tokens=0)
+
+
+def tool_attribution(records):
+    """Per-tool call counts, result payload sizes and attributed context tokens for one session."""
+    tools = defaultdict(new_tool_stats)
+    names = {}  # tool_use_id -> tool name
+    pending = []  # (tool, payload bytes) since the last API call's usage
+    prev, last_id = 0, None
+    for obj in records:
+        msg = obj.get("message", {})
+        content = msg.get("content")
+        if obj.get("type") == "user":
+            if not isinstance(content, list):
+                continue
+            meta = obj.get("toolUseResult")
+            meta = meta if isinstance(meta, dict) else {}
+            for b in content:
+                if b.get("type") != "tool_result":
+                    continue
+                name = names.get(b.get("tool_use_id"), "(unknown)")
+                payload = b.get("content", "")
+                size = len(payload.encode() if isinstance(payload, str) else json.dumps(payload).encode())
+                t = tools[name]
+                t["results"] += 1
+                t["result_bytes"] += size
+                text = payload if isinstance(payload, str) else json.dumps(payload)
+                if PERSISTED_OUTPUT in text[:200]:
+                    t["spills"] += 1
+                    t["spilled_bytes"] += meta.get("persistedOutputSize", 0)
+                pending.append((name, size))
             continue
-        obj = json.loads(line)
-        if obj.get("type") != "assistant":
+        for b in content or []:
+            if b.get("type") == "tool_use":
+                names[b.get("id")] = b.get("name", "?")
+                tools[b.get("name", "?")]["calls"] += 1
+        tokens = message_tokens(msg)
+        if tokens is None:
             continue
-        msg = obj.get("message", {})
-        usage = msg.get("usage", {})
-        inp = usage.get("input_tokens", 0)
-        cc = usage.get("cache_creation_input_tokens", 0)
-        cr = usage.get("cache_read_input_tokens", 0)
-        out = usage.get("output_tokens", 0)
-        total = inp + cc + cr
-        if total == 0:
+        # Later lines of the same message repeat its usage; results between them feed the next call
+        if msg.get("id") is not None and msg.get("id") == last_id:
             continue
-        turn += 1
+        last_id = msg.get("id")
+        total = tokens[0]
         delta = total - prev
-        content = msg.get("content", [])
-        note = ""
-        for b in content:
-            if b.get("type") == "text":
-                note = b["text"][:40]
-                break
-            elif b.get("type") == "tool_use":
-                note = f'[{b["name"]}]'
-                break
-        flag = ""
-        if delta > 5000:
-            flag = " <<<"
-        if delta < -10000:
-            flag = " <<< COMPACTION"
-        print_row(turn, total, inp, cc, cr, out, delta, note, flag)
         prev = total
-    print(f"\nPeak: {prev:,} tokens ({prev * 100 // 200000}% of 200K window)")
+        if delta > 0:
+            weight = sum(size for _, size in pending)
+            if not pending:
+                tools[NO_TOOL]["tokens"] += delta
+            for name, size in pending:
+                tools[name]["tokens"] += delta * size / weight if weight else delta / len(pending)
+        pending = []
+    return dict(tools)
+
+
+def attribute_session(path):
+    """tool_attribution for one session file. Runs in a pool worker."""
+    try:
+        with open(path, "rb") as f:
+            return dict(path=path, tools=tool_attribution(iter_records(f, RecordScanner(USER_AND_ASSISTANT))),
+                        error=None)
+    except (OSError, ValueError) as e:
+        return dict(path=path, error=f"{type(e).__name__}: {e}")
 
 
-def run_live(args):
+def merge_tool_stats(into, tools):
+    for name, stats in tools.items():
+        t = into.setdefault(name, new_tool_stats())
+        for k, v in stats.items():
+            t[k] += v
+
+
+TOOLS_HEADER = (f"{'Tool':<40} {'Calls':>6} {'Results':>9} {'Spills':>6} {'Spilled':>9} "
+                f"{'Tokens':>11} {'Share':>6} {'Tok/call':>8}")
+
+
+def print_tool_ranking(tools, n_sessions):
+    print(TOOLS_HEADER)
+    print("-" * len(TOOLS_HEADER))
+    grand = sum(t["tokens"] for t in tools.values()) or 1
+    for name, t in sorted(tools.items(), key=lambda kv: kv[1]["tokens"], reverse=True):
+        per_call = f"{t['tokens'] / t['calls']:>8,.0f}" if t["calls"] else f"{'-':>8}"
+        print(f"{name[:40]:<40} {t['calls']:>6,} {t['result_bytes'] / 1024:>7,.1f}KB {t['spills']:>6,} "
+              f"{t['spilled_bytes'] / 1024:>7,.0f}KB {t['tokens']:>11,.0f} {t['tokens'] * 100 / grand:>5.1f}% {per_call}")
+    print(f"\n{n_sessions:,} sessions. Results = tool_result payload in context; "
+          f"Spilled = full output saved to disk by <persisted-output>.")
+
+
+def tools_report(paths, jobs):
+    """Attribute context growth to tools across sessions in a process pool."""
+    if not paths:
+        sys.exit("No session JSONL files matched")
+    tools, errors = {}, []
+    with make_pool(jobs) as pool:
+        for res in pool.map(attribute_session, paths, chunksize=pool_chunksize(paths, jobs)):
+            if res["error"]:
+                errors.append(res)
+            else:
+                merge_tool_stats(tools, res["tools"])
+    print_tool_ranking(tools, len(paths) - len(errors))
+    for s in errors:
+        print(f"  skipped {s['path']}: {s['error']}", file=sys.stderr)
+
+
+FLEET_HEADER = (f"{'Folder':<48} {'Sess':>5} {'Turns':>7} {'Peak':>9} {'Peak%':>5} {'Compact':>7} {'CRead%':>6} "
+                f"{'Cost':>10}")
+
+
+def fleet_report(paths, jobs, sink=None):
+    """Summarize sessions across a process pool and print a per-folder report.
+
+    With a sink, workers return full rows instead of summaries so every turn
+    can be written out; rows are summarized here instead.
+    """
+    if not paths:
+        sys.exit("No session JSONL files matched")
+    start = time.monotonic()
+    folders = defaultdict(lambda: dict(sessions=0, turns=0, peak=0, peak_pct=0, compactions=0, input=0, cr=0, cost=0.0))
+    errors = []
+    with make_pool(jobs) as pool:
+        if sink:
+            results = pool.map(session_rows, paths, chunksize=pool_chunksize(paths, jobs))
+        else:
+            results = pool.map(summarize_session, paths, chunksize=pool_chunksize(paths, jobs))
+        for s in results:
+            if sink and not s["error"]:
+                for row in s["rows"]:
+                    sink.write(row, session_name(s["path"]))
+                s = summarize_rows(s["path"], s["rows"])
+            if s["error"]:
+                errors.append(s)
+                continue
+            f = folders[s["folder"]]
+            f["sessions"] += 1
+            f["turns"] += s["turns"]
+            f["peak"] = max(f["peak"], s["peak"])
+            f["peak_pct"] = max(f["peak_pct"], s["peak_pct"])
+            f["compactions"] += s["compactions"]
+            f["input"] += s["inp"] + s["cc"] + s["cr"]
+            f["cr"] += s["cr"]
+            f["cost"] += s["cost"]
+            UNPRICED.update(s["unpriced"])
+    print_fleet(folders, len(paths), f"{time.monotonic() - start:.1f}s on {jobs} workers", errors)
+
+
+def make_pool(jobs):
+    return ProcessPoolExecutor(max_workers=jobs, initializer=use_models, initargs=(dict(MODELS),))
+
+
+def pool_chunksize(paths, jobs):
+    # Thousands of small files: batch them so IPC doesn't dominate
+    return max(1, len(paths) // (jobs * 8))
+
+
+def print_fleet(folders, n_paths, timing, errors):
+    print(FLEET_HEADER)
+    print("-" * len(FLEET_HEADER))
+    for name, f in sorted(folders.items(), key=lambda kv: kv[1]["peak"], reverse=True):
+        ratio = f["cr"] * 100 / f["input"] if f["input"] else 0
+        print(f"{name[-48:]:<48} {f['sessions']:>5} {f['turns']:>7,} {f['peak']:>9,} "
+              f"{f['peak_pct']:>4.0f}% {f['compactions']:>7} {ratio:>5.1f}% {f['cost']:>10,.2f}")
+    total_input = sum(f["input"] for f in folders.values())
+    total_cr = sum(f["cr"] for f in folders.values())
+    print(f"\n{n_paths:,} sessions in {len(folders):,} folders, {timing}. "
+          f"Cache-read ratio {total_cr * 100 / total_input if total_input else 0:.1f}%, "
+          f"total cost ${sum(f['cost'] for f in folders.values()):,.2f}")
+    for s in errors:
+        print(f"  skipped {s['path']}: {s['error']}", file=sys.stderr)
+    warn_unpriced()
+
+
+# Incremental index. CC session JSONL is append-only, so per-session rows plus
+# the byte offset of the last complete line let a re-run parse only the tail.
+# A file that shrank below its offset was rewritten and is rescanned from 0.
+# The last row's message id is kept so a call whose lines straddle two runs
+# updates its row rather than adding a turn.
+# Cost is derived at report time from tokens and model, so --models changes
+# apply without a rescan. An index from an older schema is rebuilt.
+INDEX_VERSION = 3
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY, folder TEXT NOT NULL,
+    size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL, turn INTEGER NOT NULL, prev INTEGER NOT NULL, message_id TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    path TEXT NOT NULL, turn INTEGER NOT NULL, model TEXT,
+    total INTEGER NOT NULL, inp INTEGER NOT NULL, cc INTEGER NOT NULL, cr INTEGER NOT NULL,
+    out INTEGER NOT NULL, delta INTEGER NOT NULL, note TEXT NOT NULL,
+    PRIMARY KEY (path, turn)
+);
+"""
+
+
+def scan_tail(job):
+    """Parse complete lines after a stored offset. Runs in a pool worker."""
+    path, offset, timeline = job
+    scanner = RecordScanner()
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            rows = list(turn_rows(iter_records(f, scanner, final=False), timeline))
+    except (OSError, ValueError) as e:
+        return dict(path=path, error=f"{type(e).__name__}: {e}")
+    return dict(path=path, offset=offset + scanner.consumed, timeline=timeline, rows=rows, error=None)
+
+
+def update_index(db, paths, jobs):
+    """Bring the index up to date for paths; returns (sessions scanned, bytes parsed, errors)."""
+    pending, stats = [], {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stats[path] = st
+        row = db.execute("""
+            SELECT s.size, s.mtime_ns, s.offset, s.turn, s.prev, t.delta, s.message_id, t.note
+            FROM sessions s LEFT JOIN turns t ON t.path = s.path AND t.turn = s.turn WHERE s.path = ?
+        """, (path,)).fetchone()
+        if row and row[:2] == (st.st_size, st.st_mtime_ns):
+            continue
+        if row and st.st_size >= row[2]:
+            pending.append((path, row[2], new_timeline(row[3], row[4], row[5] or 0, row[6], row[7] or "")))
+        else:
+            db.execute("DELETE FROM turns WHERE path = ?", (path,))
+            pending.append((path, 0, new_timeline()))
+
+    parsed, errors = 0, []
+    with make_pool(jobs) as pool:
+        for job, res in zip(pending, pool.map(scan_tail, pending, chunksize=pool_chunksize(pending, jobs))):
+            if res["error"]:
+                errors.append(res)
+                continue
+            path, st, timeline = res["path"], stats[res["path"]], res["timeline"]
+            parsed += res["offset"] - job[1]
+            db.executemany(
+                "INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, r["turn"], r["model"], r["total"], r["inp"], r["cc"], r["cr"], r["out"], r["delta"], r["note"])
+                 for r in res["rows"]],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, Path(path).parent.name, st.st_size, st.st_mtime_ns, res["offset"], timeline["turn"],
+                 timeline["prev"], timeline["id"]),
+            )
+    db.commit()
+    return len(pending), parsed, errors
+
+
+def indexed_fleet_report(index_path, paths, jobs, sink=None):
+    """Fleet report backed by the incremental index: only appended bytes are parsed."""
+    if not paths:
+        sys.exit("No session JSONL files matched")
+    start = time.monotonic()
+    db = sqlite3.connect(index_path)
+    if db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        db.executescript(f"DROP TABLE IF EXISTS sessions; DROP TABLE IF EXISTS turns; PRAGMA user_version = {INDEX_VERSION};")
+    db.executescript(INDEX_SCHEMA)
+    scanned, parsed, errors = update_index(db, paths, jobs)
+    db.execute("CREATE TEMP TABLE scope (path TEXT PRIMARY KEY)")
+    db.executemany("INSERT OR IGNORE INTO scope VALUES (?)", [(p,) for p in paths])
+    folders = {}
+    for name, sessions in db.execute(
+        "SELECT s.folder, COUNT(*) FROM scope JOIN sessions s USING (path) GROUP BY s.folder"
+    ):
+        folders[name] = dict(sessions=sessions, turns=0, peak=0, peak_pct=0, compactions=0, input=0, cr=0, cost=0.0)
+    # Grouped by model too, since window and prices are per model
+    for name, model, turns, peak, compactions, inp, cc, cr, out in db.execute("""
+        SELECT s.folder, t.model, COUNT(*), MAX(t.total), SUM(t.delta < -10000),
+               SUM(t.inp), SUM(t.cc), SUM(t.cr), SUM(t.out)
+        FROM scope JOIN sessions s USING (path) JOIN turns t USING (path)
+        GROUP BY s.folder, t.model
+    """):
+        f = folders[name]
+        per_model = priced(dict(total=peak, inp=inp, cc=cc, cr=cr, out=out), model)
+        f["turns"] += turns
+        f["peak"] = max(f["peak"], peak)
+        f["peak_pct"] = max(f["peak_pct"], per_model["pct"])
+        f["compactions"] += compactions
+        f["input"] += inp + cc + cr
+        f["cr"] += cr
+        f["cost"] += per_model["cost"] or 0
+    if sink:
+        for path, turn, model, total, inp, cc, cr, out, delta, note in db.execute(
+            "SELECT t.* FROM scope JOIN turns t USING (path) ORDER BY t.path, t.turn"
+        ):
+            row = priced(dict(turn=turn, total=total, inp=inp, cc=cc, cr=cr, out=out, delta=delta, note=note,
+                              flag=turn_flag(delta)), model)
+            sink.write(row, session_name(path))
+    db.close()
+    timing = (f"{time.monotonic() - start:.1f}s, {scanned:,} changed "
+              f"({parsed / (1024 * 1024):,.1f}MB parsed) on {jobs} workers")
+    print_fleet(folders, len(paths), timing, errors)
+
+
+class InotifyWatch:
+    """Blocks until a file is modified, via inotify through libc (Linux only)."""
+
+    IN_MODIFY, IN_ATTRIB, IN_MOVE_SELF, IN_DELETE_SELF = 0x2, 0x4, 0x800, 0x400
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)  # AttributeError off Linux
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_MOVE_SELF | self.IN_DELETE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWatch:
+    """Fallback for platforms without inotify: just sleep between reads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+
+    def close(self):
+        pass
+
+
+def follow_jsonl(path, poll, sink=None):
+    """Print rows as assistant usage lands in a session JSONL, reading each byte once.
+
+    A call whose lines straddle two reads is printed again under the same turn;
+    the later row (and sink record) supersedes the earlier one.
+    """
+    try:
+        watch = InotifyWatch(path)
+        mode = "inotify"
+    except (AttributeError, OSError):
+        watch = PollWatch(poll)
+        mode = f"polling every {poll}s"
+    print(f"Following {path} ({mode}, Ctrl-C to stop)")
+    print(HEADER)
+    print(SEP)
+    f = open(path, "rb")
+    scanner = RecordScanner()
+    timeline = new_timeline()
+    last, cost = None, 0.0
+    try:
+        while True:
+            # final=False: a half-written line stays in the scanner until its newline lands
+            for row in turn_rows(iter_records(f, scanner, final=False), timeline):
+                print_row(**row)
+                if sink:
+                    sink.write(row, session_name(path))
+                if last and row["turn"] == last["turn"]:
+                    cost -= last["cost"] or 0
+                last = row
+                cost += row["cost"] or 0
+            if sink:
+                sink.flush()
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is None or st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < scanner.consumed:
+                # Rewritten or replaced underneath us: start over on whatever is there now
+                print("--- file truncated or replaced, restarting ---", flush=True)
+                while not os.path.exists(path):
+                    time.sleep(poll)
+                f.close()
+                f = open(path, "rb")
+                scanner = RecordScanner()
+                timeline = new_timeline()
+                last, cost = None, 0.0
+                if isinstance(watch, InotifyWatch):
+                    watch.close()
+                    watch = InotifyWatch(path)
+                continue
+            # Timeout is a safety net for events inotify can miss (e.g. NFS)
+            watch.wait(5.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        f.close()
+        watch.close()
+    print_peak(last, cost)
+
+
+def cc_command(session_id=None, fork_from=None):
+    """stream-json CC argv for a new session, or a fork of an existing one."""
+    session = ["--resume", fork_from, "--fork-session"] if fork_from else ["--session-id", session_id]
+    return [
+        "claude", "-p", "--verbose",
+        "--input-format", "stream-json",
+        "--output-format", "stream-json",
+        "--include-partial-messages",
+        *session,
+        "--dangerously-skip-permissions", "--allow-dangerously-skip-permissions",
+    ]
+
+
+def user_message(text):
+    return json.dumps({"type": "user", "message": {"role": "user", "content": text}}) + "\n"
+
+
+def live_usage(obj):
+    """(total, inp, cc, cr, out, model) from a stream-json assistant event, or None if it carries no usage."""
+    if obj.get("type") != "assistant":
+        return None
+    msg = obj.get("message", {})
+    tokens = message_tokens(msg)
+    return None if tokens is None else (*tokens, msg.get("model"))
+
+
+def add_call(calls, obj):
+    """Record a live event's usage in calls ({message id: live_usage}); a later line of the same message wins."""
+    usage = live_usage(obj)
+    if usage:
+        calls[obj["message"].get("id") or len(calls)] = usage
+
+
+def live_turn_row(calls):
+    """Usage and cost of one live turn from its calls (add_call), or None if it made none.
+
+    A turn with tool round-trips makes several API calls: the context columns
+    are the last call's, out and cost add up every call.
+    """
+    if not calls:
+        return None
+    usages = list(calls.values())
+    total, inp, cc, cr, _, model = usages[-1]
+    costs = [priced(dict(total=t, inp=i, cc=c, cr=r, out=o), m)["cost"] for t, i, c, r, o, m in usages]
+    row = priced(dict(total=total, inp=inp, cc=cc, cr=cr, out=sum(u[4] for u in usages)), model)
+    row["cost"] = None if None in costs else sum(costs)
+    return row
+
+
+class TurnTimer:
+    """Monotonic timestamps for one live turn's stream-json milestones.
+
+    The bridge tunes INIT_TIMEOUT_MS and CONFLATION_INTERVAL_MS against these:
+    init (CC re-emits system:init every turn; turn 1 also pays process spawn),
+    first content_block_delta (TTFT), inter-delta gap, message_stop and result.
+    """
+
+    def __init__(self, spawned=None):
+        self.start = spawned or time.monotonic()
+        self.init = self.first_delta = self.last_delta = self.message_stop = self.result = None
+        self.deltas = 0
+
+    def observe(self, obj, now):
+        tp = obj.get("type")
+        if tp == "system" and obj.get("subtype") == "init":
+            self.init = self.init or now
+        elif tp == "stream_event":
+            etype = obj.get("event", {}).get("type")
+            if etype == "content_block_delta":
+                self.first_delta = self.first_delta or now
+                self.last_delta = now
+                self.deltas += 1
+            elif etype == "message_stop":
+                self.message_stop = now
+        elif tp == "result":
+            self.result = now
+
+    def metrics(self, out):
+        def since(t, base):
+            return None if t is None or base is None else (t - base) * 1000
+        gen = since(self.message_stop or self.last_delta, self.first_delta)
+        return dict(
+            init_ms=since(self.init, self.start),
+            ttft_ms=since(self.first_delta, self.start),
+            gen_ms=gen,
+            itl_ms=since(self.last_delta, self.first_delta) / (self.deltas - 1) if self.deltas > 1 else None,
+            tok_s=out * 1000 / gen if gen else None,
+            result_ms=since(self.result, self.start),
+        )
+
+
+TIMING_KEYS = ("init_ms", "ttft_ms", "gen_ms", "itl_ms", "tok_s", "result_ms")
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of a non-empty sorted list."""
+    k = (len(values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def latency_summary(rows):
+    """p50/p95/p99/mean per timing metric across turns that recorded it."""
+    summary = {}
+    for key in TIMING_KEYS:
+        vals = sorted(r["timing"][key] for r in rows if r.get("timing") and r["timing"].get(key) is not None)
+        if vals:
+            summary[key] = dict(n=len(vals), p50=percentile(vals, 50), p95=percentile(vals, 95),
+                                p99=percentile(vals, 99), mean=sum(vals) / len(vals))
+    return summary
+
+
+def print_latency_summary(summary):
+    if not summary:
+        return
+    print(f"\n{'Latency':<10} {'n':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'mean':>8}")
+    for key, s in summary.items():
+        print(f"{key:<10} {s['n']:>4} {s['p50']:>8,.0f} {s['p95']:>8,.0f} {s['p99']:>8,.0f} {s['mean']:>8,.0f}")
+
+
+def write_json_report(path, sessions, rows):
+    for s in sessions:
+        s["subagents"] = {k: {f: v for f, v in a.items() if f != "prev"}
+                          for k, a in s.get("subagents", {}).items() if a["turns"]}
+    with open(path, "w") as f:
+        json.dump(dict(sessions=sessions, latency=latency_summary(rows)), f, indent=2)
+    print(f"Wrote {path}")
+
+
+# Regression comparison between two --format ndjson runs, e.g. the same
+# benchmark before and after a CLI upgrade. Each metric is a per-turn sample;
+# a metric regresses when its median moves the bad way by at least
+# --threshold percent and a two-sided Mann-Whitney U test puts the shift
+# below --alpha. System-prompt size is deterministic per CLI version, so when
+# both runs are constant any difference past the threshold counts.
+COMPARE_METRICS = (
+    # name, per-row value or None, higher is worse
+    ("ttft_ms", lambda r: r.get("ttft_ms"), True),
+    ("out/turn", lambda r: r["out"], True),
+    ("delta/turn", lambda r: r["delta"] if r["turn"] > 1 else None, True),
+    ("cache_hit%", lambda r: r["cr"] * 100 / r["total"] if r["total"] else None, False),
+    ("sysprompt", lambda r: r["total"] if r["turn"] == 1 else None, True),
+)
+COMPARE_HEADER = (f"{'Metric':<12} {'nBase':>6} {'nNew':>6} {'Base p50':>10} {'New p50':>10} {'Shift':>8} "
+                  f"{'p':>7} | Result")
+
+
+def load_rows(path):
+    """Parent-session rows of a --format ndjson run (subagent rows are session/<subagent>)."""
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r for r in rows if "/" not in r["session"]]
+
+
+def mann_whitney(a, b):
+    """Two-sided Mann-Whitney U p-value, normal approximation with tie correction."""
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    ranked = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    rank_a = ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j < n and ranked[j][0] == ranked[i][0]:
+            j += 1
+        t = j - i
+        ties += t ** 3 - t
+        rank_a += (i + j + 1) / 2 * sum(1 for _, g in ranked[i:j] if g == 0)
+        i = j
+    u = rank_a - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0) / sigma
+    return math.erfc(z / math.sqrt(2))
+
+
+def compare_runs(base_path, new_path, alpha, threshold):
+    """Print per-metric and per-turn shifts between two runs; returns the exit code."""
+    base, new = load_rows(base_path), load_rows(new_path)
+    for path, rows in ((base_path, base), (new_path, new)):
+        print(f"{path}: {len({r['session'] for r in rows})} sessions, {len(rows)} turns")
+    print()
+    print(COMPARE_HEADER)
+    print("-" * len(COMPARE_HEADER))
+    regressions = []
+    for name, value, higher_is_worse in COMPARE_METRICS:
+        a = sorted(v for v in map(value, base) if v is not None)
+        b = sorted(v for v in map(value, new) if v is not None)
+        if not a or not b:
+            print(f"{name:<12} {len(a):>6} {len(b):>6} {'-':>10} {'-':>10} {'-':>8} {'-':>7} | no data")
+            continue
+        med_a, med_b = percentile(a, 50), percentile(b, 50)
+        shift = (med_b - med_a) * 100 / abs(med_a) if med_a else (math.inf if med_b else 0.0)
+        constant = a[0] == a[-1] and b[0] == b[-1]
+        p = (0.0 if med_a != med_b else 1.0) if constant else mann_whitney(a, b)
+        result = "ok"
+        if p < alpha and abs(shift) >= threshold:
+            worse = (shift > 0) == higher_is_worse
+            result = "REGRESSION" if worse else "improved"
+            if worse:
+                regressions.append(name)
+        print(f"{name:<12} {len(a):>6} {len(b):>6} {med_a:>10,.1f} {med_b:>10,.1f} {shift:>+7.1f}% "
+              f"{p:>7.3f} | {result}")
+
+    # Line up turns: median context per turn number across each run's sessions
+    by_turn = [defaultdict(list), defaultdict(list)]
+    for rows, turns in zip((base, new), by_turn):
+        for r in rows:
+            turns[r["turn"]].append(r["total"])
+    shared = sorted(set(by_turn[0]) & set(by_turn[1]))
+    if shared:
+        print(f"\n{'Turn':>4} {'Base total':>11} {'New total':>11} {'Shift':>8}")
+        for turn in shared:
+            med_a, med_b = (percentile(sorted(t[turn]), 50) for t in by_turn)
+            shift = (med_b - med_a) * 100 / med_a if med_a else 0.0
+            print(f"{turn:>4} {med_a:>11,.0f} {med_b:>11,.0f} {shift:>+7.1f}%")
+
+    if regressions:
+        print(f"\nFAIL: {', '.join(regressions)} regressed (alpha {alpha}, threshold {threshold:g}%)")
+        return 1
+    print(f"\nPASS (alpha {alpha}, threshold {threshold:g}%)")
+    return 0
+
+
+def run_live(args, sink=None):
     """Spawn CC and profile live turns."""
     session_id = str(uuid.uuid4())
+    spawned = time.monotonic()
     proc = subprocess.Popen(
-        [
-            "claude", "-p", "--verbose",
-            "--input-format", "stream-json",
-            "--output-format", "stream-json",
-            "--include-partial-messages",
-            "--session-id", session_id,
-            "--dangerously-skip-permissions", "--allow-dangerously-skip-permissions",
-        ],
+        cc_command(session_id),
         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
         text=True, bufsize=1,
     )
 
+    # Stamp lines on arrival in the reader thread, not when the main loop gets to them
     q: queue.Queue = queue.Queue()
     threading.Thread(
-        target=lambda: [q.put(l.rstrip()) for l in proc.stdout] or q.put(None),
+        target=lambda: [q.put((time.monotonic(), l.rstrip())) for l in proc.stdout] or q.put(None),
         daemon=True,
     ).start()
 
     def send(text):
-        proc.stdin.write(json.dumps({"type": "user", "message": {"role": "user", "content": text}}) + "\n")
+        proc.stdin.write(user_message(text))
         proc.stdin.flush()
 
-    def wait_for_result():
-        last_total = last_inp = last_cc = last_cr = last_out = 0
+    subagents = new_subagents()
+
+    def wait_for_result(timer):
+        calls = {}
         while True:
-            line = q.get()
-            if line is None:
-                return last_total, last_inp, last_cc, last_cr, last_out
+            item = q.get()
+            if item is None:
+                return live_turn_row(calls)
+            now, line = item
             obj = json.loads(line)
-            if obj.get("type") == "assistant":
-                usage = obj.get("message", {}).get("usage", {})
-                inp = usage.get("input_tokens", 0)
-                cc = usage.get("cache_creation_input_tokens", 0)
-                cr = usage.get("cache_read_input_tokens", 0)
-                t = inp + cc + cr
-                if t > 0:
-                    last_total, last_inp, last_cc, last_cr = t, inp, cc, cr
-                    last_out = usage.get("output_tokens", 0)
-            elif obj.get("type") == "result":
-                return last_total, last_inp, last_cc, last_cr, last_out
+            if record_subagent(subagents, obj):
+                continue
+            timer.observe(obj, now)
+            add_call(calls, obj)
+            if obj.get("type") == "result":
+                return live_turn_row(calls)
 
     print(f"Session: {session_id}")
-    print(HEADER)
-    print(SEP)
+    print(LIVE_HEADER)
+    print(LIVE_SEP)
 
     prev = 0
     turn = 0
+    rows = []
 
     def do_turn(msg, label=""):
         nonlocal prev, turn
+        timer = TurnTimer(spawned if turn == 0 else None)
         send(msg)
-        total, inp, cc, cr, out = wait_for_result()
+        row = wait_for_result(timer) or priced(dict(total=0, inp=0, cc=0, cr=0, out=0), None)
         turn += 1
-        delta = total - prev
-        note = label or msg[:40]
-        flag = " <<<" if delta > 5000 else ""
-        print_row(turn, total, inp, cc, cr, out, delta, note, flag)
-        prev = total
+        delta = row["total"] - prev
+        row.update(turn=turn, delta=delta, note=label or msg[:40], flag=" <<<" if delta > 5000 else "",
+                   timing=timer.metrics(row["out"]))
+        rows.append(row)
+        print_row(**row)
+        if sink:
+            sink.write(row, session_id)
+            sink.flush()
+        prev = row["total"]
 
     # Custom first prompt
     if args.prompt:
@@ -179,16 +1366,228 @@ def run_live(args):
 
     proc.stdin.close()
     proc.wait(timeout=5)
-    print(f"\nPeak: {prev:,} tokens ({prev * 100 // 200000}% of 200K window)")
+    cost = sum(r["cost"] or 0 for r in rows)
+    print_peak(rows[-1] if rows else None, cost)
+    print_subagents(subagents, cost, session_id, sink)
+    print_latency_summary(latency_summary(rows))
+    if args.json:
+        write_json_report(args.json, [dict(session_id=session_id, rows=rows, subagents=subagents)], rows)
+
+
+# Concurrent driver. One asyncio task per session, a semaphore caps how many
+# CC processes are alive at once; everything else (spawn, init, API latency)
+# overlaps, which is what a bridge host serving several folders sees.
+STREAM_LIMIT = 64 * 1024 * 1024  # tool_result lines can be far past asyncio's 64KB default
+
+
+async def spawn_cc(cmd):
+    return await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL, limit=STREAM_LIMIT,
+    )
+
+
+async def cc_turn(proc, msg, timer, subagents=None):
+    """Send one prompt and read to its result; returns (live_turn_row or None, error or None)."""
+    try:
+        proc.stdin.write(user_message(msg).encode())
+        await proc.stdin.drain()
+    except ConnectionError:
+        return None, f"CC exited (code {await proc.wait()}) before the prompt"
+    calls = {}
+    while True:
+        line = await proc.stdout.readline()
+        if not line:
+            return live_turn_row(calls), f"CC exited (code {await proc.wait()}) mid-turn"
+        obj = json.loads(line)
+        if record_subagent(subagents, obj):
+            continue
+        timer.observe(obj, time.monotonic())
+        add_call(calls, obj)
+        if obj.get("type") == "result":
+            return live_turn_row(calls), None
+
+
+async def close_cc(proc):
+    if proc.returncode is None:
+        proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), 5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+
+
+async def drive_session(index, prompts, sem):
+    """Run one CC session through prompts; returns its rows and timing."""
+    async with sem:
+        session_id = str(uuid.uuid4())
+        start = spawned = time.monotonic()
+        proc = await spawn_cc(cc_command(session_id))
+        rows, prev, error = [], 0, None
+        subagents = new_subagents()
+        try:
+            for turn, (msg, label) in enumerate(prompts, 1):
+                timer = TurnTimer(spawned if turn == 1 else None)
+                row, err = await cc_turn(proc, msg, timer, subagents)
+                if err:
+                    error = f"{err} (turn {turn})"
+                    break
+                row = row or priced(dict(total=0, inp=0, cc=0, cr=0, out=0), None)
+                delta = row["total"] - prev
+                row.update(turn=turn, delta=delta, note=label, flag=" <<<" if delta > 5000 else "",
+                           timing=timer.metrics(row["out"]))
+                rows.append(row)
+                prev = row["total"]
+        finally:
+            await close_cc(proc)
+        return dict(index=index, session_id=session_id, rows=rows, subagents=subagents, error=error,
+                    elapsed=time.monotonic() - start)
+
+
+async def run_concurrent(args, sink=None):
+    """Drive --sessions CC processes, at most --concurrency at a time, and report throughput."""
+    prompts = [(args.prompt, args.prompt[:40])] if args.prompt else []
+    # No --turns: one auto turn, unless --prompt already gives the session something to do
+    prompts += [("Say OK.", "auto")] * (max(args.turns, 0) or (0 if prompts else 1))
+    limit = args.concurrency or args.sessions
+    sem = asyncio.Semaphore(limit)
+    print(f"{args.sessions} sessions x {len(prompts)} turns, concurrency {limit}\n", flush=True)
+    start = time.monotonic()
+    results = []
+    for fut in asyncio.as_completed([drive_session(i, prompts, sem) for i in range(1, args.sessions + 1)]):
+        res = await fut
+        results.append(res)
+        status = f" FAILED: {res['error']}" if res["error"] else ""
+        print(f"Session {res['index']} ({res['session_id'][:8]}) {res['elapsed']:.1f}s{status}")
+        print(LIVE_HEADER)
+        print(LIVE_SEP)
+        for row in res["rows"]:
+            print_row(**row)
+            if sink:
+                sink.write(row, res["session_id"])
+        print_subagents(res["subagents"], sum(r["cost"] or 0 for r in res["rows"]), res["session_id"], sink)
+        print(flush=True)
+    wall = time.monotonic() - start
+
+    turns = sum(len(r["rows"]) for r in results)
+    out_tokens = sum(row["out"] for r in results for row in r["rows"])
+    in_tokens = sum(row["total"] for r in results for row in r["rows"])
+    failed = sum(1 for r in results if r["error"])
+    per_session = sorted(r["elapsed"] for r in results)
+    print(f"Wall {wall:.1f}s, {turns} turns, {failed} failed sessions")
+    print(f"Throughput: {turns * 60 / wall:.1f} turns/min, {out_tokens / wall:,.1f} output tokens/s, "
+          f"{in_tokens / wall:,.0f} context tokens/s")
+    print(f"Session wall: min {per_session[0]:.1f}s, median {per_session[len(per_session) // 2]:.1f}s, "
+          f"max {per_session[-1]:.1f}s")
+    all_rows = [row for r in results for row in r["rows"]]
+    print_latency_summary(latency_summary(all_rows))
+    if args.json:
+        sessions = [dict(session_id=r["session_id"], elapsed=r["elapsed"], error=r["error"], rows=r["rows"],
+                         subagents=r["subagents"])
+                    for r in sorted(results, key=lambda r: r["index"])]
+        write_json_report(args.json, sessions, all_rows)
+
+
+# Cache expiry sweep. Each probe forks the same warmed base session so every
+# pause is measured against an identical context: a warm-up turn, the pause,
+# then a turn whose usage shows whether cache reads survived or collapsed into
+# cache creation. Probes run one at a time: the system-prompt prefix is shared
+# across forks, so a concurrent probe's turn would refresh another's cache
+# mid-pause. (So would any other CC process on the account, e.g. the bridge.)
+SWEEP_HEADER = f"{'Pause':>6} {'CRead':>9} {'CCreate':>9} | {'CRead':>9} {'CCreate':>9} {'Read%':>6} | Cache"
+
+
+async def run_sweep(args):
+    pauses = [int(p) for p in args.sweep.split(",")]
+    base_id = str(uuid.uuid4())
+    print(f"Base session: {base_id}")
+    print(f"Probes: {', '.join(f'{p}s' for p in pauses)} ({sum(pauses)}s of pauses, run one at a time)\n", flush=True)
+    proc = await spawn_cc(cc_command(base_id))
+    try:
+        _, err = await cc_turn(proc, "Say OK.", TurnTimer())
+    finally:
+        await close_cc(proc)
+    if err:
+        sys.exit(f"Base session failed: {err}")
+
+    print(f"{'':>6} {'before pause':^19} | {'after pause':^26} |")
+    print(SWEEP_HEADER)
+    print(SEP)
+    probes = []
+    for pause in pauses:
+        proc = await spawn_cc(cc_command(fork_from=base_id))
+        before = after = None
+        try:
+            before, err = await cc_turn(proc, "Say OK.", TurnTimer())
+            if not err:
+                await asyncio.sleep(pause)
+                after, err = await cc_turn(proc, "Say OK.", TurnTimer())
+        finally:
+            await close_cc(proc)
+        if err or not before or not after:
+            print(f"{pause:>5}s {'':>9} {'':>9} | {'':>9} {'':>9} {'':>6} | FAILED: {err or 'no usage'}", flush=True)
+            probes.append(dict(pause=pause, error=err or "no usage"))
+            continue
+        b_cc, b_cr = before["cc"], before["cr"]
+        a_cc, a_cr = after["cc"], after["cr"]
+        read_pct = a_cr * 100 / (a_cr + a_cc) if a_cr + a_cc else 0
+        # Collapsed = the cached prefix had to be rewritten rather than read
+        survived = a_cr > a_cc
+        print(f"{pause:>5}s {b_cr:>9,} {b_cc:>9,} | {a_cr:>9,} {a_cc:>9,} {read_pct:>5.0f}% | "
+              f"{'warm' if survived else 'COLD'}", flush=True)
+        probes.append(dict(pause=pause, before_cr=b_cr, before_cc=b_cc, after_cr=a_cr, after_cc=a_cc,
+                           read_pct=read_pct, survived=survived, error=None))
+
+    print("\nCache survival curve (after-pause read %):")
+    for p in probes:
+        if p["error"] is None:
+            print(f"{p['pause']:>5}s {'#' * round(p['read_pct'] / 2):<50} {p['read_pct']:.0f}%")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(base_session=base_id, probes=probes), f, indent=2)
+        print(f"Wrote {args.json}")
 
 
 if __name__ == "__main__":
     args = parse_args()
-    if args.file:
-        if args.file == "-":
-            analyze_jsonl(sys.stdin)
+    if args.compare:
+        sys.exit(compare_runs(*args.compare, args.alpha, args.threshold))
+    if args.models:
+        load_models(args.models)
+    sink = open_sink(args.format, args.output)
+    try:
+        if args.sweep:
+            asyncio.run(run_sweep(args))
+        elif args.sessions:
+            asyncio.run(run_concurrent(args, sink))
+        elif args.follow:
+            follow_jsonl(args.follow, args.poll, sink)
+        elif args.all or args.glob:
+            pattern = args.glob or str(CC_PROJECTS_DIR / "*" / "*.jsonl")
+            paths = sorted(glob(os.path.expanduser(pattern)))
+            if args.tools:
+                tools_report(paths, args.jobs)
+            elif args.index:
+                indexed_fleet_report(os.path.expanduser(args.index), paths, args.jobs, sink)
+            else:
+                fleet_report(paths, args.jobs, sink)
+        elif args.file and args.tools:
+            if args.file == "-":
+                tools = tool_attribution(iter_records(sys.stdin.buffer, RecordScanner(USER_AND_ASSISTANT)))
+            else:
+                with open(args.file, "rb") as f:
+                    tools = tool_attribution(iter_records(f, RecordScanner(USER_AND_ASSISTANT)))
+            print_tool_ranking(tools, 1)
+        elif args.file:
+            if args.file == "-":
+                analyze_jsonl(sys.stdin.buffer, "-", sink)
+            else:
+                with open(args.file, "rb") as f:
+                    analyze_jsonl(f, session_name(args.file), sink, subagent_paths(args.file))
         else:
-            with open(args.file) as f:
-                analyze_jsonl(f)
-    else:
-        run_live(args)
+            run_live(args, sink)
+    finally:
+        if sink:
+            sink.close()
@@ -319,7 +319,7 @@ async function scenarioReconnect(): Promise<void> {
 
   // *** RECONNECT ***
   // Simulate: bridge sends a fresh hello (reconnect=true) + state snapshot with partial response
-  broadcast("hello", { version: 1, clientId: "sim-reconnect", reconnect: true });
+  broadcast("hello", { version: 2, clientId: "sim-reconnect", reconnect: true });
   await sleep(100);
 
   const partialHistory: MockMessage[] = [
@@ -570,7 +570,7 @@ const server = createServer((req: IncomingMessage, res: ServerResponse) => {
     const client: SSEClient = { res, id: clientId };
     clients.push(client);
 
-    sendSSE(client, "hello", { version: 1, clientId, reconnect: false });
+    sendSSE(client, "hello", { version: 2, clientId, reconnect: false });
     sendSSE(client, "folders", {
       folders: [{ name: "sim-project", path: "/tmp/sim-project", state: "active", sessions: [] }],
     });
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Stand-in `claude` CLI that replays fixture sessions over stream-json.
+
+Speaks the subset of `claude -p --input-format stream-json --output-format
+stream-json` the bridge and scripts rely on: one turn per stdin user message,
+system:init every turn, stream_event partials, assistant and tool_result
+events, then result (see docs/CC-EVENTS.md). Turns come from session JSONLs
+(fixtures/*.jsonl by default), split at each real user prompt and replayed in
+order, wrapping around. No network, no model: the same inputs and seed give
+the same event stream. Unknown flags are ignored so real argv works as-is.
+
+Put it on PATH as `claude` and everything that spawns CC picks it up:
+
+    mkdir -p /tmp/fakebin && ln -sf "$PWD/scripts/fake-claude.py" /tmp/fakebin/claude
+    PATH=/tmp/fakebin:$PATH npm start
+    PATH=/tmp/fakebin:$PATH python3 scripts/context-profiler.py --sessions 32 --turns 5
+
+Tuning (environment, since callers pass real claude flags):
+    FAKE_CLAUDE_SCRIPT       Comma-separated session JSONLs to replay (default fixtures/*.jsonl)
+    FAKE_CLAUDE_INIT_MS      Spawn/turn start to system:init (default 300)
+    FAKE_CLAUDE_TTFT_MS      Request to first delta, per API call (default 800)
+    FAKE_CLAUDE_TOKEN_RATE   Output tokens/s while streaming, 0 for no pacing (default 80)
+    FAKE_CLAUDE_TOOL_MS      Tool execution time before each tool_result (default 200)
+    FAKE_CLAUDE_TOOL_BURST   Emit every tool call N times, as parallel calls (default 1)
+    FAKE_CLAUDE_CRASH_TURN   Exit mid-stream on this turn, no result (1-based)
+    FAKE_CLAUDE_CRASH_RATE   Probability of the same on any turn (default 0)
+    FAKE_CLAUDE_CRASH_CODE   Exit code for injected crashes (default 1)
+    FAKE_CLAUDE_SEED         Seed for crash injection, mixed with the session id (default 0)
+    FAKE_CLAUDE_PROJECTS_DIR Also append each turn to <dir>/<encoded cwd>/<session>.jsonl,
+                             like CC does under ~/.claude/projects (default off)
+
+Examples:
+    # As fast as the pipes go: event-rate stress for the bridge
+    FAKE_CLAUDE_INIT_MS=0 FAKE_CLAUDE_TTFT_MS=0 FAKE_CLAUDE_TOKEN_RATE=0 FAKE_CLAUDE_TOOL_MS=0 \\
+        PATH=/tmp/fakebin:$PATH npm start
+
+    # One CC process in ten dies mid-turn
+    FAKE_CLAUDE_CRASH_RATE=0.1 PATH=/tmp/fakebin:$PATH python3 scripts/context-profiler.py --sessions 20 --turns 3
+"""
+import argparse, json, os, random, re, sys, time, uuid
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+DEFAULT_MODEL = "claude-opus-4-6"
+CHARS_PER_TOKEN = 4
+DELTA_CHARS = 16  # text per content_block_delta, about what the API sends
+# Pricing for total_cost_usd, opus-4-6 list $/MTok; only has to be plausible
+PRICES = dict(input_tokens=5.00, cache_creation_input_tokens=6.25, cache_read_input_tokens=0.50, output_tokens=25.00)
+
+
+def env_num(name, default):
+    return float(os.environ.get(name, default))
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Replay fixture sessions as a stand-in claude CLI")
+    p.add_argument("--session-id", default=None)
+    p.add_argument("--resume", default=None)
+    p.add_argument("--fork-session", action="store_true")
+    p.add_argument("--model", default=None)
+    p.add_argument("--replay-user-messages", action="store_true")
+    p.add_argument("--include-partial-messages", action="store_true")
+    args, _ = p.parse_known_args()
+    return args
+
+
+def is_prompt(rec):
+    return rec.get("type") == "user" and isinstance(rec.get("message", {}).get("content"), str)
+
+
+def load_turns(paths):
+    """Split session JSONLs into turns: (prompt, steps), a step being an API message or a tool_result.
+
+    Consecutive assistant records sharing a message id are one API message
+    (CC writes a record per content block); a tool_result in between starts
+    the next call.
+    """
+    turns = []
+    for path in paths:
+        prompt, steps = None, []
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        for rec in records:
+            rec = rec.get("event", rec)  # bridge {"source": "cc", "event"} envelope
+            msg = rec.get("message", {})
+            if is_prompt(rec):
+                if steps:
+                    turns.append((prompt, steps))
+                prompt, steps = msg["content"], []
+            elif rec.get("type") == "assistant" and msg.get("model") != "<synthetic>":
+                if steps and steps[-1][0] == "assistant" and steps[-1][1]["id"] == msg.get("id"):
+                    steps[-1][1]["content"] += msg.get("content", [])
+                    steps[-1][1]["usage"] = msg.get("usage", steps[-1][1]["usage"])
+                else:
+                    steps.append(("assistant", dict(msg, content=list(msg.get("content", [])))))
+            elif rec.get("type") == "user" and isinstance(msg.get("content"), list) and any(
+                b.get("type") == "tool_result" for b in msg["content"]
+            ):
+                steps.append(("tool_result", msg))
+        if steps:
+            turns.append((prompt, steps))
+    return turns
+
+
+def burst(steps, n):
+    """Repeat every tool_use and its tool_result n times with distinct ids."""
+    if n <= 1:
+        return steps
+    out = []
+    for kind, msg in steps:
+        blocks = []
+        for b in msg["content"]:
+            key = "id" if b.get("type") == "tool_use" else "tool_use_id" if b.get("type") == "tool_result" else None
+            if key is None:
+                blocks.append(b)
+                continue
+            blocks += [dict(b, **{key: f"{b[key]}_{i}" if i else b[key]}) for i in range(n)]
+        out.append((kind, dict(msg, content=blocks)))
+    return out
+
+
+def encode_path(path):
+    """Same as encodePath in server/folders.ts."""
+    return re.sub(r"[^a-zA-Z0-9]", "-", path)
+
+
+class FakeCC:
+    def __init__(self, args):
+        scripts = os.environ.get("FAKE_CLAUDE_SCRIPT")
+        paths = scripts.split(",") if scripts else sorted(str(p) for p in FIXTURES.glob("*.jsonl"))
+        self.turns = load_turns(paths)
+        if not self.turns:
+            sys.exit(f"fake-claude: no replayable turns in {', '.join(paths)}")
+        if args.resume and args.fork_session:
+            self.session_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"fork:{args.resume}"))
+        else:
+            self.session_id = args.session_id or args.resume or str(uuid.uuid4())
+        self.args = args
+        self.model = args.model or next(
+            (m["model"] for _, steps in self.turns for k, m in steps if k == "assistant" and m.get("model")),
+            DEFAULT_MODEL,
+        )
+        self.init_s = env_num("FAKE_CLAUDE_INIT_MS", 300) / 1000
+        self.ttft_s = env_num("FAKE_CLAUDE_TTFT_MS", 800) / 1000
+        self.token_rate = env_num("FAKE_CLAUDE_TOKEN_RATE", 80)
+        self.tool_s = env_num("FAKE_CLAUDE_TOOL_MS", 200) / 1000
+        self.burst = int(env_num("FAKE_CLAUDE_TOOL_BURST", 1))
+        self.crash_turn = int(env_num("FAKE_CLAUDE_CRASH_TURN", 0))
+        self.crash_rate = env_num("FAKE_CLAUDE_CRASH_RATE", 0)
+        self.crash_code = int(env_num("FAKE_CLAUDE_CRASH_CODE", 1))
+        self.rng = random.Random(f"{os.environ.get('FAKE_CLAUDE_SEED', '0')}:{self.session_id}")
+        self.cost = 0.0
+        self.turn = 0
+        self.transcript = None
+        projects = os.environ.get("FAKE_CLAUDE_PROJECTS_DIR")
+        if projects:
+            folder = Path(projects).expanduser() / encode_path(os.getcwd())
+            folder.mkdir(parents=True, exist_ok=True)
+            self.transcript = open(folder / f"{self.session_id}.jsonl", "a")
+
+    def emit(self, obj):
+        sys.stdout.write(json.dumps(obj) + "\n")
+        sys.stdout.flush()
+
+    def stream(self, event):
+        if self.args.include_partial_messages:
+            self.emit(dict(type="stream_event", event=event, session_id=self.session_id, parent_tool_use_id=None))
+
+    def record(self, kind, message):
+        if self.transcript:
+            self.transcript.write(json.dumps(dict(
+                type=kind, message=message, isSidechain=False, sessionId=self.session_id, cwd=os.getcwd(),
+                uuid=str(uuid.uuid4()), timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            )) + "\n")
+            self.transcript.flush()
+
+    def pace(self, tokens):
+        if self.token_rate > 0:
+            time.sleep(tokens / self.token_rate)
+
+    def crash(self):
+        print(f"fake-claude: injected crash on turn {self.turn}", file=sys.stderr)
+        sys.stdout.flush()
+        os._exit(self.crash_code)
+
+    def stream_block(self, index, block):
+        """content_block_start and deltas for one block; the caller sends assistant then content_block_stop."""
+        kind = block.get("type")
+        if kind == "tool_use":
+            self.stream(dict(type="content_block_start", index=index,
+                             content_block=dict(type="tool_use", id=block["id"], name=block["name"])))
+            text, delta_type, field = json.dumps(block.get("input", {})), "input_json_delta", "partial_json"
+        elif kind == "thinking":
+            self.stream(dict(type="content_block_start", index=index, content_block=dict(type="thinking", thinking="")))
+            text, delta_type, field = block.get("thinking", ""), "thinking_delta", "thinking"
+        else:
+            self.stream(dict(type="content_block_start", index=index, content_block=dict(type="text", text="")))
+            text, delta_type, field = block.get("text", ""), "text_delta", "text"
+        for i in range(0, len(text), DELTA_CHARS):
+            self.pace(DELTA_CHARS / CHARS_PER_TOKEN)
+            self.stream(dict(type="content_block_delta", index=index, delta={"type": delta_type, field: text[i:i + DELTA_CHARS]}))
+
+    def api_message(self, msg, crash):
+        time.sleep(self.ttft_s)
+        usage = msg.get("usage", {})
+        self.stream(dict(type="message_start", message=dict(
+            id=msg.get("id"), type="message", role="assistant", model=msg.get("model", self.model),
+            content=[], usage=usage,
+        )))
+        if crash:
+            self.crash()
+        for index, block in enumerate(msg["content"]):
+            self.stream_block(index, block)
+            # CC emits the complete assistant message before content_block_stop, one per block
+            message = dict(msg, content=[block])
+            self.emit(dict(type="assistant", message=message, session_id=self.session_id, parent_tool_use_id=None))
+            self.record("assistant", message)
+            self.stream(dict(type="content_block_stop", index=index))
+        stop = "tool_use" if any(b.get("type") == "tool_use" for b in msg["content"]) else "end_turn"
+        self.stream(dict(type="message_delta", delta=dict(stop_reason=stop),
+                         usage=dict(output_tokens=usage.get("output_tokens", 0))))
+        self.stream(dict(type="message_stop"))
+        return usage
+
+    def run_turn(self, text):
+        self.turn += 1
+        start = time.monotonic()
+        time.sleep(self.init_s)
+        self.emit(dict(type="system", subtype="init", cwd=os.getcwd(), session_id=self.session_id, model=self.model,
+                       permissionMode="bypassPermissions", claude_code_version="fake",
+                       slash_commands=["compact", "context", "cost"],
+                       tools=["Task", "Bash", "Read", "Write", "Edit", "Glob", "Grep"], mcp_servers=[]))
+        if self.args.replay_user_messages:
+            self.emit(dict(type="user", message=dict(role="user", content=text), session_id=self.session_id,
+                           parent_tool_use_id=None))
+        self.record("user", dict(role="user", content=text))
+        _, steps = self.turns[(self.turn - 1) % len(self.turns)]
+        crash = self.turn == self.crash_turn or self.rng.random() < self.crash_rate
+        usage, calls, result = {}, 0, ""
+        for kind, msg in burst(steps, self.burst):
+            if kind == "assistant":
+                usage = self.api_message(msg, crash and calls == 0)
+                calls += 1
+                self.cost += sum(usage.get(k, 0) * price for k, price in PRICES.items()) / 1_000_000
+                result = next((b["text"] for b in msg["content"] if b.get("type") == "text"), result)
+            else:
+                time.sleep(self.tool_s)
+                self.emit(dict(type="user", message=msg, session_id=self.session_id, parent_tool_use_id=None))
+                self.record("user", msg)
+        elapsed = int((time.monotonic() - start) * 1000)
+        counts = dict(inputTokens=usage.get("input_tokens", 0), outputTokens=usage.get("output_tokens", 0),
+                      cacheReadInputTokens=usage.get("cache_read_input_tokens", 0),
+                      cacheCreationInputTokens=usage.get("cache_creation_input_tokens", 0))
+        self.emit(dict(
+            type="result", subtype="success", is_error=False, duration_ms=elapsed, duration_api_ms=elapsed,
+            num_turns=calls, result=result, session_id=self.session_id, total_cost_usd=round(self.cost, 6),
+            usage={k: usage.get(k, 0) for k in PRICES},
+            modelUsage={self.model: dict(counts, costUSD=round(self.cost, 6), contextWindow=200000,
+                                         maxOutputTokens=32000)},
+        ))
+
+
+def main():
+    cc = FakeCC(parse_args())
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        if obj.get("type") != "user":
+            continue
+        content = obj.get("message", {}).get("content", "")
+        text = content if isinstance(content, str) else " ".join(
+            b.get("text", "") for b in content if isinstance(b, dict))
+        cc.run_turn(text)
+
+
+if __name__ == "__main__":
+    main()
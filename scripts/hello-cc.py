@@ -4,14 +4,25 @@
 Spawns a Claude Code process, sends one message, prints every event.
 Use this to verify the environment works before building anything.
 
+--stats also measures the stream: per event type counts, serialized bytes
+and inter-arrival gaps, with histograms at the end. Those size the bridge's
+pendingDeltas conflation window and the SSE budget for cellular clients.
+
 Usage:
     python3 scripts/hello-cc.py
     python3 scripts/hello-cc.py "Your prompt here"
+    python3 scripts/hello-cc.py --stats "Write a 300-word story"
 """
-import subprocess, json, sys, threading, queue, uuid
+import argparse, math, subprocess, json, sys, threading, queue, time, uuid
+from collections import defaultdict
+
+parser = argparse.ArgumentParser(description="Minimal Claude Code stream-json test")
+parser.add_argument("prompt", nargs="?", default="Say hello in exactly 5 words.")
+parser.add_argument("--stats", action="store_true", help="Histogram event counts, sizes and inter-arrival times")
+ARGS = parser.parse_args()
 
 SESSION_ID = str(uuid.uuid4())
-PROMPT = sys.argv[1] if len(sys.argv) > 1 else "Say hello in exactly 5 words."
+PROMPT = ARGS.prompt
 
 proc = subprocess.Popen(
     ["claude", "-p", "--verbose",
@@ -26,20 +37,83 @@ proc = subprocess.Popen(
     text=True, bufsize=1
 )
 
+# Stamp lines on arrival in the reader thread so --stats gaps aren't skewed by printing
 q = queue.Queue()
-threading.Thread(target=lambda: [q.put(l.rstrip()) for l in proc.stdout] or q.put(None), daemon=True).start()
+threading.Thread(target=lambda: [q.put((time.monotonic(), l.rstrip())) for l in proc.stdout] or q.put(None),
+                 daemon=True).start()
+
+sizes = defaultdict(list)  # event key -> serialized bytes per event
+gaps = defaultdict(list)   # event key -> ms since the previous event of that key
+last_seen = {}
+
+
+def event_key(obj):
+    """Stats bucket: deltas split by delta type, other stream events by event type."""
+    tp = obj.get("type", "?")
+    if tp == "stream_event":
+        evt = obj.get("event", {})
+        if evt.get("type") == "content_block_delta":
+            return f"delta:{evt.get('delta', {}).get('type', '?')}"
+        return f"stream:{evt.get('type', '?')}"
+    return f"{tp}:{obj['subtype']}" if obj.get("subtype") else tp
+
+
+def record(obj, line, now):
+    key = event_key(obj)
+    sizes[key].append(len(line.encode()))
+    if key in last_seen:
+        gaps[key].append((now - last_seen[key]) * 1000)
+    last_seen[key] = now
+
+
+def histogram(title, values, unit):
+    """Power-of-two buckets with a bar per bucket."""
+    print(f"  {title} (n={len(values)}, min {min(values):,.1f}, max {max(values):,.1f} {unit})")
+    buckets = defaultdict(int)
+    for v in values:
+        buckets[0 if v < 1 else int(math.log2(v)) + 1] += 1
+    peak = max(buckets.values())
+    for b in range(min(buckets), max(buckets) + 1):
+        lo, hi = (0, 1) if b == 0 else (2 ** (b - 1), 2 ** b)
+        n = buckets.get(b, 0)
+        print(f"    {lo:>8,}-{hi:<8,} {'#' * max(1 if n else 0, n * 40 // peak):<40} {n}")
+
+
+def print_stats(elapsed):
+    print(f"\n{'Event':<28} {'Count':>6} {'Bytes':>9} {'Avg B':>7} {'Gap p50':>8} {'Gap max':>8} {'Rate/s':>7}")
+    for key in sorted(sizes, key=lambda k: -len(sizes[k])):
+        sz, gp = sizes[key], sorted(gaps[key])
+        p50 = f"{gp[len(gp) // 2]:>8,.1f}" if gp else f"{'-':>8}"
+        mx = f"{gp[-1]:>8,.1f}" if gp else f"{'-':>8}"
+        print(f"{key:<28} {len(sz):>6} {sum(sz):>9,} {sum(sz) / len(sz):>7,.0f} {p50} {mx} "
+              f"{len(sz) / elapsed if elapsed else 0:>7,.1f}")
+    total = sum(sum(sz) for sz in sizes.values())
+    print(f"{'total':<28} {sum(len(sz) for sz in sizes.values()):>6} {total:>9,}   over {elapsed:.1f}s "
+          f"({total * 8 / 1000 / elapsed if elapsed else 0:,.1f} kbit/s)")
+    for key in sorted(sizes):
+        if not (key.startswith("delta:") or key.split(":")[0] in ("assistant", "user", "result")):
+            continue
+        print(f"\n{key}")
+        histogram("bytes", sizes[key], "B")
+        if gaps[key]:
+            histogram("inter-arrival", gaps[key], "ms")
+
 
 print(f"Session: {SESSION_ID}")
 print(f"Prompt:  {PROMPT}\n")
 
 proc.stdin.write(json.dumps({"type": "user", "message": {"role": "user", "content": PROMPT}}) + "\n")
 proc.stdin.flush()
+start = time.monotonic()
 
 while True:
-    line = q.get()
-    if line is None:
+    item = q.get()
+    if item is None:
         break
+    now, line = item
     obj = json.loads(line)
+    if ARGS.stats:
+        record(obj, line, now)
     tp = obj.get("type", "?")
     sub = obj.get("subtype", "")
 
@@ -77,5 +151,8 @@ while True:
         print(f"\n[done] turns={obj.get('num_turns')} session={obj.get('session_id', '')[:8]}...")
         break
 
+if ARGS.stats:
+    print_stats(time.monotonic() - start)
+
 proc.stdin.close()
 proc.wait()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Run CC protocol scenarios in parallel and check their event streams.
+
+Generalizes test-askuser.py: each scenario file (JSON, or YAML with PyYAML
+installed) gives the prompts, allowed tools and extra flags for one CC
+session, the stream-json events it must and must not produce, and timing
+budgets. Scenarios run concurrently, at most --jobs CC processes at a time,
+so a suite takes about as long as its slowest scenario. Results print as a
+table and optionally as JUnit XML for CI.
+
+Scenario file:
+    {
+      "name": "askuser-allowed-tools",          # default: file stem
+      "prompt": "..." | ["turn 1", "turn 2"],   # one turn per prompt
+      "allowed_tools": "AskUserQuestion",       # --allowed-tools (omit for CC's default)
+      "permission_mode": "default",             # --permission-mode
+      "args": ["--include-partial-messages"],   # anything else for the claude argv
+      "timeout": 90,                            # seconds for the whole scenario
+      "expect": [ pattern, ... ],               # each must match some event...
+      "ordered": false,                         # ...in this order, if true
+      "forbid": [ pattern, ... ],               # none may match any event
+      "budgets": {"init_ms": 10000, "ttft_ms": 20000, "result_ms": 60000}
+    }
+
+A pattern maps dotted paths to values: {"type": "assistant",
+"message.content[].name": "AskUserQuestion"}. "[]" matches any list
+element; a value of {"regex": "..."} matches strings by re.search. Budgets
+are measured from spawn for the first turn: system:init, first
+content_block_delta (or assistant message without partials), and result.
+
+Usage:
+    python3 scripts/run-scenarios.py                        # scripts/scenarios/*
+    python3 scripts/run-scenarios.py --jobs 4 --junit results.xml
+    python3 scripts/run-scenarios.py scripts/scenarios/askuser.json
+"""
+import argparse, json, re, subprocess, sys, threading, queue, time, uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+from pathlib import Path
+
+SCENARIO_DIR = Path(__file__).resolve().parent / "scenarios"
+BUDGET_KEYS = ("init_ms", "ttft_ms", "result_ms")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Run CC stream-json scenarios concurrently")
+    p.add_argument("paths", nargs="*", help=f"Scenario files (default {SCENARIO_DIR}/*.json|yaml)")
+    p.add_argument("--jobs", type=int, default=8, help="Max concurrent CC processes")
+    p.add_argument("--junit", type=str, default=None, help="Write JUnit XML results here")
+    p.add_argument("--verbose", action="store_true", help="Print every failing scenario's last events")
+    return p.parse_args()
+
+
+def have_yaml():
+    try:
+        import yaml  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_yaml(path):
+    return path.endswith((".yaml", ".yml"))
+
+
+def load_scenario(path):
+    text = Path(path).read_text()
+    if is_yaml(path):
+        if not have_yaml():
+            sys.exit(f"{path}: YAML scenarios need PyYAML (pip install pyyaml) — or use JSON")
+        import yaml
+        scenario = yaml.safe_load(text)
+    else:
+        scenario = json.loads(text)
+    scenario.setdefault("name", Path(path).stem)
+    scenario["path"] = path
+    return scenario
+
+
+def cc_command(scenario, session_id):
+    cmd = ["claude", "-p", "--verbose",
+           "--input-format", "stream-json",
+           "--output-format", "stream-json",
+           "--session-id", session_id]
+    if "allowed_tools" in scenario:
+        cmd += ["--allowed-tools", scenario["allowed_tools"]]
+    if "permission_mode" in scenario:
+        cmd += ["--permission-mode", scenario["permission_mode"]]
+    return cmd + list(scenario.get("args", []))
+
+
+def path_values(obj, parts):
+    """Every value at a dotted path; "[]" fans out over list elements."""
+    if not parts:
+        yield obj
+        return
+    head, rest = parts[0], parts[1:]
+    if head.endswith("[]"):
+        key = head[:-2]
+        items = obj.get(key) if isinstance(obj, dict) and key else obj
+        if isinstance(items, list):
+            for item in items:
+                yield from path_values(item, rest)
+    elif isinstance(obj, dict) and head in obj:
+        yield from path_values(obj[head], rest)
+
+
+def value_matches(actual, expected):
+    if isinstance(expected, dict) and "regex" in expected:
+        return isinstance(actual, str) and re.search(expected["regex"], actual) is not None
+    return actual == expected
+
+
+def matches(event, pattern):
+    return all(any(value_matches(v, want) for v in path_values(event, path.split(".")))
+               for path, want in pattern.items())
+
+
+def run_scenario(scenario):
+    """Drive one CC session through the scenario; returns a result dict."""
+    prompts = scenario["prompt"] if isinstance(scenario["prompt"], list) else [scenario["prompt"]]
+    timeout = scenario.get("timeout", 90)
+    start = time.monotonic()
+    deadline = start + timeout
+    events, failures, timing = [], [], {}
+    try:
+        proc = subprocess.Popen(
+            cc_command(scenario, str(uuid.uuid4())),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, bufsize=1,
+        )
+    except OSError as e:
+        return dict(scenario=scenario, error=f"spawn failed: {e}", failures=[], elapsed=0.0, timing={}, events=[])
+
+    q = queue.Queue()
+    stderr_lines = []
+    threading.Thread(target=lambda: [q.put((time.monotonic(), l.rstrip())) for l in proc.stdout] or q.put(None),
+                     daemon=True).start()
+    threading.Thread(target=lambda: [stderr_lines.append(l.rstrip()) for l in proc.stderr], daemon=True).start()
+
+    try:
+        for turn, prompt in enumerate(prompts, 1):
+            proc.stdin.write(json.dumps({"type": "user", "message": {"role": "user", "content": prompt}}) + "\n")
+            proc.stdin.flush()
+            while True:
+                try:
+                    item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    failures.append(f"timeout after {timeout}s in turn {turn}")
+                    break
+                if item is None:
+                    failures.append(f"CC exited (code {proc.wait()}) in turn {turn}")
+                    break
+                now, line = item
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    failures.append(f"unparseable line: {line[:120]}")
+                    continue
+                events.append(obj)
+                if turn == 1:
+                    ms = (now - start) * 1000
+                    tp = obj.get("type")
+                    if tp == "system" and obj.get("subtype") == "init":
+                        timing.setdefault("init_ms", ms)
+                    elif (tp == "stream_event" and obj.get("event", {}).get("type") == "content_block_delta") or tp == "assistant":
+                        timing.setdefault("ttft_ms", ms)
+                    elif tp == "result":
+                        timing.setdefault("result_ms", ms)
+                if obj.get("type") == "result":
+                    break
+            if failures:
+                break
+    except (BrokenPipeError, ConnectionError):
+        failures.append(f"CC exited (code {proc.wait()}) before the prompt")
+    finally:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    # Expectations
+    expect = scenario.get("expect", [])
+    if scenario.get("ordered"):
+        i = 0
+        for obj in events:
+            if i < len(expect) and matches(obj, expect[i]):
+                i += 1
+        failures += [f"expected (in order) {json.dumps(p)}" for p in expect[i:]]
+    else:
+        failures += [f"expected {json.dumps(p)}" for p in expect if not any(matches(e, p) for e in events)]
+    for p in scenario.get("forbid", []):
+        hit = next((e for e in events if matches(e, p)), None)
+        if hit is not None:
+            failures.append(f"forbidden {json.dumps(p)} matched {json.dumps(hit)[:200]}")
+    for key, budget in scenario.get("budgets", {}).items():
+        if key not in BUDGET_KEYS:
+            failures.append(f"unknown budget {key} (one of {', '.join(BUDGET_KEYS)})")
+        elif key not in timing:
+            failures.append(f"{key} never observed (budget {budget}ms)")
+        elif timing[key] > budget:
+            failures.append(f"{key} {timing[key]:,.0f}ms over budget {budget:,}ms")
+
+    return dict(scenario=scenario, error=None, failures=failures, elapsed=time.monotonic() - start,
+                timing=timing, events=events, stderr=stderr_lines[-5:])
+
+
+def write_junit(path, results, wall):
+    suite = ET.Element("testsuite", name="cc-scenarios", tests=str(len(results)),
+                       failures=str(sum(1 for r in results if r["failures"])),
+                       errors=str(sum(1 for r in results if r["error"])), time=f"{wall:.3f}")
+    for r in results:
+        case = ET.SubElement(suite, "testcase", name=r["scenario"]["name"],
+                             classname=Path(r["scenario"]["path"]).stem, time=f"{r['elapsed']:.3f}")
+        if r["error"]:
+            ET.SubElement(case, "error", message=r["error"])
+        elif r["failures"]:
+            ET.SubElement(case, "failure", message=r["failures"][0]).text = "\n".join(r["failures"])
+        timing = ", ".join(f"{k}={v:.0f}" for k, v in r["timing"].items())
+        ET.SubElement(case, "system-out").text = f"timing: {timing}\n" + "\n".join(r.get("stderr", []))
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+    print(f"Wrote {path}")
+
+
+def main():
+    args = parse_args()
+    paths = args.paths
+    if not paths:
+        paths = sorted(glob(str(SCENARIO_DIR / "*.json")) + glob(str(SCENARIO_DIR / "*.y*ml")))
+        # Named YAML files still need PyYAML; the default suite runs without it
+        if not have_yaml():
+            for p in filter(is_yaml, paths):
+                print(f"Skipping {p}: YAML scenarios need PyYAML (pip install pyyaml)", file=sys.stderr)
+            paths = [p for p in paths if not is_yaml(p)]
+    if not paths:
+        sys.exit("No scenario files")
+    scenarios = [load_scenario(p) for p in paths]
+    print(f"{len(scenarios)} scenarios, {min(args.jobs, len(scenarios))} at a time\n", flush=True)
+
+    start = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for fut in as_completed([pool.submit(run_scenario, s) for s in scenarios]):
+            r = fut.result()
+            results.append(r)
+            status = "ERROR" if r["error"] else "FAIL" if r["failures"] else "PASS"
+            timing = " ".join(f"{k}={v:,.0f}" for k, v in r["timing"].items())
+            print(f"{status:<5} {r['scenario']['name']:<40} {r['elapsed']:>6.1f}s  {timing}", flush=True)
+            for msg in ([r["error"]] if r["error"] else r["failures"]):
+                print(f"      {msg}")
+            if args.verbose and (r["error"] or r["failures"]):
+                for e in r["events"][-5:]:
+                    print(f"      | {json.dumps(e)[:160]}")
+    wall = time.monotonic() - start
+
+    failed = sum(1 for r in results if r["error"] or r["failures"])
+    serial = sum(r["elapsed"] for r in results)
+    print(f"\n{len(results) - failed} passed, {failed} failed in {wall:.1f}s (scenarios sum to {serial:.1f}s)")
+    if args.junit:
+        write_junit(args.junit, sorted(results, key=lambda r: r["scenario"]["path"]), wall)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Synthetic SSE and prompt load for a running bridge.
+
+Opens many GET /events streams, attaches each to a folder session with
+POST /session/:folder, then fires POST /prompt/:folder bursts and waits for
+every client to see the turn end. One reader thread per SSE client stamps
+events on arrival and hands them to the main thread over a queue, the same
+shape as hello-cc.py. Reported per run:
+
+    first event   prompt POST -> first text/current event, per client
+    turn          prompt POST -> idle state after the burst's last turn, per client
+    fan-out lag   arrival of a broadcast at a client minus its earliest arrival
+                  at any client of that folder (how far broadcastToSession
+                  and the socket writes fall behind as clients grow)
+    id gaps       missing or out-of-order session event ids per client (each id
+                  is <stream>-<seq>; a gap means the bridge dropped or
+                  suppressed events for that client)
+    bytes         SSE bytes received, per client and in total
+
+Point the bridge at fake-claude.py to load it without network:
+
+    mkdir -p ~/load-root/a ~/load-root/b && ln -sf "$PWD/scripts/fake-claude.py" /tmp/fakebin/claude
+    SCAN_ROOT=~/load-root PATH=/tmp/fakebin:$PATH npm start
+    python3 scripts/sse-load.py --folders a,b --clients 400 --burst 3 --rounds 5
+
+Usage:
+    python3 scripts/sse-load.py --folders NAME[,NAME...]                  # 100 clients, 1 prompt
+    python3 scripts/sse-load.py --folders a,b --clients 400 --burst 5     # 5 prompts per folder at once
+    python3 scripts/sse-load.py --folders a --rounds 10 --json load.json  # Repeat, keep the numbers
+"""
+import argparse, http.client, json, queue, sys, threading, time, uuid
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+TURN_START_EVENTS = ("text", "current")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="SSE fan-out and prompt load generator for the bridge")
+    p.add_argument("--url", default="http://localhost:3001", help="Bridge base URL")
+    p.add_argument("--folders", required=True, help="Comma-separated folder names under the bridge's SCAN_ROOT")
+    p.add_argument("--clients", type=int, default=100, help="SSE connections, spread round-robin over folders")
+    p.add_argument("--burst", type=int, default=1, help="Prompts fired at each folder at once per round")
+    p.add_argument("--rounds", type=int, default=1, help="Bursts to fire, each after the previous turn ends")
+    p.add_argument("--prompt", default="Say OK.", help="Prompt text")
+    p.add_argument("--timeout", type=float, default=120, help="Seconds to wait for attach and for each round")
+    p.add_argument("--json", type=str, default=None, help="Write per-client stats and percentiles to a JSON file")
+    return p.parse_args()
+
+
+def request(base, method, path, body=None, headers=None):
+    """One short-lived HTTP request; returns (status, body)."""
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    finally:
+        conn.close()
+
+
+class SSEClient:
+    """One GET /events stream, read on its own thread; events go to the shared queue."""
+
+    def __init__(self, index, base, folder, q):
+        self.index = index
+        self.base = base
+        self.folder = folder
+        self.client_id = f"load-{index}-{uuid.uuid4().hex[:8]}"
+        self.q = q
+        self.bytes = 0
+        self.events = defaultdict(int)
+        self.stream = None
+        self.last_id = 0
+        self.gaps = 0        # ids skipped
+        self.reordered = 0   # ids at or below the previous one
+        self.seen = defaultdict(int)  # (event, data) -> occurrences, to match repeats across clients
+        self.error = None
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            conn = http.client.HTTPConnection(self.base.hostname, self.base.port or 80)
+            conn.request("GET", f"/events?clientId={self.client_id}", headers={"Accept": "text/event-stream"})
+            resp = conn.getresponse()
+            if resp.status != 200:
+                raise OSError(f"GET /events returned {resp.status}")
+            event, data, eid = "message", [], None
+            while True:
+                line = resp.readline()
+                if not line:
+                    raise OSError("stream closed")
+                now = time.monotonic()
+                self.bytes += len(line)
+                line = line.decode().rstrip("\r\n")
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+                    elif field == "id":
+                        eid = value
+                    continue
+                # Blank line dispatches the event
+                if eid is not None:
+                    stream, _, seq = eid.rpartition("-")
+                    eid = int(seq)
+                    if stream != self.stream:
+                        # Attach snapshot: new stream, its position is the baseline
+                        self.stream, self.last_id = stream, eid
+                    elif eid > self.last_id + 1:
+                        self.gaps += eid - self.last_id - 1
+                    elif eid < self.last_id:  # equal: a resync snapshot at the current position
+                        self.reordered += 1
+                    self.last_id = eid
+                self.events[event] += 1
+                self.q.put((now, self, event, "\n".join(data)))
+                event, data, eid = "message", [], None
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.q.put((time.monotonic(), self, None, None))
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of a non-empty sorted list."""
+    k = (len(values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarize(samples):
+    vals = sorted(samples)
+    if not vals:
+        return None
+    return dict(n=len(vals), p50=percentile(vals, 50), p95=percentile(vals, 95), p99=percentile(vals, 99),
+                max=vals[-1], mean=sum(vals) / len(vals))
+
+
+def main():
+    args = parse_args()
+    base = urlsplit(args.url)
+    folders = args.folders.split(",")
+    q = queue.Queue()
+    clients = [SSEClient(i, base, folders[i % len(folders)], q) for i in range(args.clients)]
+
+    print(f"{args.clients} clients over {len(folders)} folders, {args.rounds} rounds x {args.burst} prompts/folder")
+    start = time.monotonic()
+    for c in clients:
+        c.start()
+
+    attached = set()
+    first_seen = {}                      # (folder, event, data, occurrence) -> earliest arrival
+    fanout_ms = []
+    first_event_ms, turn_ms = [], []
+    round_start = None
+    waiting_first, waiting_idle = set(), {}  # waiting_idle: client -> idle states still due
+    dead = set()
+
+    def attach(c):
+        status, body = request(base, "POST", f"/session/{quote(c.folder)}", b"",
+                               {"X-Client-ID": c.client_id, "Content-Type": "application/json"})
+        if status != 200:
+            c.error = f"POST /session/{c.folder} returned {status}: {body[:200]!r}"
+
+    def handle(now, c, event, data):
+        if event is None:
+            dead.add(c)
+            waiting_first.discard(c)
+            waiting_idle.pop(c, None)
+            return
+        if event == "hello":
+            # Attach off the reader thread so a slow POST doesn't stall other clients' accounting
+            threading.Thread(target=attach, args=(c,), daemon=True).start()
+            return
+        if event == "state" and c not in attached:
+            attached.add(c)
+            return
+        c.seen[event, data] += 1
+        key = (c.folder, event, data, c.seen[event, data])
+        earliest = first_seen.setdefault(key, now)
+        if event not in ("ping", "folders"):
+            fanout_ms.append((now - earliest) * 1000)
+        if round_start is None:
+            return
+        if c in waiting_first and event in TURN_START_EVENTS:
+            waiting_first.discard(c)
+            first_event_ms.append((now - round_start) * 1000)
+        if c in waiting_idle and event == "state" and json.loads(data).get("status") == "idle":
+            # Burst prompts queue behind the running turn; each one ends with its own idle state
+            waiting_idle[c] -= 1
+            if not waiting_idle[c]:
+                del waiting_idle[c]
+                turn_ms.append((now - round_start) * 1000)
+
+    def drain_until(done, deadline):
+        while not done() and time.monotonic() < deadline:
+            try:
+                handle(*q.get(timeout=max(0.0, min(1.0, deadline - time.monotonic()))))
+            except queue.Empty:
+                pass
+
+    drain_until(lambda: len(attached) + len(dead) >= len(clients), time.monotonic() + args.timeout)
+    print(f"Attached {len(attached)}/{len(clients)} in {time.monotonic() - start:.1f}s", flush=True)
+
+    for rnd in range(1, args.rounds + 1):
+        live = [c for c in attached if c not in dead]
+        waiting_first, waiting_idle = set(live), dict.fromkeys(live, args.burst)
+        round_start = time.monotonic()
+        body = json.dumps({"text": args.prompt}).encode()
+        posts = [threading.Thread(target=request, args=(base, "POST", f"/prompt/{quote(f)}", body,
+                                                         {"Content-Type": "application/json"}), daemon=True)
+                 for f in folders for _ in range(args.burst)]
+        for t in posts:
+            t.start()
+        drain_until(lambda: not waiting_idle, round_start + args.timeout)
+        print(f"Round {rnd}: {time.monotonic() - round_start:.1f}s"
+              + (f", {len(waiting_idle)} clients never saw the turn end" if waiting_idle else ""), flush=True)
+
+    wall = time.monotonic() - start
+    total_bytes = sum(c.bytes for c in clients)
+    by_event = defaultdict(int)
+    for c in clients:
+        for event, n in c.events.items():
+            by_event[event] += n
+    stats = dict(first_event_ms=summarize(first_event_ms), turn_ms=summarize(turn_ms),
+                 fanout_lag_ms=summarize(fanout_ms))
+
+    print(f"\n{'Latency':<15} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'mean':>8}")
+    for name, s in stats.items():
+        if s:
+            print(f"{name:<15} {s['n']:>7} {s['p50']:>8,.1f} {s['p95']:>8,.1f} {s['p99']:>8,.1f} "
+                  f"{s['max']:>8,.1f} {s['mean']:>8,.1f}")
+    print(f"\n{'Event':<16} {'Count':>9}")
+    for event, n in sorted(by_event.items(), key=lambda kv: -kv[1]):
+        print(f"{event:<16} {n:>9,}")
+    gaps = sum(c.gaps for c in clients)
+    reordered = sum(c.reordered for c in clients)
+    errors = [c for c in clients if c.error]
+    print(f"\n{total_bytes / 1e6:,.1f}MB in {wall:.1f}s ({total_bytes / 1e6 / wall:,.2f}MB/s), "
+          f"{total_bytes / max(len(clients), 1) / 1e3:,.1f}KB per client")
+    print(f"id gaps: {gaps} missing, {reordered} out of order; {len(errors)} clients errored")
+    for c in errors[:5]:
+        print(f"  client {c.index} ({c.folder}): {c.error}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(
+                clients=[dict(index=c.index, folder=c.folder, bytes=c.bytes, events=dict(c.events), gaps=c.gaps,
+                              reordered=c.reordered, error=c.error) for c in clients],
+                latency=stats, events=dict(by_event), bytes=total_bytes, wall=wall,
+            ), f, indent=2)
+        print(f"Wrote {args.json}")
+    sys.exit(1 if errors or gaps or reordered else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Regression tests for context-profiler's JSONL accounting, against fixtures/.
+
+Usage:
+    python3 scripts/test-context-profiler.py
+"""
+import importlib.util, unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).parent
+PIPELINE = SCRIPTS.parent / "fixtures" / "pipeline-tool-execution.jsonl"
+
+
+def load_profiler():
+    spec = importlib.util.spec_from_file_location("context_profiler", SCRIPTS / "context-profiler.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+profiler = load_profiler()
+
+
+class TurnRowsTest(unittest.TestCase):
+    def test_sibling_lines_of_one_message_are_one_call(self):
+        # Four assistant lines (one per content block) share msg_01QCkC5... and its usage
+        with open(PIPELINE, "rb") as f:
+            rows = list(profiler.turn_rows(profiler.iter_records(f)))
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row["turn"], row["total"], row["out"], row["delta"]), (1, 41_967, 1783, 41_967))
+        self.assertAlmostEqual(row["cost"], 0.073567)
+        self.assertTrue(row["note"].startswith("Kube's offline"))
+
+    def test_call_split_across_scans_replaces_its_row(self):
+        with open(PIPELINE, "rb") as f:
+            records = list(profiler.iter_records(f))
+        timeline = profiler.new_timeline()
+        first = list(profiler.turn_rows(records[:2], timeline))
+        rest = list(profiler.turn_rows(records[2:], timeline))
+        self.assertEqual([r["turn"] for r in first + rest], [1, 1])
+        self.assertEqual((rest[0]["out"], rest[0]["delta"]), (1783, 41_967))
+        self.assertEqual(rest[0]["note"], first[0]["note"])
+
+
+class ToolAttributionTest(unittest.TestCase):
+    def test_result_between_sibling_lines_feeds_the_next_call(self):
+        # The first Bash result (a persisted-output spill) lands between two lines of the same message
+        with open(PIPELINE, "rb") as f:
+            records = list(profiler.iter_records(f, profiler.RecordScanner(profiler.USER_AND_ASSISTANT)))
+        self.assertEqual([r["type"] for r in records[:4]], ["assistant", "assistant", "user", "assistant"])
+        next_call = {"type": "assistant", "message": {"id": "msg_next", "content": [], "usage": {
+            "input_tokens": 1, "cache_creation_input_tokens": 1000, "cache_read_input_tokens": 41_966}}}
+        tools = profiler.tool_attribution(records[:4] + [next_call])
+        self.assertEqual(tools["Bash"]["spills"], 1)
+        self.assertEqual(tools["Bash"]["tokens"], 1000)
+        self.assertEqual(tools[profiler.NO_TOOL]["tokens"], 41_967)
+
+
+if __name__ == "__main__":
+    unittest.main()
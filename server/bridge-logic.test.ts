@@ -1,15 +1,20 @@
 import { describe, it, expect } from "vitest";
 import { readFileSync } from "node:fs";
 import { join } from "node:path";
-import { StateBuilder } from "./state-builder.ts";
+import { createRequire } from "node:module";
+import { StateBuilder, type BBMessage } from "./state-builder.ts";
 import {
   resolveSessionForFolder,
   isHandoffStale,
   validateFolderPath,
+  isSessionId,
   buildCCArgs,
   buildSystemPrompt,
   getActiveSessions,
   parseSessionJSONL,
+  createJSONLReplay,
+  pushJSONLLine,
+  endJSONLReplay,
   isStreamDelta,
   extractDeltaInfo,
   buildMergedDelta,
@@ -32,8 +37,27 @@ import {
   type ShutdownContext,
   type LastToolCall,
   isSubagentEvent,
+  parseWarmSpawnConfig,
+  decideWarmSpawn,
+  resumableAfter,
+  type WarmSpawnConfig,
+  buildSSEFrame,
+  formatEventId,
+  parseEventId,
+  createReplayRing,
+  pushReplayFrame,
+  framesSince,
+  REPLAY_MAX_FRAMES,
+  REPLAY_MAX_BYTES,
+  backpressureAction,
+  SSE_DROP_BYTES,
+  SSE_DISCONNECT_BYTES,
+  diffMessages,
 } from "./bridge-logic.js";
 
+const require = createRequire(import.meta.url);
+const { applyMessagesPatch } = require("../client/state-handlers.cjs" as string);
+
 // --- resolveSessionForFolder ---
 // Decision tree for connecting to a folder. Handoff/exit only block resume
 // when they match the latest session — stale signals from old sessions don't
@@ -387,6 +411,21 @@ describe("validateFolderPath", () => {
 
 // --- buildCCArgs ---
 
+describe("isSessionId", () => {
+  it("accepts CC session UUIDs", () => {
+    expect(isSessionId("3f2b8c1e-9a4d-4e6f-b1c2-0d9e8f7a6b5c")).toBe(true);
+    expect(isSessionId("3F2B8C1E-9A4D-4E6F-B1C2-0D9E8F7A6B5C")).toBe(true);
+  });
+
+  it("rejects path-like and malformed ids", () => {
+    expect(isSessionId("../../.ssh/authorized_keys")).toBe(false);
+    expect(isSessionId("3f2b8c1e-9a4d-4e6f-b1c2-0d9e8f7a6b5c/../x")).toBe(false);
+    expect(isSessionId("new")).toBe(false);
+    expect(isSessionId("")).toBe(false);
+    expect(isSessionId(42)).toBe(false);
+  });
+});
+
 describe("buildCCArgs", () => {
   it("uses --session-id for fresh sessions", () => {
     const args = buildCCArgs("my-uuid", false);
@@ -519,6 +558,20 @@ describe("getActiveSessions", () => {
     expect(info?.activity).toBe("waiting");
   });
 
+  it("excludes a warm process nobody has prompted", () => {
+    const sessions = new Map<string, SessionProcessInfo>([
+      ["sid-1", { folder: "/repos/myproject", process: { exitCode: null }, turnInProgress: false, clientCount: 0, contextPct: null, warm: true }],
+    ]);
+    expect(getActiveSessions(sessions).size).toBe(0);
+  });
+
+  it("reports a warm session with clients attached as waiting", () => {
+    const sessions = new Map<string, SessionProcessInfo>([
+      ["sid-1", { folder: "/repos/myproject", process: { exitCode: null }, turnInProgress: false, clientCount: 1, contextPct: null, warm: true }],
+    ]);
+    expect(getActiveSessions(sessions).get("/repos/myproject")?.activity).toBe("waiting");
+  });
+
   it("handles mixed sessions correctly", () => {
     const sessions = new Map<string, SessionProcessInfo>([
       ["active-1", { folder: "/repos/a", process: { exitCode: null }, turnInProgress: true, clientCount: 1, contextPct: null }],
@@ -998,6 +1051,137 @@ describe("parseSessionJSONL with real JSONL fixture", () => {
   });
 });
 
+// --- Streaming JSONL replay ---
+
+describe("pushJSONLLine / endJSONLReplay", () => {
+  const user = (content: any) => JSON.stringify({ type: "user", message: { role: "user", content } });
+  const assistant = (id: string, content: any[], usage?: any) =>
+    JSON.stringify({ type: "assistant", message: { id, role: "assistant", content, ...(usage && { usage }) } });
+
+  it("passes user events straight through when no assistant message is open", () => {
+    const replay = createJSONLReplay();
+    expect(pushJSONLLine(replay, user("hello"))).toEqual([
+      { type: "user", message: { role: "user", content: "hello" } },
+    ]);
+    expect(pushJSONLLine(replay, "   ")).toEqual([]);
+    expect(pushJSONLLine(replay, "{not json")).toEqual([]);
+    expect(replay.skippedLines).toBe(1);
+  });
+
+  it("holds an assistant message and its tool results until the next message id", () => {
+    const replay = createJSONLReplay();
+    expect(pushJSONLLine(replay, assistant("msg_a", [{ type: "tool_use", id: "t1", name: "Bash", input: {} }]))).toEqual([]);
+    expect(pushJSONLLine(replay, user([{ type: "tool_result", tool_use_id: "t1", content: "ok" }]))).toEqual([]);
+    expect(pushJSONLLine(replay, assistant("msg_a", [{ type: "text", text: "done" }]))).toEqual([]);
+
+    const ready = pushJSONLLine(replay, assistant("msg_b", [{ type: "text", text: "next" }]));
+    expect(ready.map((e) => e.type)).toEqual(["assistant", "user"]);
+    expect((ready[0] as any).message.content.map((b: any) => b.type)).toEqual(["tool_use", "text"]);
+    expect(replay.pending).toHaveLength(1);
+  });
+
+  it("flushes the open message and appends the last usage at end of file", () => {
+    const replay = createJSONLReplay();
+    pushJSONLLine(replay, assistant("msg_a", [{ type: "text", text: "hi" }], { input_tokens: 7 }));
+    const tail = endJSONLReplay(replay);
+    expect(tail.map((e) => e.type)).toEqual(["assistant", "result"]);
+    expect(tail[1]).toEqual({ type: "result", subtype: "success", result: { usage: { input_tokens: 7 } } });
+    expect(replay.open).toBeNull();
+    expect(replay.pending).toEqual([]);
+  });
+
+  it.each(["session-history.jsonl", "pipeline-tool-execution.jsonl", "interleaved-tool-turn.jsonl"])(
+    "line-by-line replay of %s builds the same state as the whole-file parse",
+    (name) => {
+      const content = readFileSync(join(__dirname, "..", "fixtures", name), "utf-8");
+      const whole = new StateBuilder("s", "f");
+      whole.replayFromJSONL(parseSessionJSONL(content).events);
+
+      const streamed = new StateBuilder("s", "f");
+      const replay = createJSONLReplay();
+      for (const line of content.split("\n")) streamed.replayEvents(pushJSONLLine(replay, line));
+      streamed.replayEvents(endJSONLReplay(replay));
+
+      expect(streamed.getState()).toEqual(whole.getState());
+    },
+  );
+});
+
+describe("JSONL replay checkpoints", () => {
+  const user = (content: any) => JSON.stringify({ type: "user", message: { role: "user", content } });
+  const assistant = (id: string, content: any[]) =>
+    JSON.stringify({ type: "assistant", message: { id, role: "assistant", content } });
+
+  /** Byte offset past each line of a file starting at `start`. */
+  function lineEnds(lines: string[], start = 0): number[] {
+    let end = start;
+    return lines.map((line) => (end += Buffer.byteLength(line) + 1));
+  }
+
+  /** Push lines as if read from a file, returning the checkpoint after each. */
+  function checkpoints(lines: string[], start = 0): number[] {
+    const replay = createJSONLReplay(start);
+    const ends = lineEnds(lines, start);
+    return lines.map((line, i) => {
+      pushJSONLLine(replay, line, ends[i]);
+      return replay.checkpoint;
+    });
+  }
+
+  it("advances past lines whose events were all handed out", () => {
+    const lines = [user("a"), "{not json", "", user("é")];
+    expect(checkpoints(lines)).toEqual(lineEnds(lines));
+  });
+
+  it("stays at the first line of the held assistant message", () => {
+    const lines = [
+      user("hi"),
+      assistant("msg_a", [{ type: "tool_use", id: "t1", name: "Bash", input: {} }]),
+      user([{ type: "tool_result", tool_use_id: "t1", content: "ok" }]),
+      assistant("msg_a", [{ type: "text", text: "done" }]),
+      assistant("msg_b", [{ type: "text", text: "next" }]),
+    ];
+    const ends = lineEnds(lines, 100);
+    expect(checkpoints(lines, 100)).toEqual([ends[0], ends[0], ends[0], ends[0], ends[3]]);
+  });
+
+  it.each(["session-history.jsonl", "pipeline-tool-execution.jsonl", "interleaved-tool-turn.jsonl"])(
+    "resuming %s from a snapshot at any line builds the same state as a full replay",
+    (name) => {
+      const bytes = readFileSync(join(__dirname, "..", "fixtures", name));
+      const full = new StateBuilder("s", "f");
+      full.replayFromJSONL(parseSessionJSONL(bytes.toString("utf-8")).events);
+
+      /** Replay bytes[start..stop) with line offsets, like replaySessionJSONL. */
+      function replayRange(sb: StateBuilder, replay: ReturnType<typeof createJSONLReplay>, stop: number) {
+        let pos = replay.offset;
+        while (pos < stop) {
+          const nl = bytes.indexOf(0x0a, pos);
+          const end = nl === -1 ? bytes.length : nl + 1;
+          sb.replayEvents(pushJSONLLine(replay, bytes.toString("utf-8", pos, nl === -1 ? end : nl), end));
+          pos = end;
+        }
+      }
+
+      for (let cut = bytes.indexOf(0x0a) + 1; cut > 0; cut = bytes.indexOf(0x0a, cut) + 1) {
+        const first = new StateBuilder("s", "f");
+        const head = createJSONLReplay();
+        replayRange(first, head, cut);
+        const saved = JSON.parse(JSON.stringify({ offset: head.checkpoint, lastUsage: head.lastUsage, state: first.toSnapshot() }));
+
+        const resumed = new StateBuilder("s", "f");
+        resumed.restoreSnapshot(saved.state);
+        const tail = createJSONLReplay(saved.offset);
+        tail.lastUsage = saved.lastUsage;
+        replayRange(resumed, tail, bytes.length);
+        resumed.replayEvents(endJSONLReplay(tail));
+
+        expect(resumed.getState()).toEqual(full.getState());
+      }
+    },
+  );
+});
+
 // --- Conflation helpers ---
 
 describe("isStreamDelta", () => {
@@ -1926,6 +2110,121 @@ describe("shouldSendEvent", () => {
   });
 });
 
+// --- SSE framing ---
+
+describe("buildSSEFrame", () => {
+  it("frames a serialized payload as one SSE event", () => {
+    const frame = buildSSEFrame("text", JSON.stringify({ folder: "f", append: "hi" }));
+    expect(frame.toString("utf8")).toBe('event: text\ndata: {"folder":"f","append":"hi"}\n\n');
+  });
+
+  it("keeps payload newlines escaped on a single data line", () => {
+    const frame = buildSSEFrame("text", JSON.stringify({ append: "a\nb" })).toString("utf8");
+    expect(frame.split("\n").filter((l) => l.startsWith("data: "))).toHaveLength(1);
+  });
+
+  it("leads with the id line when given one", () => {
+    const data = { folder: "f", messages: [{ role: "user", content: "Guéridon ☕" }] };
+    const frame = buildSSEFrame("state", JSON.stringify(data), "ab12cd34-7").toString("utf8");
+    expect(frame).toBe(`id: ab12cd34-7\nevent: state\ndata: ${JSON.stringify(data)}\n\n`);
+  });
+});
+
+// --- Last-Event-ID replay ---
+
+describe("formatEventId / parseEventId", () => {
+  it("round-trips stream id and seq", () => {
+    expect(parseEventId(formatEventId("ab12cd34", 42))).toEqual({ streamId: "ab12cd34", seq: 42 });
+  });
+
+  it("splits on the last dash", () => {
+    expect(parseEventId("a-b-c-9")).toEqual({ streamId: "a-b-c", seq: 9 });
+  });
+
+  it("rejects missing, legacy and malformed ids", () => {
+    expect(parseEventId(undefined)).toBeNull();
+    expect(parseEventId("")).toBeNull();
+    expect(parseEventId("17")).toBeNull(); // pre-replay per-client counter
+    expect(parseEventId("-17")).toBeNull();
+    expect(parseEventId("ab12cd34-")).toBeNull();
+    expect(parseEventId("ab12cd34-x")).toBeNull();
+    expect(parseEventId("ab12cd34-1.5")).toBeNull();
+  });
+});
+
+describe("replay ring", () => {
+  function frame(seq: number, size = 10): { seq: number; event: string; frame: Buffer } {
+    return { seq, event: "text", frame: Buffer.alloc(size) };
+  }
+
+  it("returns the frames after the client's last seq", () => {
+    const ring = createReplayRing();
+    for (let i = 1; i <= 5; i++) pushReplayFrame(ring, frame(i));
+    expect(framesSince(ring, 3, 5)!.map((f) => f.seq)).toEqual([4, 5]);
+  });
+
+  it("returns nothing for a client that is caught up", () => {
+    const ring = createReplayRing();
+    pushReplayFrame(ring, frame(1));
+    expect(framesSince(ring, 1, 1)).toEqual([]);
+  });
+
+  it("handles a caught-up client on an empty stream", () => {
+    expect(framesSince(createReplayRing(), 0, 0)).toEqual([]);
+  });
+
+  it("falls back when the gap was evicted", () => {
+    const ring = createReplayRing();
+    for (let i = 1; i <= REPLAY_MAX_FRAMES + 10; i++) pushReplayFrame(ring, frame(i));
+    expect(ring.frames).toHaveLength(REPLAY_MAX_FRAMES);
+    expect(framesSince(ring, 5, REPLAY_MAX_FRAMES + 10)).toBeNull();
+    expect(framesSince(ring, 10, REPLAY_MAX_FRAMES + 10)).toHaveLength(REPLAY_MAX_FRAMES);
+  });
+
+  it("falls back for a seq from the future", () => {
+    const ring = createReplayRing();
+    pushReplayFrame(ring, frame(1));
+    expect(framesSince(ring, 9, 1)).toBeNull();
+  });
+
+  it("evicts by bytes but always keeps the newest frame", () => {
+    const ring = createReplayRing();
+    pushReplayFrame(ring, frame(1, REPLAY_MAX_BYTES / 2));
+    pushReplayFrame(ring, frame(2, REPLAY_MAX_BYTES / 2));
+    pushReplayFrame(ring, frame(3, REPLAY_MAX_BYTES * 2));
+    expect(ring.frames.map((f) => f.seq)).toEqual([3]);
+    expect(ring.bytes).toBe(REPLAY_MAX_BYTES * 2);
+  });
+});
+
+// --- Slow-client backpressure ---
+
+describe("backpressureAction", () => {
+  it("sends everything while the socket keeps up", () => {
+    for (const event of ["text", "current", "state", "ping", "ask_user"]) {
+      expect(backpressureAction(event, 0)).toBe("send");
+      expect(backpressureAction(event, SSE_DROP_BYTES - 1)).toBe("send");
+    }
+  });
+
+  it("drops text, current and ping past the drop threshold", () => {
+    expect(backpressureAction("text", SSE_DROP_BYTES)).toBe("drop");
+    expect(backpressureAction("current", SSE_DROP_BYTES)).toBe("drop");
+    expect(backpressureAction("ping", SSE_DROP_BYTES)).toBe("drop");
+  });
+
+  it("never drops snapshots or questions", () => {
+    expect(backpressureAction("state", SSE_DROP_BYTES * 2)).toBe("send");
+    expect(backpressureAction("ask_user", SSE_DROP_BYTES * 2)).toBe("send");
+    expect(backpressureAction("hello", SSE_DROP_BYTES * 2)).toBe("send");
+  });
+
+  it("disconnects past the hard limit regardless of event", () => {
+    expect(backpressureAction("state", SSE_DISCONNECT_BYTES)).toBe("disconnect");
+    expect(backpressureAction("text", SSE_DISCONNECT_BYTES + 1)).toBe("disconnect");
+  });
+});
+
 // -- isSubagentEvent (gdn-pimime) --
 
 describe("isSubagentEvent", () => {
@@ -2090,3 +2389,151 @@ describe("isSubagentEvent + StateBuilder integration", () => {
     expect(assistantMsg2?.content).toBe("fallback");
   });
 });
+
+// --- Warm spawn ---
+
+describe("parseWarmSpawnConfig", () => {
+  it("is disabled by default", () => {
+    const config = parseWarmSpawnConfig({});
+    expect(config.max).toBe(0);
+    expect(config.minFreeBytes).toBe(1024 * 1024 * 1024);
+    expect(config.idleMs).toBe(600_000);
+  });
+
+  it("reads limits from the environment", () => {
+    const config = parseWarmSpawnConfig({
+      WARM_SPAWN_MAX: "3",
+      WARM_SPAWN_MIN_FREE_MB: "512",
+      WARM_SPAWN_IDLE_MS: "60000",
+    });
+    expect(config).toEqual({ max: 3, minFreeBytes: 512 * 1024 * 1024, idleMs: 60_000 });
+  });
+
+  it("treats garbage as disabled", () => {
+    expect(parseWarmSpawnConfig({ WARM_SPAWN_MAX: "lots" }).max).toBe(0);
+  });
+});
+
+describe("decideWarmSpawn", () => {
+  const GB = 1024 * 1024 * 1024;
+  const config: WarmSpawnConfig = { max: 2, minFreeBytes: GB, idleMs: 600_000 };
+
+  it("does nothing when disabled", () => {
+    expect(decideWarmSpawn({ ...config, max: 0 }, [], 8 * GB)).toEqual({ warm: false, reason: "disabled" });
+  });
+
+  it("refuses when free memory is below the floor", () => {
+    expect(decideWarmSpawn(config, [], GB / 2)).toEqual({ warm: false, reason: "low-memory" });
+  });
+
+  it("warms without eviction under capacity", () => {
+    const warm = [{ folder: "/r/a", warmSince: 1000 }];
+    expect(decideWarmSpawn(config, warm, 8 * GB)).toEqual({ warm: true, evict: null });
+  });
+
+  it("evicts the least recently warmed process at capacity", () => {
+    const warm = [
+      { folder: "/r/a", warmSince: 3000 },
+      { folder: "/r/b", warmSince: 1000 },
+    ];
+    expect(decideWarmSpawn(config, warm, 8 * GB)).toEqual({ warm: true, evict: "/r/b" });
+  });
+
+  it("checks memory before evicting", () => {
+    const warm = [
+      { folder: "/r/a", warmSince: 3000 },
+      { folder: "/r/b", warmSince: 1000 },
+    ];
+    expect(decideWarmSpawn(config, warm, 0).warm).toBe(false);
+  });
+});
+
+describe("resumableAfter", () => {
+  const GB = 1024 * 1024 * 1024;
+  const config: WarmSpawnConfig = { max: 1, minFreeBytes: GB, idleMs: 600_000 };
+
+  it("stays fresh through a warm spawn that is evicted, then resumes after the prompt", () => {
+    // Fresh session warmed when a client opened it
+    let resumable = false;
+    expect(decideWarmSpawn(config, [], 8 * GB)).toEqual({ warm: true, evict: null });
+    resumable = resumableAfter(resumable, "spawn");
+    expect(resumable).toBe(false);
+
+    // Another folder opens at capacity and evicts it before any prompt
+    expect(decideWarmSpawn(config, [{ folder: "/r/a", warmSince: 1000 }], 8 * GB)).toEqual({ warm: true, evict: "/r/a" });
+
+    // The first real prompt respawns: no JSONL exists yet, so --session-id, not --resume
+    resumable = resumableAfter(resumable, "spawn");
+    const args = buildCCArgs("abc-123", resumable);
+    expect(args).not.toContain("--resume");
+    expect(args).toContain("--session-id");
+
+    // Once the prompt reaches CC, later spawns resume it
+    resumable = resumableAfter(resumable, "prompt");
+    expect(resumable).toBe(true);
+    expect(buildCCArgs("abc-123", resumable)).toContain("--resume");
+  });
+
+  it("keeps a resumed session resumable across spawns", () => {
+    expect(resumableAfter(true, "spawn")).toBe(true);
+  });
+});
+
+// --- Messages patches ---
+
+describe("diffMessages", () => {
+  const user: BBMessage = { role: "user", content: "hi" };
+  const call = { name: "Bash", status: "running" as const, input: "ls", output: null, collapsed: true };
+  const withTools: BBMessage = { role: "assistant", content: null, tool_calls: [call] };
+
+  it("emits nothing for identical records", () => {
+    expect(diffMessages([user, withTools], [user, withTools])).toEqual([]);
+  });
+
+  it("appends new messages", () => {
+    expect(diffMessages([user], [user, withTools])).toEqual([{ op: "set", i: 1, message: withTools }]);
+  });
+
+  it("patches only the tool calls that changed", () => {
+    const done = { ...call, status: "completed" as const, output: "a.txt" };
+    const next: BBMessage = { ...withTools, tool_calls: [{ ...call }, done] };
+    const prev: BBMessage = { ...withTools, tool_calls: [call, call] };
+    expect(diffMessages([user, prev], [user, next])).toEqual([{ op: "tool", i: 1, t: 1, call: done }]);
+  });
+
+  it("sends appended tool calls as tool ops", () => {
+    const next: BBMessage = { ...withTools, tool_calls: [call, { ...call, input: "pwd" }] };
+    expect(diffMessages([withTools], [next])).toEqual([{ op: "tool", i: 0, t: 1, call: next.tool_calls![1] }]);
+  });
+
+  it("replaces the whole message when other fields changed", () => {
+    const next: BBMessage = { ...withTools, content: "done", tool_calls: [{ ...call, status: "completed" }] };
+    expect(diffMessages([withTools], [next])).toEqual([{ op: "set", i: 0, message: next }]);
+  });
+});
+
+describe("messages patch round trip (StateBuilder → diffMessages → applyMessagesPatch)", () => {
+  it("a client patched after every event matches the server's messages", () => {
+    const content = readFileSync(join(__dirname, "..", "fixtures", "pipeline-tool-execution.jsonl"), "utf-8");
+    const sb = new StateBuilder("test-session", "test-project");
+    let sent = sb.getMessages();
+    let version = sb.messagesVersion;
+    let client: BBMessage[] = [];
+    let base = { stream: "s1", version };
+    let patches = 0;
+    for (const line of parseSessionJSONL(content).events) {
+      sb.handleEvent(JSON.parse(line).event);
+      if (sb.messagesVersion === version) continue;
+      const next = sb.getMessages();
+      const patch = { stream: "s1", from: version, to: sb.messagesVersion, length: next.length, ops: diffMessages(sent, next) };
+      client = applyMessagesPatch(client, base, patch);
+      expect(client).not.toBeNull();
+      expect(client).toEqual(next);
+      base = { stream: "s1", version: patch.to };
+      sent = next;
+      version = patch.to;
+      patches++;
+    }
+    expect(patches).toBeGreaterThan(2);
+  });
+});
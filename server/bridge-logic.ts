@@ -22,6 +22,7 @@ export function isSubagentEvent(event: Record<string, unknown>): boolean {
 
 import { resolve, join } from "node:path";
 import { homedir, hostname } from "node:os";
+import type { BBMessage, BBToolCall } from "./state-builder.js";
 
 // --- Configuration constants ---
 
@@ -400,6 +401,16 @@ export function validateFolderPath(
   return normalized.startsWith(scanRoot + "/");
 }
 
+const SESSION_ID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+/**
+ * Whether a client-supplied session ID is a CC session UUID. Session IDs name
+ * files (the CC JSONL, the replay cache snapshot), so anything else is rejected.
+ */
+export function isSessionId(id: unknown): id is string {
+  return typeof id === "string" && SESSION_ID_RE.test(id);
+}
+
 // --- CC argument construction ---
 
 /**
@@ -422,6 +433,63 @@ export function buildCCArgs(
   ];
 }
 
+// --- Warm spawn (pre-started CC processes) ---
+//
+// A CC process is bound to its session at spawn (--session-id / --resume), so
+// there is no generic pool to draw from: the warm unit is "this session's own
+// process, started when a client attaches instead of on the first prompt".
+// Opt-in via WARM_SPAWN_MAX; each idle CC holds a few hundred MB, so the count
+// is capped and warming stops when the host runs short of free memory.
+
+export interface WarmSpawnConfig {
+  /** Max warm (spawned, not yet prompted) processes at once. 0 disables. */
+  max: number;
+  /** Skip warming when os.freemem() is below this. */
+  minFreeBytes: number;
+  /** Kill a warm process nobody has prompted within this window. */
+  idleMs: number;
+}
+
+export function parseWarmSpawnConfig(env: Record<string, string | undefined>): WarmSpawnConfig {
+  return {
+    max: parseInt(env.WARM_SPAWN_MAX || "0", 10) || 0,
+    minFreeBytes: (parseInt(env.WARM_SPAWN_MIN_FREE_MB || "1024", 10) || 0) * 1024 * 1024,
+    idleMs: parseInt(env.WARM_SPAWN_IDLE_MS || "600000", 10) || 600_000,
+  };
+}
+
+export type WarmSpawnDecision =
+  | { warm: true; evict: string | null }
+  | { warm: false; reason: "disabled" | "low-memory" };
+
+/**
+ * Decide whether to pre-spawn CC for a session a client just attached to.
+ * `warm` lists the sessions currently holding an unprompted process (keyed by
+ * folder). At capacity the least recently warmed one is evicted — the folder
+ * the user just opened is the one most likely to get a prompt.
+ */
+export function decideWarmSpawn(
+  config: WarmSpawnConfig,
+  warm: Array<{ folder: string; warmSince: number }>,
+  freeBytes: number,
+): WarmSpawnDecision {
+  if (config.max <= 0) return { warm: false, reason: "disabled" };
+  if (freeBytes < config.minFreeBytes) return { warm: false, reason: "low-memory" };
+  if (warm.length < config.max) return { warm: true, evict: null };
+  const oldest = warm.reduce((a, b) => (b.warmSince < a.warmSince ? b : a));
+  return { warm: true, evict: oldest.folder };
+}
+
+/**
+ * Whether a session may be spawned with --resume after a lifecycle event.
+ * CC writes the session JSONL only once it has a prompt, so a spawn alone —
+ * notably a warm spawn evicted, idled out or exited before its first prompt —
+ * leaves nothing to resume.
+ */
+export function resumableAfter(resumable: boolean, event: "spawn" | "prompt"): boolean {
+  return resumable || event === "prompt";
+}
+
 // --- Session JSONL parsing ---
 
 /**
@@ -440,86 +508,126 @@ export function buildCCArgs(
  *
  * Appends a synthetic `result` event with the last assistant's usage data so the
  * adapter's `handleResult()` sets `_lastInputTokens` and the gauge works after replay.
+ *
+ * Whole-string form of the JSONLReplay reader below; session resume streams
+ * the file through the reader instead.
  */
 export function parseSessionJSONL(content: string): { events: string[]; skippedLines: number } {
-  const lines = content.split("\n");
-  let lastUsage: any = null;
-  let skippedLines = 0;
+  const replay = createJSONLReplay();
+  const events: Record<string, unknown>[] = [];
+  for (const line of content.split("\n")) {
+    for (const event of pushJSONLLine(replay, line)) events.push(event);
+  }
+  events.push(...endJSONLReplay(replay));
+  return {
+    events: events.map((event) => JSON.stringify({ source: "cc", event })),
+    skippedLines: replay.skippedLines,
+  };
+}
 
-  // Merge assistant messages by ID across the full JSONL — user events
-  // (tool_results) interleave freely and must not break the merge.
-  // We collect an ordered list of entries and deduplicate assistant IDs
-  // via a Map so the same ID always merges, regardless of interleaving.
+/**
+ * Incremental JSONL → CC event reader: feed lines, get events ready to replay.
+ *
+ * Assistant lines sharing a `message.id` are merged, with user events
+ * (tool_results) free to interleave between them — so everything from the
+ * first line of an assistant message is held back until a different assistant
+ * ID starts or the file ends. Memory is bounded by one assistant message and
+ * its tool results, not by the file. An ID that reappears after another one
+ * has started is not merged back (CC finishes a message before the next API
+ * call); StateBuilder drops the repeat.
+ *
+ * Callers reading a file pass each line's end offset so the reader can report
+ * `checkpoint`: the replay cache snapshots a StateBuilder there and later
+ * resumes reading from it.
+ */
+export interface JSONLReplay {
+  /** The assistant message still accepting merged lines. */
+  open: { id: string; message: any } | null;
+  /** Events from `open` onwards, in file order. */
+  pending: Record<string, unknown>[];
+  lastUsage: unknown;
+  skippedLines: number;
+  /** Byte offset just past the last line pushed. */
+  offset: number;
+  /** Offset of the first line not yet returned as events: everything before it
+   *  has been handed out, nothing after. Resume point for a snapshot taken now. */
+  checkpoint: number;
+}
 
-  type Entry = { type: "user" | "assistant"; msg: any; order: number };
-  const assistantById = new Map<string, Entry>();
-  const entries: Entry[] = [];
-  let order = 0;
+/** Start a reader, optionally at byte `start` of the file (after a snapshot). */
+export function createJSONLReplay(start = 0): JSONLReplay {
+  return { open: null, pending: [], lastUsage: null, skippedLines: 0, offset: start, checkpoint: start };
+}
 
-  for (const line of lines) {
-    const trimmed = line.trim();
-    if (!trimmed) continue;
+/** Consume one JSONL line ending at byte `end`; returns the events it made ready, in order. */
+export function pushJSONLLine(replay: JSONLReplay, line: string, end = replay.offset): Record<string, unknown>[] {
+  const open = replay.open;
+  const ready = readJSONLLine(replay, line);
+  if (!replay.open) replay.checkpoint = end; // nothing held back
+  else if (replay.open !== open) replay.checkpoint = replay.offset; // held from this line on
+  replay.offset = end;
+  return ready;
+}
 
-    let parsed: any;
-    try {
-      parsed = JSON.parse(trimmed);
-    } catch {
-      skippedLines++;
-      continue; // skip corrupted lines
-    }
+function readJSONLLine(replay: JSONLReplay, line: string): Record<string, unknown>[] {
+  const trimmed = line.trim();
+  if (!trimmed) return [];
 
-    if (parsed.type === "user") {
-      if (parsed.isMeta) continue;
-      const msg = parsed.message;
-      if (!msg) continue;
-      const entry: Entry = { type: "user", msg, order: order++ };
-      entries.push(entry);
-    } else if (parsed.type === "assistant") {
-      const msg = parsed.message;
-      if (!msg) continue;
-      // Skip synthetic messages (model:"<synthetic>", "No response requested.")
-      if (msg.model === "<synthetic>") continue;
-      if (msg.usage) lastUsage = msg.usage;
-
-      const msgId: string | undefined = msg.id;
-      if (msgId && assistantById.has(msgId)) {
-        // Merge content blocks into existing entry
-        const existing = assistantById.get(msgId)!;
-        existing.msg.content = [
-          ...(existing.msg.content || []),
-          ...(msg.content || []),
-        ];
-        if (msg.usage) existing.msg.usage = msg.usage;
-      } else if (msgId) {
-        // First occurrence — track by ID
-        const entry: Entry = { type: "assistant", msg: { ...msg }, order: order++ };
-        assistantById.set(msgId, entry);
-        entries.push(entry);
-      } else {
-        // No ID (defensive) — push immediately
-        const entry: Entry = { type: "assistant", msg: { ...msg }, order: order++ };
-        entries.push(entry);
-      }
-    }
-    // Skip queue-operation, progress, system, and anything else
+  let parsed: any;
+  try {
+    parsed = JSON.parse(trimmed);
+  } catch {
+    replay.skippedLines++;
+    return []; // skip corrupted lines
   }
 
-  // Serialize in insertion order (entries array already ordered)
-  const result: string[] = entries.map((e) =>
-    JSON.stringify({ source: "cc", event: { type: e.type, message: e.msg } }),
-  );
+  if (parsed.type === "user") {
+    if (parsed.isMeta || !parsed.message) return [];
+    const event = { type: "user", message: parsed.message };
+    if (!replay.open) return [event];
+    replay.pending.push(event);
+    return [];
+  }
 
-  // Append synthetic result event with last usage so gauge works after replay
-  if (lastUsage) {
-    result.push(
-      JSON.stringify({
-        source: "cc",
-        event: { type: "result", subtype: "success", result: { usage: lastUsage } },
-      }),
-    );
+  if (parsed.type !== "assistant") return []; // queue-operation, progress, system, ...
+  const msg = parsed.message;
+  if (!msg) return [];
+  // Skip synthetic messages (model:"<synthetic>", "No response requested.")
+  if (msg.model === "<synthetic>") return [];
+  if (msg.usage) replay.lastUsage = msg.usage;
+
+  const msgId: string | undefined = msg.id;
+  if (msgId && replay.open?.id === msgId) {
+    // Merge content blocks into the open entry
+    const existing = replay.open.message;
+    existing.content = [...(existing.content || []), ...(msg.content || [])];
+    if (msg.usage) existing.usage = msg.usage;
+    return [];
+  }
+  const event = { type: "assistant", message: { ...msg } };
+  if (!msgId) {
+    // No ID (defensive) — nothing to merge into it
+    if (!replay.open) return [event];
+    replay.pending.push(event);
+    return [];
   }
+  // A new ID closes the open message
+  const ready = replay.pending;
+  replay.open = { id: msgId, message: event.message };
+  replay.pending = [event];
+  return ready;
+}
 
-  return { events: result, skippedLines };
+/** End of file: flush held events and append the synthetic usage result. */
+export function endJSONLReplay(replay: JSONLReplay): Record<string, unknown>[] {
+  const ready = replay.pending;
+  replay.open = null;
+  replay.pending = [];
+  // Append synthetic result event with last usage so gauge works after replay
+  if (replay.lastUsage) {
+    ready.push({ type: "result", subtype: "success", result: { usage: replay.lastUsage } });
+  }
+  return ready;
 }
 
 // --- Active process map ---
@@ -531,6 +639,8 @@ export interface SessionProcessInfo {
   turnInProgress: boolean;
   clientCount: number;
   contextPct: number | null;
+  /** Warm-spawned process no prompt has reached yet (see maybeWarmSpawn). */
+  warm?: boolean;
 }
 
 /** Runtime session info for folder scanner. */
@@ -543,6 +653,7 @@ export interface ActiveSessionInfo {
 /**
  * Build a map of folder path → session info for folders with active sessions.
  * A session is active if it has a running CC process OR connected browser clients.
+ * A warm process doesn't count — nobody has prompted it, so the folder was only opened.
  * Used by scanFolders to mark active folders with activity state.
  */
 export function getActiveSessions(
@@ -550,7 +661,7 @@ export function getActiveSessions(
 ): Map<string, ActiveSessionInfo> {
   const active = new Map<string, ActiveSessionInfo>();
   for (const [id, session] of sessions) {
-    const hasProcess = session.process && session.process.exitCode === null;
+    const hasProcess = session.process && session.process.exitCode === null && !session.warm;
     if (hasProcess || session.clientCount > 0) {
       active.set(session.folder, {
         sessionId: id,
@@ -779,6 +890,174 @@ export function buildMergedDelta(pending: PendingDelta): Record<string, unknown>
   };
 }
 
+// -- SSE framing --
+
+/**
+ * Build a complete SSE frame from an already-serialized payload.
+ * broadcastToSession builds this once per event and writes the same Buffer to
+ * every client instead of re-serializing the payload per client. JSON.stringify
+ * never emits raw newlines, so the payload always fits on one data: line.
+ *
+ * Only session broadcasts carry an id (see formatEventId). Per-connection
+ * events (hello, folders, ping) go without one, so EventSource keeps the
+ * last session id as its Last-Event-ID across them.
+ */
+export function buildSSEFrame(event: string, json: string, id?: string): Buffer {
+  return Buffer.from(`${id ? `id: ${id}\n` : ""}event: ${event}\ndata: ${json}\n\n`, "utf8");
+}
+
+// -- Last-Event-ID replay --
+//
+// Each session numbers its broadcasts within a stream: a random id minted when
+// the bridge creates the Session object, so a recreated session or a restarted
+// bridge never matches an old Last-Event-ID. Recent frames are kept in a
+// bounded ring; a client reconnecting within the window is replayed exactly
+// what it missed instead of being sent a full state snapshot.
+
+export const REPLAY_MAX_FRAMES = 256;
+export const REPLAY_MAX_BYTES = 1024 * 1024;
+
+export function formatEventId(streamId: string, seq: number): string {
+  return `${streamId}-${seq}`;
+}
+
+export function parseEventId(raw: string | undefined): { streamId: string; seq: number } | null {
+  if (!raw) return null;
+  const dash = raw.lastIndexOf("-");
+  if (dash <= 0) return null;
+  const tail = raw.slice(dash + 1);
+  if (!/^\d+$/.test(tail)) return null;
+  return { streamId: raw.slice(0, dash), seq: Number(tail) };
+}
+
+export interface ReplayFrame {
+  seq: number;
+  event: string;
+  frame: Buffer;
+}
+
+export interface ReplayRing {
+  frames: ReplayFrame[];
+  bytes: number;
+}
+
+export function createReplayRing(): ReplayRing {
+  return { frames: [], bytes: 0 };
+}
+
+/** Append a frame, evicting the oldest past REPLAY_MAX_FRAMES / REPLAY_MAX_BYTES. */
+export function pushReplayFrame(ring: ReplayRing, entry: ReplayFrame): void {
+  ring.frames.push(entry);
+  ring.bytes += entry.frame.length;
+  while (
+    ring.frames.length > 1 &&
+    (ring.frames.length > REPLAY_MAX_FRAMES || ring.bytes > REPLAY_MAX_BYTES)
+  ) {
+    ring.bytes -= ring.frames.shift()!.frame.length;
+  }
+}
+
+/**
+ * Frames a client that last saw `seq` has missed, given the stream's latest
+ * seq `head`. Returns null when the gap can't be closed from the ring (evicted
+ * or from the future) — the caller falls back to a state snapshot.
+ */
+export function framesSince(ring: ReplayRing, seq: number, head: number): ReplayFrame[] | null {
+  if (seq > head) return null;
+  if (seq === head) return [];
+  const first = ring.frames[0];
+  if (!first || first.seq > seq + 1) return null;
+  return ring.frames.filter((f) => f.seq > seq);
+}
+
+// -- Messages patches --
+//
+// Broadcasts carry committed messages as a patch against the last broadcast
+// instead of the whole transcript. Ops are absolute — a whole message or a
+// whole tool call at an index — so a client holding any version from `from`
+// to `to` converges on `to`; that covers clients that attached between two
+// broadcasts. A client that holds something else (other stream, missed
+// patch) asks for a full snapshot. StateBuilder's records are frozen and
+// replaced on change, so unchanged messages are found by identity.
+
+export type MessageOp =
+  | { op: "set"; i: number; message: BBMessage }
+  | { op: "tool"; i: number; t: number; call: BBToolCall };
+
+export interface MessagesPatch {
+  stream: string;
+  from: number;
+  to: number;
+  length: number;
+  ops: MessageOp[];
+}
+
+function sameCall(a: BBToolCall, b: BBToolCall): boolean {
+  return a === b || (a.name === b.name && a.status === b.status && a.input === b.input
+    && a.output === b.output && a.collapsed === b.collapsed);
+}
+
+/** Indices of changed tool calls when only tool_calls differ (none removed), else null. */
+function changedToolCalls(a: BBMessage, b: BBMessage): number[] | null {
+  if (!a.tool_calls || !b.tool_calls || b.tool_calls.length < a.tool_calls.length) return null;
+  if (a.role !== b.role || a.content !== b.content || a.thinking !== b.thinking || a.synthetic !== b.synthetic) return null;
+  const changed: number[] = [];
+  for (let t = 0; t < b.tool_calls.length; t++) {
+    if (t >= a.tool_calls.length || !sameCall(a.tool_calls[t], b.tool_calls[t])) changed.push(t);
+  }
+  return changed;
+}
+
+/** Ops that turn `prev` into `next`. Messages are only appended or replaced. */
+export function diffMessages(prev: readonly BBMessage[], next: readonly BBMessage[]): MessageOp[] {
+  const ops: MessageOp[] = [];
+  for (let i = 0; i < next.length; i++) {
+    const a = prev[i];
+    const b = next[i];
+    if (a === b) continue;
+    const calls = a ? changedToolCalls(a, b) : null;
+    if (calls) {
+      for (const t of calls) ops.push({ op: "tool", i, t, call: b.tool_calls![t] });
+    } else {
+      ops.push({ op: "set", i, message: b });
+    }
+  }
+  return ops;
+}
+
+// -- Slow-client backpressure --
+
+/** Socket buffer at which a client stops getting droppable events. */
+export const SSE_DROP_BYTES = 256 * 1024;
+/** Socket buffer at which a client is disconnected (EventSource reconnects). */
+export const SSE_DISCONNECT_BYTES = 4 * 1024 * 1024;
+
+/**
+ * Events a slow client can skip without losing information for good: text
+ * appends and current overlays are superseded by the next state snapshot,
+ * pings by any other write.
+ */
+const DROPPABLE_EVENTS = new Set(["text", "current", "ping"]);
+
+/**
+ * Decide what to do with an SSE event for a client whose socket already holds
+ * `buffered` unsent bytes (res.writableLength). Without this, Node buffers
+ * unboundedly for a phone on a stalled link.
+ *
+ * Past SSE_DROP_BYTES droppable events are skipped. The caller must then
+ * suppress text for that client and resync it with a state snapshot once the
+ * socket drains, since appends after a gap can't be applied. Past
+ * SSE_DISCONNECT_BYTES the client is dropped outright.
+ */
+export function backpressureAction(
+  event: string,
+  buffered: number,
+): "send" | "drop" | "disconnect" {
+  if (buffered >= SSE_DISCONNECT_BYTES) return "disconnect";
+  if (buffered >= SSE_DROP_BYTES && DROPPABLE_EVENTS.has(event)) return "drop";
+  return "send";
+}
+
 // -- Mid-turn reconnect suppression --
 
 /**
@@ -451,7 +451,7 @@ describe("bridge HTTP smoke tests", () => {
     );
     expect(helloMatch).toBeTruthy();
     const helloData = JSON.parse(helloMatch![1]);
-    expect(helloData).toHaveProperty("version", 1);
+    expect(helloData).toHaveProperty("version", 2);
     expect(helloData).toHaveProperty("clientId");
     expect(helloData).toHaveProperty("pushToken");
     expect(typeof helloData.pushToken).toBe("string");
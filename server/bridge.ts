@@ -13,10 +13,10 @@ import { createServer, type IncomingMessage, type ServerResponse } from "node:ht
 import { spawn, execSync, type ChildProcess } from "node:child_process";
 import { createInterface } from "node:readline";
 import { readFileSync, writeFileSync, existsSync, mkdirSync, unlinkSync } from "node:fs";
-import { readFile, writeFile } from "node:fs/promises";
+import { writeFile } from "node:fs/promises";
 import { basename, dirname, join } from "node:path";
 import { fileURLToPath } from "node:url";
-import { homedir } from "node:os";
+import { freemem, homedir } from "node:os";
 import { randomUUID } from "node:crypto";
 
 import {
@@ -29,7 +29,10 @@ import {
   buildMergedDelta,
   extractLocalCommandOutput,
   validateFolderPath,
-  parseSessionJSONL,
+  isSessionId,
+  createJSONLReplay,
+  pushJSONLLine,
+  endJSONLReplay,
   getActiveSessions,
   resolveSessionForFolder,
   isHandoffStale,
@@ -46,6 +49,19 @@ import {
   type LastToolCall,
   STALE_SESSION_MS,
   isSubagentEvent,
+  parseWarmSpawnConfig,
+  decideWarmSpawn,
+  resumableAfter,
+  buildSSEFrame,
+  backpressureAction,
+  formatEventId,
+  parseEventId,
+  createReplayRing,
+  pushReplayFrame,
+  framesSince,
+  type ReplayRing,
+  diffMessages,
+  type MessagesPatch,
 } from "./bridge-logic.js";
 
 import {
@@ -56,10 +72,11 @@ import {
   writeExitMarker,
   getSessionJSONLPath,
   tailRead,
+  readLines,
   SCAN_ROOT,
 } from "./folders.js";
 
-import { StateBuilder, type StateSignal } from "./state-builder.js";
+import { StateBuilder, type StateSignal, type BBMessage } from "./state-builder.js";
 import { getVapidPublicKey, pushTurnComplete, pushAskUser, addSubscription, removeSubscription } from "./push.js";
 import { emit, errorDetail } from "./event-bus.js";
 import { initLogger } from "./logger.js";
@@ -67,6 +84,7 @@ import { initStatusBuffer, getRecent } from "./status-buffer.js";
 import { buildDepositNote, buildShareDepositNote } from "./upload.js";
 import { depositFiles } from "./deposit.js";
 import { cancelPendingPersist, persistSessions, persistSessionsSyncWithSnapshot, reapOrphans, type PriorSessionInfo } from "./orphan.js";
+import { loadReplaySnapshot, saveReplaySnapshot, REPLAY_CACHE_MIN_BYTES } from "./replay-cache.js";
 import { generateFolderName } from "./fun-names.js";
 import { getContentHash, startWatcher, stopWatcher } from "./content-hash.js";
 import { requestContext, generateRequestId } from "./request-context.js";
@@ -86,6 +104,16 @@ import { requestContext, generateRequestId } from "./request-context.js";
  * 4. Bridge sends: full state snapshot for that session
  * 5. Client is caught up — no gap, no replay needed
  *
+ * Fast path (Last-Event-ID replay):
+ * - Session broadcasts carry `id: <streamId>-<seq>`; the attach snapshot
+ *   carries the session's current position. Per-connection events have no id.
+ * - On reconnect, if Last-Event-ID falls within the session's replay ring,
+ *   the bridge re-attaches the client itself, sends hello with
+ *   `resumed: folderName`, then exactly the frames it missed. The client
+ *   keeps its state and skips steps 3–4.
+ * - Otherwise (ring evicted, bridge restarted, client was stale) the
+ *   snapshot path above applies unchanged.
+ *
  * Stale delta protection:
  * - Every broadcast event carries `session: folderName`
  * - Client MUST discard events where session !== current folder
@@ -100,13 +128,20 @@ import { requestContext, generateRequestId } from "./request-context.js";
 interface SSEClient {
   res: ServerResponse;
   folder: string | null; // null = lobby mode
-  eventSeq: number;      // monotonic event counter for Last-Event-ID
   pushToken: string;     // random token for authenticating push subscribe/unsubscribe (gdn-ricocu)
   suppressText: boolean; // true after mid-turn reconnect — snapshot is authoritative until turn ends
+  droppedEvents: number; // events skipped under backpressure
+  resyncPending: boolean; // dropped events; a state snapshot follows on drain
 }
 
 interface Session {
   id: string;
+  /** Names this Session object's broadcast stream in SSE ids (Last-Event-ID replay). */
+  streamId: string;
+  /** Seq of the latest broadcast in this stream. */
+  eventSeq: number;
+  /** Recent broadcast frames for Last-Event-ID replay. */
+  replay: ReplayRing;
   folder: string;
   folderName: string;
   stateBuilder: StateBuilder;
@@ -124,6 +159,9 @@ interface Session {
   flushTimer: ReturnType<typeof setTimeout> | null;
   graceTimer: ReturnType<typeof setTimeout> | null;
   initTimer: ReturnType<typeof setTimeout> | null;
+  /** Set while the process was pre-spawned and has not had a prompt yet (warm spawn). */
+  warmSince: number | null;
+  warmTimer: ReturnType<typeof setTimeout> | null;
   contextPct: number | null;
   turnStartedAt: number | null;
   /** True if an ask-user push was already sent this turn — suppresses turn-complete push. */
@@ -142,8 +180,10 @@ interface Session {
   subagentFilteredCount: number;
   /** Length of text last sent via new-protocol 'current' event — for computing text appends (gdn-kitere). */
   lastSentTextLength: number;
-  /** Last messagesVersion sent in a current event — skip messages[] when unchanged. */
+  /** Last messagesVersion broadcast (current or state) — skip messages[] when unchanged. */
   lastSentMessagesVersion: number;
+  /** The messages that broadcast carried — the base the next patch is diffed against. */
+  sentMessages: readonly BBMessage[] | null;
   /** SSE bytes sent this turn, keyed by event type — reported in turn:complete. */
   turnSSEBytes: Map<string, number>;
   /** Bytes saved by version-counter skip — counterfactual measurement. */
@@ -160,7 +200,15 @@ const validPushTokens = new Set<string>(); // gdn-ricocu: tokens issued to SSE c
 const PORT = parseInt(process.env.BRIDGE_PORT || "3001", 10);
 const GRACE_MS = parseInt(process.env.GRACE_MS || "300000", 10);
 const INIT_TIMEOUT_MS = 30_000;
+const WARM_SPAWN = parseWarmSpawnConfig(process.env);
 let clientErrorTimestamps: number[] = [];
+let sseDroppedEvents = 0;
+let sseSlowDisconnects = 0;
+let sseReplays = 0;
+
+/** Client state at disconnect, consumed on reconnect to decide whether replay is safe. */
+const closeHints = new Map<string, { suppressText: boolean; stale: boolean }>();
+const MAX_CLOSE_HINTS = 500;
 
 // -- Shutdown context (gdn-bokimo) --
 // Written during graceful shutdown so the next bridge can classify the restart.
@@ -190,18 +238,57 @@ loadShutdownContext();
 
 // -- SSE helpers --
 
-function sendSSE(client: SSEClient, event: string, data: unknown): boolean {
+function sendSSE(client: SSEClient, event: string, data: unknown, id?: string): boolean {
+  return writeFrame(client, event, buildSSEFrame(event, JSON.stringify(data), id));
+}
+
+/** The id marking "caught up to here" in a session's stream — sent with snapshots. */
+function streamPosition(session: Session): string {
+  return formatEventId(session.streamId, session.eventSeq);
+}
+
+/** Write a prebuilt frame — broadcasts share one Buffer across clients.
+ *  Slow clients get droppable events skipped, or are disconnected. */
+function writeFrame(client: SSEClient, event: string, frame: Buffer): boolean {
+  const { res } = client;
+  const action = backpressureAction(event, res.writableLength);
+  if (action === "disconnect") {
+    sseSlowDisconnects++;
+    emit({ type: "sse:slow-disconnect", folder: client.folder, bufferedBytes: res.writableLength, dropped: client.droppedEvents });
+    res.destroy(); // close handler detaches the client
+    return false;
+  }
+  if (action === "drop") {
+    client.droppedEvents++;
+    sseDroppedEvents++;
+    if (!client.resyncPending) {
+      // Text appends after a gap can't be applied — hold them until a snapshot
+      client.resyncPending = true;
+      client.suppressText = true;
+      emit({ type: "sse:slow-drop", folder: client.folder, bufferedBytes: res.writableLength });
+      res.once("drain", () => resyncClient(client));
+    }
+    return false;
+  }
   try {
-    client.eventSeq++;
-    return client.res.write(
-      `id: ${client.eventSeq}\nevent: ${event}\ndata: ${JSON.stringify(data)}\n\n`,
-    );
+    return res.write(frame);
   } catch {
     cleanupClient(client);
     return false;
   }
 }
 
+/** Catch a client up after backpressure drops: one snapshot replaces everything
+ *  it missed. Mid-turn, text stays suppressed until the turn-end state, exactly
+ *  as for a mid-turn reconnect. */
+function resyncClient(client: SSEClient): void {
+  client.resyncPending = false;
+  const session = client.folder ? sessions.get(client.folder) : undefined;
+  if (!session) return;
+  client.suppressText = session.turnInProgress;
+  sendSSE(client, "state", stateSnapshot(session), streamPosition(session));
+}
+
 function cleanupClient(client: SSEClient): void {
   allClients.delete(client);
   // Remove from clientsById (iterate — no reverse map)
@@ -216,14 +303,60 @@ function broadcastToSession(session: Session, event: string, data: unknown): voi
   const serialized = JSON.stringify(payload);
   const bytes = Buffer.byteLength(serialized, "utf8");
   session.turnSSEBytes.set(event, (session.turnSSEBytes.get(event) || 0) + bytes);
+  // One serialization and one frame Buffer per broadcast, shared by every client
+  const seq = ++session.eventSeq;
+  const frame = buildSSEFrame(event, serialized, formatEventId(session.streamId, seq));
+  pushReplayFrame(session.replay, { seq, event, frame });
   for (const client of session.clients) {
     const decision = shouldSendEvent(event, client.suppressText);
     if (decision.clearSuppression) client.suppressText = false;
     if (!decision.send) continue;
-    sendSSE(client, event, payload);
+    writeFrame(client, event, frame);
   }
 }
 
+// -- Messages patches --
+// Clients hold committed messages at a (stream, messagesVersion) base. Full
+// messages[] go only to one client at a time (attach, resync) or in a session's
+// first broadcast; every other broadcast carries a patch (see diffMessages).
+
+/** Where a client's messages stand after a full snapshot. */
+function messagesBase(session: Session): { stream: string; version: number } {
+  return { stream: session.streamId, version: session.stateBuilder.messagesVersion };
+}
+
+/** Full state for a single client — it resets that client's messages base. */
+function stateSnapshot(session: Session): Record<string, unknown> {
+  return { folder: session.folderName, ...session.stateBuilder.getState(), messagesBase: messagesBase(session) };
+}
+
+/** Committed messages for a broadcast: a patch against the previous broadcast,
+ *  or the full array if this is the session's first. */
+function messagesUpdate(session: Session): { messages: BBMessage[]; messagesBase: { stream: string; version: number } } | { patch: MessagesPatch } {
+  const sb = session.stateBuilder;
+  const messages = sb.getMessages();
+  const prev = session.sentMessages;
+  const from = session.lastSentMessagesVersion;
+  session.sentMessages = messages;
+  session.lastSentMessagesVersion = sb.messagesVersion;
+  if (!prev) return { messages, messagesBase: messagesBase(session) };
+  return {
+    patch: {
+      stream: session.streamId,
+      from,
+      to: sb.messagesVersion,
+      length: messages.length,
+      ops: diffMessages(prev, messages),
+    },
+  };
+}
+
+/** Broadcast state with messages[] sent as a patch. */
+function broadcastState(session: Session, extra: Record<string, unknown>): void {
+  const { messages: _, ...state } = session.stateBuilder.getState();
+  broadcastToSession(session, "state", { ...state, ...messagesUpdate(session), ...extra });
+}
+
 // -- SSE connection --
 
 function setupSSE(req: IncomingMessage, res: ServerResponse, clientId: string): SSEClient {
@@ -240,14 +373,47 @@ function setupSSE(req: IncomingMessage, res: ServerResponse, clientId: string):
   const reconnect = !!lastEventId;
 
   const pushToken = randomUUID().replace(/-/g, ""); // compact hex token (gdn-ricocu)
-  const client: SSEClient = { res, folder: null, eventSeq: 0, pushToken, suppressText: false };
+  const client: SSEClient = {
+    res, folder: null, pushToken, suppressText: false, droppedEvents: 0, resyncPending: false,
+  };
+  // The old connection may not have noticed its close yet — its live state is the best hint
+  const prev = clientsById.get(clientId);
+  const hint = prev?.folder
+    ? { suppressText: prev.suppressText, stale: prev.resyncPending }
+    : closeHints.get(clientId);
+  closeHints.delete(clientId);
   allClients.add(client);
   clientsById.set(clientId, client);
   validPushTokens.add(pushToken);
   emit({ type: "sse:connect", clientId });
 
+  // Replay what the client missed if its stream position is still in the ring.
+  // A client that was stale (backpressure drops) when it left needs the snapshot.
+  const position = parseEventId(lastEventId);
+  const session = position && !hint?.stale
+    ? [...sessions.values()].find((s) => s.streamId === position.streamId)
+    : undefined;
+  const missed = session ? framesSince(session.replay, position!.seq, session.eventSeq) : null;
+
   const vapidPublicKey = getVapidPublicKey();
-  sendSSE(client, "hello", { version: 1, contentHash: getContentHash(), clientId, reconnect, pushToken, ...(vapidPublicKey ? { vapidPublicKey } : {}) });
+  sendSSE(client, "hello", {
+    version: 2, contentHash: getContentHash(), clientId, reconnect, pushToken,
+    ...(vapidPublicKey ? { vapidPublicKey } : {}),
+    ...(session && missed ? { resumed: session.folderName } : {}),
+  });
+
+  if (session && missed) {
+    attachToSession(client, session);
+    // Continuity: the client keeps whatever suppression it had when it dropped
+    client.suppressText = hint?.suppressText ?? false;
+    for (const { event, frame } of missed) {
+      const decision = shouldSendEvent(event, client.suppressText);
+      if (decision.clearSuppression) client.suppressText = false;
+      if (decision.send) writeFrame(client, event, frame);
+    }
+    sseReplays++;
+    emit({ type: "sse:replay", clientId, folder: session.folderName, frames: missed.length });
+  }
 
   // Send folders asynchronously
   scanFolders(buildActiveSessionsMap()).then((folders) =>
@@ -256,6 +422,10 @@ function setupSSE(req: IncomingMessage, res: ServerResponse, clientId: string):
 
   res.on("close", () => {
     emit({ type: "sse:disconnect", clientId, folder: client.folder });
+    if (client.folder && clientsById.get(clientId) === client) {
+      closeHints.set(clientId, { suppressText: client.suppressText, stale: client.resyncPending });
+      if (closeHints.size > MAX_CLOSE_HINTS) closeHints.delete(closeHints.keys().next().value!);
+    }
     allClients.delete(client);
     clientsById.delete(clientId);
     validPushTokens.delete(client.pushToken);
@@ -331,6 +501,7 @@ function buildActiveSessionsMap(): Map<string, { sessionId: string; activity: "w
       turnInProgress: session.turnInProgress,
       clientCount: session.clients.size,
       contextPct: session.contextPct,
+      warm: session.warmSince !== null,
     });
   }
   return getActiveSessions(infos);
@@ -338,7 +509,7 @@ function buildActiveSessionsMap(): Map<string, { sessionId: string; activity: "w
 
 // -- CC process lifecycle --
 
-function spawnCC(session: Session): void {
+function spawnCC(session: Session, warm = false): void {
   // Billing mode: read .gueridon-billing from project folder.
   // "max" → claude.ai billing (enables Channels, 1M context).
   // "vertex" or absent → Vertex billing (ITV pays, 200k context cap).
@@ -387,7 +558,7 @@ function spawnCC(session: Session): void {
     env,
     cwd: session.folder,
   });
-  session.resumable = true;
+  session.resumable = resumableAfter(session.resumable, "spawn"); // a prompt makes it resumable
   session.spawnedAt = Date.now();
   session.lastPid = session.process.pid ?? null;
   session.stderrBuffer = [];
@@ -395,8 +566,25 @@ function spawnCC(session: Session): void {
   emit({ type: "session:spawn", folder: session.folderName, sessionId: session.id, pid: session.process.pid! });
   persistSessions(sessions.values());
 
-  // Init timeout: if CC doesn't emit an init event within 30s, kill it.
-  // This catches hung resumes (observed: 90s stall on third concurrent resume).
+  // A warm process sits idle until its first prompt, and CC only emits init
+  // once a prompt arrives — the init timer starts at hand-over instead.
+  if (warm) {
+    session.warmSince = Date.now();
+    session.warmTimer = setTimeout(() => {
+      session.warmTimer = null;
+      if (session.process && session.warmSince !== null) {
+        emit({ type: "warm:evict", folder: session.folderName, sessionId: session.id, reason: "idle" });
+        killWithEscalation(session.process, { folder: session.folderName, reason: "warm-idle" });
+      }
+    }, WARM_SPAWN.idleMs);
+    return;
+  }
+  startInitTimer(session);
+}
+
+/** Init timeout: if CC doesn't emit an init event within 30s, kill it.
+ *  This catches hung resumes (observed: 90s stall on third concurrent resume). */
+function startInitTimer(session: Session): void {
   session.initTimer = setTimeout(() => {
     session.initTimer = null;
     if (session.process) {
@@ -406,6 +594,38 @@ function spawnCC(session: Session): void {
   }, INIT_TIMEOUT_MS);
 }
 
+function clearWarm(session: Session): void {
+  if (session.warmTimer) { clearTimeout(session.warmTimer); session.warmTimer = null; }
+  session.warmSince = null;
+}
+
+/**
+ * Pre-spawn CC for a session a client just opened, so the first prompt skips
+ * the CLI cold start, MCP connections and init (opt-in: WARM_SPAWN_MAX).
+ * Bounded by count (oldest warm process evicted) and by host free memory.
+ */
+function maybeWarmSpawn(session: Session): void {
+  if (session.process || session.turnInProgress) return;
+  const warm = [...sessions.values()]
+    .filter((s) => s.process && s.warmSince !== null)
+    .map((s) => ({ folder: s.folder, warmSince: s.warmSince! }));
+  const free = freemem();
+  const decision = decideWarmSpawn(WARM_SPAWN, warm, free);
+  if (!decision.warm) {
+    if (decision.reason === "low-memory") {
+      emit({ type: "warm:skip", folder: session.folderName, reason: decision.reason, freeMb: Math.round(free / 1024 / 1024) });
+    }
+    return;
+  }
+  const victim = decision.evict ? sessions.get(decision.evict) : undefined;
+  if (victim?.process) {
+    emit({ type: "warm:evict", folder: victim.folderName, sessionId: victim.id, reason: "capacity" });
+    killWithEscalation(victim.process, { folder: victim.folderName, reason: "warm-evict" });
+  }
+  spawnCC(session, true);
+  emit({ type: "warm:spawn", folder: session.folderName, sessionId: session.id, pid: session.process!.pid! });
+}
+
 function wireProcess(session: Session): void {
   const proc = session.process!;
   const rl = createInterface({ input: proc.stdout! });
@@ -433,6 +653,8 @@ function wireProcess(session: Session): void {
   proc.on("exit", (code, signal) => {
     emit({ type: "session:exit", folder: session.folderName, sessionId: session.id, code, signal });
     if (session.initTimer) { clearTimeout(session.initTimer); session.initTimer = null; }
+    const wasWarm = session.warmSince !== null;
+    clearWarm(session);
     const wasMidTurn = session.turnInProgress;
     const killReason = session.killReason;
     session.killReason = undefined;
@@ -461,10 +683,8 @@ function wireProcess(session: Session): void {
               : "",
       });
     }
-    broadcastToSession(session, "state", {
-      ...session.stateBuilder.getState(),
-      processAlive: false,
-    });
+    // A warm process that never got a prompt changed nothing clients can see
+    if (!wasWarm) broadcastState(session, { processAlive: false });
     if (!isShuttingDown) persistSessions(sessions.values());
   });
 }
@@ -575,17 +795,15 @@ function emitSignal(session: Session, signal: StateSignal): void {
     }
     case "structure": {
       // Structural change — send streaming overlay + committed messages (if changed).
-      // Only include messages[] when the version has bumped since last send —
-      // saves ~95% of current-event bandwidth over cellular.
+      // Only include messages when the version has bumped since last send, and
+      // then as a patch — saves ~95% of current-event bandwidth over cellular.
       const current = session.stateBuilder.getCurrentMessage();
-      const payload: Record<string, unknown> = {};
-      const ver = session.stateBuilder.messagesVersion;
-      if (ver !== session.lastSentMessagesVersion) {
-        payload.messages = session.stateBuilder.getMessages();
-        session.lastSentMessagesVersion = ver;
+      let payload: Record<string, unknown> = {};
+      if (session.stateBuilder.messagesVersion !== session.lastSentMessagesVersion) {
+        payload = messagesUpdate(session);
       } else {
         // Counterfactual: how many bytes would messages[] have cost?
-        session.turnSkippedBytes += Buffer.byteLength(JSON.stringify(session.stateBuilder.getMessages()), "utf8");
+        session.turnSkippedBytes += session.stateBuilder.getMessagesBytes();
       }
       if (current) {
         Object.assign(payload, current);
@@ -641,11 +859,8 @@ async function onTurnComplete(session: Session): Promise<void> {
   }
   session.hadContentThisTurn = false;
 
-  // Broadcast full state snapshot
-  broadcastToSession(session, "state", {
-    ...session.stateBuilder.getState(),
-    processAlive: true,
-  });
+  // Broadcast turn-end state
+  broadcastState(session, { processAlive: true });
 
   // Emit turn metrics from state builder's internal counters
   const metrics = session.stateBuilder.getTurnMetrics();
@@ -684,6 +899,10 @@ function deliverPrompt(
 ): void {
   if (!session.process || session.process.exitCode !== null) {
     spawnCC(session);
+  } else if (session.warmSince !== null) {
+    emit({ type: "warm:handoff", folder: session.folderName, sessionId: session.id, warmMs: Date.now() - session.warmSince });
+    clearWarm(session);
+    startInitTimer(session);
   }
 
   // A prompt means someone is active — cancel any grace countdown
@@ -711,6 +930,7 @@ function deliverPrompt(
 
   try {
     session.process!.stdin!.write(envelope + "\n");
+    session.resumable = resumableAfter(session.resumable, "prompt");
     session.turnInProgress = true;
     session.turnStartedAt = Date.now();
     session.hadContentThisTurn = false;
@@ -771,6 +991,48 @@ async function resolveOrCreateSession(folderPath: string): Promise<Session> {
   }
 }
 
+/**
+ * Stream a session JSONL into a fresh StateBuilder. Lines are parsed and
+ * replayed as they're read, so resume never holds the whole file or its event
+ * list. Starts from the replay cache's snapshot when it still matches the file,
+ * and checkpoints a new one once enough has been replayed past it.
+ */
+async function replaySessionJSONL(
+  jsonlPath: string,
+  sessionId: string,
+  stateBuilder: StateBuilder,
+): Promise<{ eventCount: number; skippedLines: number; cachedBytes: number }> {
+  const cached = await loadReplaySnapshot(sessionId, jsonlPath);
+  const start = cached?.offset ?? 0;
+  const replay = createJSONLReplay(start);
+  if (cached) {
+    stateBuilder.restoreSnapshot(cached.state);
+    replay.lastUsage = cached.lastUsage;
+  }
+  let eventCount = 0;
+  const end = await readLines(jsonlPath, (line, lineEnd) => {
+    const events = pushJSONLLine(replay, line, lineEnd);
+    if (events.length === 0) return;
+    eventCount += events.length;
+    stateBuilder.replayEvents(events);
+  }, start);
+
+  // Checkpoint before the held-back tail is flushed: the state then covers
+  // exactly the bytes before replay.checkpoint. Skip it if that includes an
+  // unterminated last line — CC may still be writing it.
+  const checkpoint = replay.checkpoint;
+  const snapshot = checkpoint - start >= REPLAY_CACHE_MIN_BYTES && checkpoint <= end
+    ? { offset: checkpoint, lastUsage: replay.lastUsage, state: stateBuilder.toSnapshot() }
+    : null;
+
+  const tail = endJSONLReplay(replay);
+  eventCount += tail.length;
+  stateBuilder.replayEvents(tail);
+  // Off the resume path — the snapshot shares frozen records, nothing to copy
+  if (snapshot) saveReplaySnapshot(sessionId, jsonlPath, snapshot);
+  return { eventCount, skippedLines: replay.skippedLines, cachedBytes: start };
+}
+
 async function createSession(folderPath: string): Promise<Session> {
   const folderName = deriveFolderName(folderPath);
   const latestSession = await getLatestSession(folderPath);
@@ -800,6 +1062,9 @@ async function createSession(folderPath: string): Promise<Session> {
 
   const session: Session = {
     id: resolution.sessionId,
+    streamId: randomUUID().slice(0, 8),
+    eventSeq: 0,
+    replay: createReplayRing(),
     folder: folderPath,
     folderName,
     stateBuilder: new StateBuilder(resolution.sessionId, folderName),
@@ -817,6 +1082,8 @@ async function createSession(folderPath: string): Promise<Session> {
     flushTimer: null,
     graceTimer: null,
     initTimer: null,
+    warmSince: null,
+    warmTimer: null,
     contextPct: null,
     turnStartedAt: null,
     pushedAskThisTurn: false,
@@ -825,16 +1092,21 @@ async function createSession(folderPath: string): Promise<Session> {
     turnSkippedBytes: 0,
     lastSentTextLength: 0,
     lastSentMessagesVersion: -1,
+    sentMessages: null,
   };
 
   // Replay JSONL if resuming (async to avoid blocking on large files)
   if (resolution.resumable) {
     try {
       const jsonlPath = getSessionJSONLPath(folderPath, resolution.sessionId);
-      const content = await readFile(jsonlPath, "utf-8");
-      const { events, skippedLines } = parseSessionJSONL(content);
-      session.stateBuilder.replayFromJSONL(events);
-      emit({ type: "replay:ok", folder: folderName, eventCount: events.length, ...(skippedLines > 0 && { skippedLines }) });
+      const { eventCount, skippedLines, cachedBytes } = await replaySessionJSONL(jsonlPath, resolution.sessionId, session.stateBuilder);
+      emit({
+        type: "replay:ok",
+        folder: folderName,
+        eventCount,
+        ...(skippedLines > 0 && { skippedLines }),
+        ...(cachedBytes > 0 && { cachedBytes }),
+      });
 
       // Stash resume context for lazy injection on first prompt (gdn-jeliku).
       // CC won't spawn until the user actually sends something.
@@ -930,6 +1202,7 @@ async function tearDownSession(session: Session): Promise<void> {
   if (session.flushTimer) { clearTimeout(session.flushTimer); session.flushTimer = null; }
   if (session.graceTimer) { clearTimeout(session.graceTimer); session.graceTimer = null; }
   if (session.initTimer) { clearTimeout(session.initTimer); session.initTimer = null; }
+  clearWarm(session);
 
   if (session.process) {
     killWithEscalation(session.process, { folder: session.folderName, reason: "teardown" });
@@ -957,6 +1230,9 @@ async function createSessionWithId(
   const folderName = deriveFolderName(folderPath);
   const session: Session = {
     id: sessionId,
+    streamId: randomUUID().slice(0, 8),
+    eventSeq: 0,
+    replay: createReplayRing(),
     folder: folderPath,
     folderName,
     stateBuilder: new StateBuilder(sessionId, folderName),
@@ -974,6 +1250,8 @@ async function createSessionWithId(
     flushTimer: null,
     graceTimer: null,
     initTimer: null,
+    warmSince: null,
+    warmTimer: null,
     contextPct: null,
     turnStartedAt: null,
     pushedAskThisTurn: false,
@@ -982,15 +1260,21 @@ async function createSessionWithId(
     turnSkippedBytes: 0,
     lastSentTextLength: 0,
     lastSentMessagesVersion: -1,
+    sentMessages: null,
   };
 
   if (resumable) {
     try {
       const jsonlPath = getSessionJSONLPath(folderPath, sessionId);
-      const content = await readFile(jsonlPath, "utf-8");
-      const { events, skippedLines } = parseSessionJSONL(content);
-      session.stateBuilder.replayFromJSONL(events);
-      emit({ type: "replay:ok", folder: folderName, eventCount: events.length, ...(skippedLines > 0 && { skippedLines }), sessionId });
+      const { eventCount, skippedLines, cachedBytes } = await replaySessionJSONL(jsonlPath, sessionId, session.stateBuilder);
+      emit({
+        type: "replay:ok",
+        folder: folderName,
+        eventCount,
+        ...(skippedLines > 0 && { skippedLines }),
+        ...(cachedBytes > 0 && { cachedBytes }),
+        sessionId,
+      });
     } catch (err) {
       emit({ type: "replay:fail", folder: folderName, error: errorDetail(err), sessionId });
     }
@@ -1025,6 +1309,12 @@ async function handleSession(
   res: ServerResponse,
   requestedSessionId?: string,
 ): Promise<void> {
+  if (requestedSessionId && requestedSessionId !== "new" && !isSessionId(requestedSessionId)) {
+    emit({ type: "request:rejected", reason: "invalid-session-id", method: "POST", url: `/session/${folderPath.split("/").pop()}` });
+    res.writeHead(400).end(JSON.stringify({ error: "Invalid session ID" }));
+    return;
+  }
+
   // Detach from current session if switching
   if (client?.folder && client.folder !== folderPath) {
     detachFromSession(client);
@@ -1067,10 +1357,7 @@ async function handleSession(
   if (client) {
     attachToSession(client, session);
     // Send current state snapshot
-    sendSSE(client, "state", {
-      folder: session.folderName,
-      ...session.stateBuilder.getState(),
-    });
+    sendSSE(client, "state", stateSnapshot(session), streamPosition(session));
   }
 
   // Lazy spawn: CC starts on first prompt, not on session connect (gdn-jeliku).
@@ -1090,6 +1377,7 @@ async function handleSession(
       emit({ type: "session:auto-resume", folder: session.folderName, sessionId: session.id, reason, sessionAge });
     }
   }
+  if (client) maybeWarmSpawn(session);
 
   res.writeHead(200, { "Content-Type": "application/json" });
   res.end(JSON.stringify({
@@ -1207,8 +1495,7 @@ async function handleExit(folderPath: string, res: ServerResponse): Promise<void
   }
 
   // Notify clients — sessionEnded distinguishes deliberate exit from crash/kill
-  broadcastToSession(session, "state", {
-    ...session.stateBuilder.getState(),
+  broadcastState(session, {
     status: "idle",
     processAlive: false,
     sessionEnded: true,
@@ -1279,10 +1566,7 @@ async function handleUpload(req: IncomingMessage, res: ServerResponse, folderPat
       }
 
       // Broadcast state so the deposit message renders immediately
-      broadcastToSession(session, "state", {
-        ...session.stateBuilder.getState(),
-        processAlive: true,
-      });
+      broadcastState(session, { processAlive: true });
     }
 
     emit({ type: "upload:deposited", folder: depositFolder, files: manifest.file_count });
@@ -1478,7 +1762,10 @@ const server = createServer((req, res) => {
       uptimeMs: s.spawnedAt ? now - s.spawnedAt : null,
       contextPct: s.contextPct,
       turnInProgress: s.turnInProgress,
+      warm: s.warmSince !== null,
       clients: s.clients.size,
+      clientBufferedBytes: [...s.clients].map((c) => c.res.writableLength),
+      clientDroppedEvents: [...s.clients].map((c) => c.droppedEvents),
       stderrBuffer: s.stderrBuffer,
     }));
     const mem = process.memoryUsage();
@@ -1488,6 +1775,8 @@ const server = createServer((req, res) => {
       memory: { rss: mem.rss, heapUsed: mem.heapUsed, heapTotal: mem.heapTotal },
       sessions: sessionList,
       sseClients: allClients.size,
+      sseBackpressure: { droppedEvents: sseDroppedEvents, slowDisconnects: sseSlowDisconnects },
+      sseReplays,
       recentEvents: getRecent(50),
     }));
     return;
@@ -1708,6 +1997,7 @@ function shutdown(signal: string): void {
     if (session.flushTimer) clearTimeout(session.flushTimer);
     if (session.graceTimer) clearTimeout(session.graceTimer);
     if (session.initTimer) clearTimeout(session.initTimer);
+    if (session.warmTimer) clearTimeout(session.warmTimer);
     if (session.process) {
       emit({ type: "process:kill", folder: session.folderName, pid: session.process.pid!, reason: "shutdown" });
       killWithEscalation(session.process, { folder: session.folderName, reason: "shutdown" });
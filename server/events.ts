@@ -27,6 +27,9 @@ export type BridgeEvent =
   // SSE client lifecycle
   | { type: "sse:connect"; clientId: string }
   | { type: "sse:disconnect"; clientId: string; folder: string | null }
+  | { type: "sse:replay"; clientId: string; folder: string; frames: number }
+  | { type: "sse:slow-drop"; folder: string | null; bufferedBytes: number }
+  | { type: "sse:slow-disconnect"; folder: string | null; bufferedBytes: number; dropped: number }
 
   // Grace timer
   | { type: "grace:start"; folder: string; sessionId: string; graceMs: number }
@@ -34,6 +37,12 @@ export type BridgeEvent =
   | { type: "grace:skip"; folder: string; reason: string; ageMs: number }
   | { type: "grace:cancel"; folder: string; sessionId: string; reason: "client-reconnect" | "prompt-arrived" }
 
+  // Warm spawn (pre-started CC awaiting its first prompt)
+  | { type: "warm:spawn"; folder: string; sessionId: string; pid: number }
+  | { type: "warm:handoff"; folder: string; sessionId: string; warmMs: number }
+  | { type: "warm:evict"; folder: string; sessionId: string; reason: "capacity" | "idle" }
+  | { type: "warm:skip"; folder: string; reason: "low-memory"; freeMb: number }
+
   // Prompt delivery
   | { type: "prompt:deliver"; folder: string; sessionId: string }
 
@@ -62,8 +71,10 @@ export type BridgeEvent =
   | { type: "handoff:stale"; folder: string; sessionId: string }
 
   // JSONL replay
-  | { type: "replay:ok"; folder: string; eventCount: number; skippedLines?: number; sessionId?: string }
+  | { type: "replay:ok"; folder: string; eventCount: number; skippedLines?: number; cachedBytes?: number; sessionId?: string }
   | { type: "replay:fail"; folder: string; error: string; sessionId?: string }
+  | { type: "replay:cache-save"; sessionId: string; offset: number }
+  | { type: "replay:cache-fail"; sessionId: string; error: string }
 
   // Push notifications
   | { type: "push:init"; status: "configured" | "disabled" | "error"; detail?: string }
@@ -116,10 +127,17 @@ const LEVEL_MAP: Record<BridgeEvent["type"], LogLevel> = {
   "turn:complete": "info",
   "sse:connect": "info",
   "sse:disconnect": "info",
+  "sse:replay": "info",
+  "sse:slow-drop": "warn",
+  "sse:slow-disconnect": "warn",
   "grace:start": "info",
   "grace:expire": "info",
   "grace:skip": "debug",
   "grace:cancel": "info",
+  "warm:spawn": "info",
+  "warm:handoff": "info",
+  "warm:evict": "info",
+  "warm:skip": "debug",
   "prompt:deliver": "info",
   "init:timeout": "error",
   "process:kill": "warn",
@@ -139,6 +157,8 @@ const LEVEL_MAP: Record<BridgeEvent["type"], LogLevel> = {
   "handoff:stale": "info",
   "replay:ok": "info",
   "replay:fail": "warn",
+  "replay:cache-save": "debug",
+  "replay:cache-fail": "warn",
   "push:init": "info",
   "push:subscriptions-loaded": "debug",
   "push:subscriptions-load-error": "warn",
@@ -10,14 +10,16 @@ vi.mock("node:fs/promises", () => ({
   readFile: vi.fn(),
   access: vi.fn(),
   writeFile: vi.fn(),
+  open: vi.fn(),
 }));
 
-import { readdir, stat, readFile, access } from "node:fs/promises";
+import { readdir, stat, readFile, access, open } from "node:fs/promises";
 import {
   encodePath,
   getLatestSession,
   getLatestHandoff,
   getSessionJSONLPath,
+  readLines,
   scanFolders,
 } from "./folders.js";
 
@@ -71,6 +73,19 @@ function wireVfs() {
   (access as unknown as Mock).mockImplementation(async (p: string) => {
     if (!vfs.has(p)) throw enoent();
   });
+  (open as unknown as Mock).mockImplementation(async (p: string) => {
+    const entry = vfs.get(p);
+    if (!entry || entry.type !== "file") throw enoent();
+    const bytes = Buffer.from(entry.content, "utf-8");
+    return {
+      read: async (buf: Buffer, offset: number, length: number, position: number) => {
+        const bytesRead = Math.max(0, Math.min(length, bytes.length - position));
+        bytes.copy(buf, offset, position, position + bytesRead);
+        return { bytesRead, buffer: buf };
+      },
+      close: async () => {},
+    };
+  });
 }
 
 function makeHandoff(sessionId: string, purpose: string): string {
@@ -595,3 +610,58 @@ describe("scanFolders", () => {
     expect(result[0].state).toBe("fresh");
   });
 });
+
+// --- readLines ---
+
+describe("readLines", () => {
+  const FILE = "/test-home/session.jsonl";
+
+  async function lines(content: string, start = 0): Promise<{ lines: string[]; ends: number[]; end: number }> {
+    addFile(FILE, { content });
+    const out: string[] = [];
+    const ends: number[] = [];
+    const end = await readLines(FILE, (line, lineEnd) => {
+      out.push(line);
+      ends.push(lineEnd);
+    }, start);
+    return { lines: out, ends, end };
+  }
+
+  it("splits on newlines, passing each line's end offset", async () => {
+    const { lines: got, ends, end } = await lines("a\nbb\n\nccc\n");
+    expect(got).toEqual(["a", "bb", "", "ccc"]);
+    expect(ends).toEqual([2, 5, 6, 10]);
+    expect(end).toBe(10);
+  });
+
+  it("delivers an unterminated last line but doesn't count it in the offset", async () => {
+    const { lines: got, ends, end } = await lines("a\npartial");
+    expect(got).toEqual(["a", "partial"]);
+    expect(ends).toEqual([2, 9]);
+    expect(end).toBe(2);
+  });
+
+  it("starts at a byte offset", async () => {
+    const { lines: got, end } = await lines("a\nbb\nccc\n", 2);
+    expect(got).toEqual(["bb", "ccc"]);
+    expect(end).toBe(9);
+  });
+
+  it("returns start for an empty tail", async () => {
+    expect(await lines("a\n", 2)).toEqual({ lines: [], ends: [], end: 2 });
+  });
+
+  it("reassembles lines and multi-byte characters split across read chunks", async () => {
+    // 256KB chunks: one line spans several, and a 2-byte char straddles a boundary
+    const long = "x".repeat(600 * 1024);
+    const straddle = "y".repeat(256 * 1024 - long.length % (256 * 1024) - 2) + "é" + "z";
+    const content = `${long}\n${straddle}\nlast\n`;
+    const { lines: got, end } = await lines(content);
+    expect(got).toEqual([long, straddle, "last"]);
+    expect(end).toBe(Buffer.byteLength(content, "utf-8"));
+  });
+
+  it("throws for a missing file", async () => {
+    await expect(readLines("/test-home/nope.jsonl", () => {})).rejects.toThrow("ENOENT");
+  });
+});
@@ -30,6 +30,56 @@ export async function tailRead(filePath: string, bytes = 8192): Promise<string |
   }
 }
 
+const READ_CHUNK_BYTES = 256 * 1024;
+const NEWLINE = 0x0a;
+
+/**
+ * Stream a file line by line from byte `start` without holding it in memory:
+ * one read chunk plus the line being assembled. Lines are split on raw bytes
+ * (a newline byte never occurs inside a multi-byte UTF-8 sequence) and decoded
+ * one at a time, with the offset just past the line. A last line without a
+ * trailing newline is passed to `onLine` too. Returns the offset just past the
+ * last newline — where a later read of lines appended since should start.
+ */
+export async function readLines(
+  filePath: string,
+  onLine: (line: string, end: number) => void,
+  start = 0,
+): Promise<number> {
+  const fh = await fsOpen(filePath, "r");
+  try {
+    const chunk = Buffer.allocUnsafe(READ_CHUNK_BYTES);
+    let carry: Buffer | null = null; // partial line from previous chunks
+    let pos = start;
+    let end = start;
+    for (;;) {
+      const { bytesRead } = await fh.read(chunk, 0, chunk.length, pos);
+      if (bytesRead === 0) break;
+      pos += bytesRead;
+      let from = 0;
+      let nl = chunk.indexOf(NEWLINE, 0);
+      while (nl !== -1 && nl < bytesRead) {
+        const line = carry
+          ? Buffer.concat([carry, chunk.subarray(0, nl)]).toString("utf-8")
+          : chunk.toString("utf-8", from, nl);
+        carry = null;
+        from = nl + 1;
+        end = pos - bytesRead + from;
+        onLine(line, end);
+        nl = chunk.indexOf(NEWLINE, from);
+      }
+      if (from < bytesRead) {
+        const rest = Buffer.from(chunk.subarray(from, bytesRead));
+        carry = carry ? Buffer.concat([carry, rest]) : rest;
+      }
+    }
+    if (carry) onLine(carry.toString("utf-8"), pos);
+    return end;
+  } finally {
+    await fh.close();
+  }
+}
+
 // --- Types ---
 
 export type FolderState = "active" | "paused" | "closed" | "fresh";
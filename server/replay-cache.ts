@@ -0,0 +1,125 @@
+/**
+ * Replay snapshot cache for the Guéridon bridge.
+ *
+ * Resuming a session replays its CC JSONL through a StateBuilder, which for
+ * long histories dominates bridge startup and session switches. After a
+ * replay the bridge checkpoints the StateBuilder together with the JSONL byte
+ * offset it covers; the next resume of that session restores the snapshot and
+ * replays only the lines appended since.
+ *
+ * One file per session under ~/.config/gueridon/replay/. A snapshot is only
+ * trusted while the JSONL still extends it: no shorter than when it was taken,
+ * same bytes just before the offset. Anything else — missing, corrupt, older
+ * format, rewritten file — means a full replay.
+ */
+
+import { mkdir, open as fsOpen, readdir, readFile, rename, stat, unlink, writeFile } from "node:fs/promises";
+import { join } from "node:path";
+import { homedir } from "node:os";
+
+import { isSessionId } from "./bridge-logic.js";
+import type { StateBuilderSnapshot } from "./state-builder.js";
+import { emit, errorDetail } from "./event-bus.js";
+
+export const REPLAY_CACHE_DIR = join(homedir(), ".config", "gueridon", "replay");
+
+/** Bump when StateBuilder or the JSONL reader changes what a replay builds. */
+export const REPLAY_CACHE_VERSION = 1;
+
+/** Snapshot only when at least this much JSONL was replayed past the last one. */
+export const REPLAY_CACHE_MIN_BYTES = 512 * 1024;
+
+const REPLAY_CACHE_MAX_FILES = 50;
+const ANCHOR_BYTES = 256;
+
+export interface ReplaySnapshot {
+  version: number;
+  sessionId: string;
+  /** JSONL byte offset the state covers — replay resumes reading here. */
+  offset: number;
+  /** JSONL size when the snapshot was written. */
+  size: number;
+  /** Base64 of the bytes just before `offset`, to notice a rewritten file. */
+  anchor: string;
+  /** Last assistant usage seen, for the synthetic result at end of replay. */
+  lastUsage: unknown;
+  state: StateBuilderSnapshot;
+}
+
+function snapshotPath(sessionId: string): string {
+  return join(REPLAY_CACHE_DIR, `${sessionId}.json`);
+}
+
+async function readAnchor(jsonlPath: string, offset: number): Promise<string> {
+  const fh = await fsOpen(jsonlPath, "r");
+  try {
+    const start = Math.max(0, offset - ANCHOR_BYTES);
+    const buf = Buffer.alloc(offset - start);
+    const { bytesRead } = await fh.read(buf, 0, buf.length, start);
+    return buf.subarray(0, bytesRead).toString("base64");
+  } finally {
+    await fh.close();
+  }
+}
+
+/** The cached snapshot for a session, or null if there is none it can resume from. */
+export async function loadReplaySnapshot(sessionId: string, jsonlPath: string): Promise<ReplaySnapshot | null> {
+  if (!isSessionId(sessionId)) return null; // the id names the cache file
+  let snap: ReplaySnapshot;
+  try {
+    snap = JSON.parse(await readFile(snapshotPath(sessionId), "utf-8"));
+  } catch {
+    return null; // no snapshot yet, or unreadable — replay from scratch
+  }
+  if (snap?.version !== REPLAY_CACHE_VERSION || snap.sessionId !== sessionId) return null;
+  try {
+    if ((await stat(jsonlPath)).size < snap.size) return null;
+    if ((await readAnchor(jsonlPath, snap.offset)) !== snap.anchor) return null;
+  } catch {
+    return null;
+  }
+  return snap;
+}
+
+/**
+ * Write a session's snapshot (temp file + rename, so a reader never sees half
+ * of one), then prune the cache to the most recently written files.
+ * Best effort: failures are logged, never thrown.
+ */
+export async function saveReplaySnapshot(
+  sessionId: string,
+  jsonlPath: string,
+  snap: Pick<ReplaySnapshot, "offset" | "lastUsage" | "state">,
+): Promise<void> {
+  if (!isSessionId(sessionId)) return;
+  try {
+    const record: ReplaySnapshot = {
+      version: REPLAY_CACHE_VERSION,
+      sessionId,
+      offset: snap.offset,
+      size: (await stat(jsonlPath)).size,
+      anchor: await readAnchor(jsonlPath, snap.offset),
+      lastUsage: snap.lastUsage,
+      state: snap.state,
+    };
+    await mkdir(REPLAY_CACHE_DIR, { recursive: true });
+    const file = snapshotPath(sessionId);
+    await writeFile(`${file}.tmp`, JSON.stringify(record), "utf-8");
+    await rename(`${file}.tmp`, file);
+    emit({ type: "replay:cache-save", sessionId, offset: snap.offset });
+    await pruneReplayCache();
+  } catch (err) {
+    emit({ type: "replay:cache-fail", sessionId, error: errorDetail(err) });
+  }
+}
+
+async function pruneReplayCache(): Promise<void> {
+  const names = (await readdir(REPLAY_CACHE_DIR)).filter((n) => n.endsWith(".json"));
+  if (names.length <= REPLAY_CACHE_MAX_FILES) return;
+  const files = await Promise.all(names.map(async (n) => {
+    const path = join(REPLAY_CACHE_DIR, n);
+    return { path, mtime: (await stat(path)).mtimeMs };
+  }));
+  files.sort((a, b) => b.mtime - a.mtime);
+  for (const { path } of files.slice(REPLAY_CACHE_MAX_FILES)) await unlink(path).catch(() => {});
+}
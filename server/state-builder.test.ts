@@ -2358,4 +2358,125 @@ describe("StateBuilder", () => {
 
     // "matches handleEventSignal output" test removed — deriveSignal is gone.
   });
+
+  describe("frozen snapshots", () => {
+    function toolTurn(sb: StateBuilder, id: string): void {
+      sb.handleEvent(systemInit());
+      sb.handleEvent(messageStart());
+      sb.handleEvent(toolBlockStart(0, "Bash", `toolu_${id}`));
+      sb.handleEvent(inputJsonDelta(0, '{"command":"ls"}'));
+      sb.handleEvent(assistantMessage(`msg_${id}`, [{ type: "tool_use", id: `toolu_${id}`, name: "Bash", input: { command: "ls" } }]));
+      sb.handleEvent(blockStop(0));
+      sb.handleEvent(toolResult(`toolu_${id}`, "file.txt"));
+      sb.handleEvent(resultEvent());
+    }
+
+    it("returns frozen state and reuses the messages array until a mutation", () => {
+      const sb = makeBuilder();
+      toolTurn(sb, "a");
+      const s1 = sb.getState();
+      expect(Object.isFrozen(s1)).toBe(true);
+      expect(Object.isFrozen(s1.messages)).toBe(true);
+      expect(Object.isFrozen(s1.messages[0])).toBe(true);
+      expect(Object.isFrozen(s1.messages[0].tool_calls![0])).toBe(true);
+      expect(sb.getState().messages).toBe(s1.messages);
+      expect(sb.getMessages()).toBe(s1.messages);
+    });
+
+    it("shares unchanged records across versions and leaves old snapshots intact", () => {
+      const sb = makeBuilder();
+      toolTurn(sb, "a");
+      const before = sb.getMessages();
+      toolTurn(sb, "b");
+      const after = sb.getMessages();
+      expect(after).not.toBe(before);
+      expect(after[0]).toBe(before[0]);
+      expect(before).toHaveLength(1);
+      expect(after).toHaveLength(2);
+    });
+
+    it("tool result replaces the record instead of patching a shared one", () => {
+      const sb = makeBuilder();
+      sb.handleEvent(systemInit());
+      sb.handleEvent(messageStart());
+      sb.handleEvent(toolBlockStart(0, "Bash", "toolu_1"));
+      sb.handleEvent(inputJsonDelta(0, '{"command":"ls"}'));
+      sb.handleEvent(blockStop(0));
+      sb.handleEvent(assistantMessage("msg_1", [{ type: "tool_use", id: "toolu_1", name: "Bash", input: { command: "ls" } }]));
+      const running = sb.getMessages();
+      sb.handleEvent(toolResult("toolu_1", "file.txt"));
+      expect(running[0].tool_calls![0].status).toBe("running");
+      expect(sb.getMessages()[0].tool_calls![0]).toMatchObject({ status: "completed", output: "file.txt" });
+    });
+
+    it("keeps a tool result when a later content_block_stop re-commits the calls", () => {
+      const sb = makeBuilder();
+      sb.handleEvent(systemInit());
+      sb.handleEvent(messageStart());
+      sb.handleEvent(toolBlockStart(0, "Bash", "toolu_1"));
+      sb.handleEvent(assistantMessage("msg_1", [{ type: "tool_use", id: "toolu_1", name: "Bash", input: { command: "ls" } }]));
+      sb.handleEvent(toolResult("toolu_1", "file.txt"));
+      sb.handleEvent(inputJsonDelta(0, '{"command":"ls"}'));
+      sb.handleEvent(blockStop(0));
+      expect(sb.getMessages()[0].tool_calls![0]).toMatchObject({ input: "ls", status: "completed", output: "file.txt" });
+    });
+  });
+
+  describe("getMessagesBytes", () => {
+    const bytes = (sb: StateBuilder) => Buffer.byteLength(JSON.stringify(sb.getMessages()), "utf8");
+
+    it("matches the serialized size of messages[] through pushes and patches", () => {
+      const sb = makeBuilder();
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+      sb.handleEvent({ type: "user", message: { role: "user", content: "héllo — ünïcode ✓" } });
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+      sb.handleEvent(systemInit());
+      sb.handleEvent(messageStart());
+      sb.handleEvent(toolBlockStart(0, "Bash", "toolu_1"));
+      sb.handleEvent(assistantMessage("msg_1", [{ type: "tool_use", id: "toolu_1", name: "Bash", input: { command: "ls" } }]));
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+      sb.handleEvent(inputJsonDelta(0, '{"command":"ls -la"}'));
+      sb.handleEvent(blockStop(0));
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+      sb.handleEvent(toolResult("toolu_1", "a\nb\n\"quoted\""));
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+      sb.handleEvent(resultEvent({ is_error: true, result: "exit 1" }));
+      expect(sb.getMessagesBytes()).toBe(bytes(sb));
+    });
+  });
+
+  describe("replay snapshots", () => {
+    const toolUse = (id: string) => ({ type: "tool_use", id, name: "Bash", input: { command: "ls" } });
+
+    /** Replay into one builder, then snapshot through JSON into a fresh one. */
+    function resumed(events: Record<string, unknown>[]): { original: StateBuilder; restored: StateBuilder } {
+      const original = makeBuilder();
+      original.replayEvents(events);
+      const restored = makeBuilder();
+      restored.restoreSnapshot(JSON.parse(JSON.stringify(original.toSnapshot())));
+      return { original, restored };
+    }
+
+    it("restores state, with frozen records and a bumped messagesVersion", () => {
+      const { original, restored } = resumed([
+        { type: "user", message: { role: "user", content: "hi" } },
+        assistantMessage("msg_1", [{ type: "text", text: "hello" }], { input_tokens: 5000 }),
+      ]);
+      expect(restored.getState()).toEqual(original.getState());
+      expect(Object.isFrozen(restored.getMessages()[1])).toBe(true);
+      expect(restored.messagesVersion).toBeGreaterThan(0);
+    });
+
+    it("attaches a later tool result to the restored last assistant message", () => {
+      const { restored } = resumed([assistantMessage("msg_1", [toolUse("toolu_1")])]);
+      restored.replayEvents([toolResult("toolu_1", "file.txt")]);
+      expect(restored.getMessages()[0].tool_calls![0]).toMatchObject({ status: "completed", output: "file.txt" });
+    });
+
+    it("still drops assistant ids seen before the snapshot", () => {
+      const { restored } = resumed([assistantMessage("msg_1", [{ type: "text", text: "hello" }])]);
+      restored.replayEvents([assistantMessage("msg_1", [{ type: "text", text: "hello again" }])]);
+      expect(restored.getMessages()).toHaveLength(1);
+    });
+  });
 });
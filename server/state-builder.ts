@@ -59,6 +59,28 @@ export interface AskUserQuestion {
   multiSelect: boolean;
 }
 
+// -- Replay snapshot (persisted by the bridge's replay cache) --
+
+/**
+ * What a replay has built so far: committed messages plus the bookkeeping the
+ * next JSONL events depend on (seen message ids, tool_use_id lookup, usage).
+ * JSON-serializable. Streaming accumulators aren't part of it — replay never
+ * leaves any behind.
+ */
+export interface StateBuilderSnapshot {
+  model: string;
+  contextPct: number;
+  messages: BBMessage[];
+  seenMessageIds: string[];
+  toolIdToIndex: [string, number][];
+  lastCommittedIndex: number;
+  currentMessagePushed: boolean;
+  turnHasAssistant: boolean;
+  lastInputTokens: number;
+  lastOutputTokens: number;
+  contextWindow: number;
+}
+
 // -- Signal types (what changed after processing a CC event) --
 
 export type StateSignal =
@@ -75,6 +97,21 @@ export type StateSignal =
 const LOCAL_CMDS = new Set(["context", "cost", "compact", "help", "clear"]);
 const DEFAULT_CONTEXT_WINDOW = 200_000;
 
+// -- Helper: frozen message records --
+//
+// Committed messages are immutable once they enter state.messages: a patch
+// (content_block_stop, tool result) replaces the record instead of editing it.
+// Snapshots can then share records — getState() hands out the same frozen
+// objects every time instead of deep-cloning the whole transcript.
+
+function freezeMessage(msg: BBMessage): BBMessage {
+  if (msg.tool_calls) {
+    // Copy the calls: the streaming accumulators stay mutable
+    msg.tool_calls = Object.freeze(msg.tool_calls.map((c) => Object.freeze({ ...c }))) as BBToolCall[];
+  }
+  return Object.freeze(msg);
+}
+
 // -- Helper: extract human-readable tool input --
 
 function extractToolInput(name: string, args: Record<string, unknown>): string {
@@ -139,6 +176,11 @@ export class StateBuilder {
   // to attach tool results. Separate from currentToolCalls so replay of a second
   // assistant message doesn't inherit the first message's tool calls.
   private lastCommittedToolCalls: BBToolCall[] = [];
+  private lastCommittedIndex = -1;                         // its message's index in state.messages
+  // The currentToolCalls array lastCommittedToolCalls was copied from. While
+  // still current, tool results are mirrored into it so a later content_block_stop
+  // re-committing the calls keeps their status and output.
+  private committedSource: BBToolCall[] | null = null;
 
   // AskUserQuestion suppression — block indices and tool_use_ids to hide from UI
   private askUserBlockIndices = new Set<number>();
@@ -188,6 +230,15 @@ export class StateBuilder {
   // current events — saves ~95% of SSE bandwidth over cellular.
   private _messagesVersion = 0;
 
+  // Frozen copy of state.messages for the current _messagesVersion — shared by
+  // every getState()/getMessages() until the next mutation.
+  private messagesSnapshot: readonly BBMessage[] | null = null;
+
+  // Serialized size of each frozen record. Records never change, so after a
+  // mutation only the new record is stringified to size messages[] again.
+  private recordBytes = new WeakMap<BBMessage, number>();
+  private messagesBytes = -1;                              // for _messagesVersion; -1 = stale
+
   constructor(sessionId: string, project: string) {
     this.state = {
       session: { id: sessionId, model: "", project, context_pct: 0 },
@@ -198,13 +249,38 @@ export class StateBuilder {
     };
   }
 
+  /** Frozen snapshot. Message records are shared between snapshots, not copied. */
   getState(): BBState {
-    return JSON.parse(JSON.stringify(this.state));
+    return Object.freeze({
+      ...this.state,
+      session: Object.freeze({ ...this.state.session }),
+      messages: this.getMessages(),
+    });
   }
 
-  /** Committed messages — cheaper than getState() for mid-turn broadcasts. */
+  /** Committed messages — cheaper than getState() for mid-turn broadcasts.
+   *  Frozen, and the same array until messagesVersion changes. */
   getMessages(): BBMessage[] {
-    return JSON.parse(JSON.stringify(this.state.messages));
+    if (!this.messagesSnapshot) this.messagesSnapshot = Object.freeze(this.state.messages.slice());
+    return this.messagesSnapshot as BBMessage[];
+  }
+
+  /** Byte length of JSON.stringify(getMessages()), cached per messagesVersion. */
+  getMessagesBytes(): number {
+    if (this.messagesBytes < 0) {
+      const messages = this.state.messages;
+      let bytes = 2 + Math.max(messages.length - 1, 0); // brackets and commas
+      for (const msg of messages) {
+        let b = this.recordBytes.get(msg);
+        if (b === undefined) {
+          b = Buffer.byteLength(JSON.stringify(msg), "utf8");
+          this.recordBytes.set(msg, b);
+        }
+        bytes += b;
+      }
+      this.messagesBytes = bytes;
+    }
+    return this.messagesBytes;
   }
 
   /** Monotonic version counter for state.messages — increments on every mutation. */
@@ -212,14 +288,29 @@ export class StateBuilder {
     return this._messagesVersion;
   }
 
-  /** Bump after any state.messages mutation (push or in-place patch). */
+  /** Bump after any state.messages mutation (push or replace). */
   private bumpMessages(): void {
     this._messagesVersion++;
+    this.messagesSnapshot = null;
+    this.messagesBytes = -1;
+  }
+
+  private pushMessage(msg: BBMessage): void {
+    this.state.messages.push(freezeMessage(msg));
+    this.bumpMessages();
+  }
+
+  /** Replace message i with a patched copy — records are never edited in place. */
+  private patchMessage(i: number, patch: Partial<BBMessage>): BBMessage {
+    const msg = freezeMessage({ ...this.state.messages[i], ...patch });
+    this.state.messages[i] = msg;
+    this.bumpMessages();
+    return msg;
   }
 
   /** The in-flight streaming message, or null when idle.
    *  Once handleAssistant has committed the message, the committed copy in
-   *  state.messages is patched in place by onContentBlockStop — so the streaming
+   *  state.messages is re-committed by onContentBlockStop — so the streaming
    *  overlay only includes content NOT yet in the committed message (new tools
    *  still accumulating JSON, text not yet stopped). This prevents the same
    *  tool_call appearing in both messages[] and the overlay simultaneously. */
@@ -238,7 +329,7 @@ export class StateBuilder {
     }
 
     // When the message is already committed, the committed copy in
-    // state.messages has text, thinking, and tool_calls patched in place by
+    // state.messages has text, thinking, and tool_calls re-committed by
     // onContentBlockStop. The overlay only surfaces what's NOT yet committed:
     // new tools still accumulating, and activity for the working indicator.
     if (this.currentMessagePushed) {
@@ -308,7 +399,7 @@ export class StateBuilder {
 
   /** Replay JSONL events (from parseSessionJSONL). Builds state silently — no deltas. */
   replayFromJSONL(events: string[]): void {
-    this.replaying = true;
+    const ccEvents: Record<string, unknown>[] = [];
     for (const str of events) {
       let wrapper: { event?: Record<string, unknown> };
       try {
@@ -316,14 +407,55 @@ export class StateBuilder {
       } catch {
         continue;
       }
-      const ccEvent = wrapper.event;
-      if (ccEvent) {
-        this.handleEvent(ccEvent);
-      }
+      if (wrapper.event) ccEvents.push(wrapper.event);
     }
+    this.replayEvents(ccEvents);
+  }
+
+  /** Replay already-parsed CC events (from the streaming JSONL reader). */
+  replayEvents(events: Record<string, unknown>[]): void {
+    this.replaying = true;
+    for (const event of events) this.handleEvent(event);
     this.replaying = false;
   }
 
+  /** Snapshot for the replay cache — take it between replayed JSONL events.
+   *  Shares the frozen message records, so it is cheap until serialized. */
+  toSnapshot(): StateBuilderSnapshot {
+    return {
+      model: this.state.session.model,
+      contextPct: this.state.session.context_pct,
+      messages: this.getMessages(),
+      seenMessageIds: [...this.seenMessageIds],
+      toolIdToIndex: [...this.toolIdToIndex],
+      lastCommittedIndex: this.lastCommittedIndex,
+      currentMessagePushed: this.currentMessagePushed,
+      turnHasAssistant: this.turnHasAssistant,
+      lastInputTokens: this.lastInputTokens,
+      lastOutputTokens: this.lastOutputTokens,
+      contextWindow: this.contextWindow,
+    };
+  }
+
+  /** Load a toSnapshot() into a fresh builder. Replaying the JSONL lines after
+   *  the snapshot then builds the same state as replaying the whole file. */
+  restoreSnapshot(snap: StateBuilderSnapshot): void {
+    this.state.session.model = snap.model;
+    this.state.session.context_pct = snap.contextPct;
+    this.state.messages = snap.messages.map((m) => freezeMessage({ ...m }));
+    this.bumpMessages();
+    this.seenMessageIds = new Set(snap.seenMessageIds);
+    this.toolIdToIndex = new Map(snap.toolIdToIndex);
+    this.lastCommittedIndex = snap.lastCommittedIndex;
+    this.lastCommittedToolCalls = this.state.messages[snap.lastCommittedIndex]?.tool_calls || [];
+    this.committedSource = null;
+    this.currentMessagePushed = snap.currentMessagePushed;
+    this.turnHasAssistant = snap.turnHasAssistant;
+    this.lastInputTokens = snap.lastInputTokens;
+    this.lastOutputTokens = snap.lastOutputTokens;
+    this.contextWindow = snap.contextWindow;
+  }
+
   // -- Event handlers --
 
   private handleSystem(event: Record<string, unknown>): void {
@@ -339,7 +471,7 @@ export class StateBuilder {
     // Slash commands — handle both string and {name, description} shapes
     const rawCmds = event.slash_commands as unknown[] | undefined;
     if (rawCmds && Array.isArray(rawCmds)) {
-      this.state.slashCommands = rawCmds.map((cmd) => {
+      this.state.slashCommands = Object.freeze(rawCmds.map((cmd) => {
         if (typeof cmd === "string") {
           const name = cmd.replace(/^\//, "");
           return { name, description: "", local: LOCAL_CMDS.has(name) };
@@ -351,7 +483,7 @@ export class StateBuilder {
           description: obj.description || "",
           local: LOCAL_CMDS.has(name),
         };
-      });
+      })) as BBSlashCommand[];
     }
 
     this.state.status = "working";
@@ -509,10 +641,10 @@ export class StateBuilder {
       // already pushed it. Without this guard, blocks from a new inner API call
       // (after mini-reset) would overwrite the PREVIOUS message's content.
       if (this.currentMessagePushed) {
-        const lastMsg = this.state.messages[this.state.messages.length - 1];
+        const last = this.state.messages.length - 1;
+        const lastMsg = this.state.messages[last];
         if (lastMsg?.role === "assistant") {
-          lastMsg.content = this.currentText || lastMsg.content;
-          this.bumpMessages();
+          this.patchMessage(last, { content: this.currentText || lastMsg.content });
         }
       }
       this.lastSignal = { signal: "text" };
@@ -554,11 +686,12 @@ export class StateBuilder {
       // Patch the committed assistant message's tool_calls — but only if
       // handleAssistant already pushed it (same guard as text patching).
       if (this.currentMessagePushed) {
-        const lastMsg = this.state.messages[this.state.messages.length - 1];
-        if (lastMsg?.role === "assistant") {
-          lastMsg.tool_calls = [...this.currentToolCalls];
-          this.lastCommittedToolCalls = lastMsg.tool_calls;
-          this.bumpMessages();
+        const last = this.state.messages.length - 1;
+        if (this.state.messages[last]?.role === "assistant") {
+          const msg = this.patchMessage(last, { tool_calls: this.currentToolCalls });
+          this.lastCommittedToolCalls = msg.tool_calls!;
+          this.lastCommittedIndex = last;
+          this.committedSource = this.currentToolCalls;
         }
       }
 
@@ -581,10 +714,9 @@ export class StateBuilder {
 
       // Patch committed assistant message (same guard as text/tool patching)
       if (this.currentMessagePushed) {
-        const lastMsg = this.state.messages[this.state.messages.length - 1];
-        if (lastMsg?.role === "assistant") {
-          lastMsg.thinking = combined;
-          this.bumpMessages();
+        const last = this.state.messages.length - 1;
+        if (this.state.messages[last]?.role === "assistant") {
+          this.patchMessage(last, { thinking: combined });
         }
       }
 
@@ -608,8 +740,7 @@ export class StateBuilder {
     if (event.isApiErrorMessage) {
       const errorText = extractApiErrorText(message);
       this.state.status = "idle";
-      this.state.messages.push({ role: "assistant", content: errorText });
-      this.bumpMessages();
+      this.pushMessage({ role: "assistant", content: errorText });
       this.lastSignal = { signal: "status" };
       return;
     }
@@ -711,8 +842,7 @@ export class StateBuilder {
       ...(toolCalls && { tool_calls: toolCalls }),
       ...(thinking && { thinking }),
     };
-    this.state.messages.push(msg);
-    this.bumpMessages();
+    this.pushMessage(msg);
     this.currentMessagePushed = true;
     this.turnHasAssistant = true;
 
@@ -720,6 +850,8 @@ export class StateBuilder {
     // toolIdToIndex is intentionally NOT cleared here — handleUser needs it next,
     // and tool_use_ids are unique per session so stale entries don't collide.
     this.lastCommittedToolCalls = msg.tool_calls || [];
+    this.lastCommittedIndex = this.state.messages.length - 1;
+    this.committedSource = toolCalls || null;
 
     // Only reset during replay (where message_start never fires between
     // consecutive assistant messages). During live streaming, onMessageStart
@@ -753,22 +885,21 @@ export class StateBuilder {
           content.slice(suffixIdx + DEPOSIT_SUFFIX.length).trim().length > 0;
         if (hasUserText) {
           // Staged upload with user text — keep full content
-          this.state.messages.push({ role: "user", content });
+          this.pushMessage({ role: "user", content });
         } else {
           // Pure bridge-injected message — strip prefix, mark synthetic
           const stripped = content.slice(syntheticMatch[0].length);
-          this.state.messages.push({ role: "user", content: stripped, synthetic: true });
+          this.pushMessage({ role: "user", content: stripped, synthetic: true });
         }
       } else {
-        this.state.messages.push({ role: "user", content });
+        this.pushMessage({ role: "user", content });
       }
-      this.bumpMessages();
       return;
     }
 
     // Array content = tool results
     if (Array.isArray(content)) {
-      let hadToolUpdate = false;
+      let updated: BBToolCall[] | null = null;
       for (const block of content) {
         if (block.type !== "tool_result") continue;
 
@@ -782,8 +913,7 @@ export class StateBuilder {
         const idx = this.toolIdToIndex.get(toolUseId);
         if (idx === undefined) continue;
 
-        const call = this.lastCommittedToolCalls[idx];
-        if (!call) continue;
+        if (!this.lastCommittedToolCalls[idx]) continue;
 
         // Extract result text — can be string or array of {type:"text", text:"..."}
         let resultText: string | null = null;
@@ -797,12 +927,17 @@ export class StateBuilder {
         }
 
         const status = block.is_error ? "error" : "completed";
-        call.status = status;
-        call.output = resultText;
-        hadToolUpdate = true;
+        if (!updated) updated = [...this.lastCommittedToolCalls];
+        updated[idx] = { ...updated[idx], status, output: resultText };
+        const live = this.committedSource === this.currentToolCalls ? this.currentToolCalls[idx] : undefined;
+        if (live) {
+          live.status = status;
+          live.output = resultText;
+        }
       }
-      if (hadToolUpdate) {
-        this.bumpMessages();
+      if (updated) {
+        const msg = this.patchMessage(this.lastCommittedIndex, { tool_calls: updated });
+        this.lastCommittedToolCalls = msg.tool_calls!;
         this.lastSignal = { signal: "structure" };
       }
     }
@@ -814,11 +949,10 @@ export class StateBuilder {
 
     // Process exit error — surface as inline error message
     if (event.is_error && typeof event.result === "string" && event.result) {
-      this.state.messages.push({
+      this.pushMessage({
         role: "assistant",
         content: event.result,
       });
-      this.bumpMessages();
     }
 
     // Extract contextWindow from modelUsage